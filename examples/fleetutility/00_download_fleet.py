@@ -0,0 +1,17 @@
+"""
+Downloads the same *.MER file to several terminals at once.
+The file is read once, up to max_workers terminals are worked on at a time,
+and a failed terminal is retried up to retries times.
+"""
+
+from pymeu import FleetUtility
+fu = FleetUtility(
+    comms_paths=['YourPanelViewIpAddress1', 'YourPanelViewIpAddress2', 'YourPanelViewIpAddress3'],
+    max_workers=8,
+    retries=1,
+    timeout_sec=300
+)
+resp = fu.download('YourMERFile.mer', overwrite=True)
+for (comms_path, target_resp) in resp.responses.items():
+    print(f'{comms_path}: {target_resp.status}')
+print(f'{resp.stats.succeeded} of {resp.stats.targets} succeeded, {resp.stats.bytes_per_sec:.0f} bytes/sec overall.')
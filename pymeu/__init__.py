@@ -1,4 +1,5 @@
 from .cfutility import CFUtility
+from .fleetutility import FleetUtility
 from .meutility import MEUtility
 
 __version_info__ = (0, 4, 8)
@@ -0,0 +1,231 @@
+import asyncio
+from enum import IntEnum
+import itertools
+import struct
+
+from . import comms
+
+DRIVER_NAME_ASYNCIO = 'asyncio'
+
+EIP_PORT = 44818
+EIP_PROTOCOL_VERSION = 1
+EIP_HEADER_FORMAT = '<HHII8sI'
+EIP_HEADER_SIZE_BYTES = 24
+SOCKET_TIMEOUT_SEC = 5.0
+
+# Unconnected send values, same as the pycomm3 defaults
+UNCONNECTED_SEND_PRIORITY = 0x0A
+UNCONNECTED_SEND_TIMEOUT_TICKS = 0x05
+
+class EIPCommand(IntEnum):
+    REGISTER_SESSION = 0x0065
+    UNREGISTER_SESSION = 0x0066
+    SEND_RR_DATA = 0x006F
+
+class CPFItem(IntEnum):
+    NULL_ADDRESS = 0x0000
+    UNCONNECTED_DATA = 0x00B2
+
+class CIPService(IntEnum):
+    UNCONNECTED_SEND = 0x52
+
+class CIPSegment(IntEnum):
+    CLASS = 0x20
+    INSTANCE = 0x24
+    ATTRIBUTE = 0x30
+    PORT_EXTENDED = 0x10
+
+CONNECTION_MANAGER_CLASS = 0x06
+CONNECTION_MANAGER_INSTANCE = 0x01
+
+class Response(comms.Response):
+    # Falsy when the request failed, the same as a pycomm3 Tag,
+    # so callers can keep using 'if not resp'.
+    def __bool__(self):
+        return self.error is None
+
+def _pack_logical_segment(segment_type: int, value: int) -> bytes:
+    # 8-bit format if it fits, otherwise 16-bit format with a pad byte
+    if value <= 0xFF: return bytes([segment_type, value])
+    return bytes([segment_type | 0x01, 0x00]) + struct.pack('<H', value)
+
+def pack_request_path(class_code: int, instance: int, attribute: int) -> bytes:
+    path = _pack_logical_segment(CIPSegment.CLASS, class_code)
+    if instance is not None: path += _pack_logical_segment(CIPSegment.INSTANCE, instance)
+    if attribute is not None: path += _pack_logical_segment(CIPSegment.ATTRIBUTE, attribute)
+    return path
+
+def pack_route_path(route: list[tuple[int, int | str]]) -> bytes:
+    # Port segments from a route as returned by comms.convert_path_pycomm3_to_pylogix,
+    # ex: [(1, 3), (2, '192.168.1.20')] for backplane slot 3 then Ethernet to 192.168.1.20.
+    path = b''
+    for (port, link) in route:
+        if isinstance(link, int):
+            path += bytes([port, link])
+        else:
+            link = str(link).encode()
+            segment = bytes([CIPSegment.PORT_EXTENDED | port, len(link)]) + link
+            if len(segment) % 2: segment += b'\x00'
+            path += segment
+    return path
+
+def pack_message_request(service: int, path: bytes, data: bytes = b'') -> bytes:
+    return bytes([service, len(path) // 2]) + path + data
+
+def pack_unconnected_send(message: bytes, route_path: bytes) -> bytes:
+    data = struct.pack('<BBH', UNCONNECTED_SEND_PRIORITY, UNCONNECTED_SEND_TIMEOUT_TICKS, len(message)) + message
+    if len(message) % 2: data += b'\x00'
+    data += struct.pack('<BB', len(route_path) // 2, 0x00) + route_path
+    path = pack_request_path(CONNECTION_MANAGER_CLASS, CONNECTION_MANAGER_INSTANCE, None)
+    return pack_message_request(CIPService.UNCONNECTED_SEND, path, data)
+
+def pack_send_rr_data(message: bytes) -> bytes:
+    # Interface handle, timeout, then a common packet format with a
+    # null address item and the message as an unconnected data item.
+    return (
+        struct.pack('<IHH', 0, 0, 2) +
+        struct.pack('<HH', CPFItem.NULL_ADDRESS, 0) +
+        struct.pack('<HH', CPFItem.UNCONNECTED_DATA, len(message)) + message
+    )
+
+def unpack_send_rr_data(data: bytes) -> bytes:
+    (_, _, item_count) = struct.unpack('<IHH', data[:8])
+    offset = 8
+    for _ in range(item_count):
+        (item_type, item_length) = struct.unpack('<HH', data[offset:offset + 4])
+        offset += 4
+        if item_type == CPFItem.UNCONNECTED_DATA: return data[offset:offset + item_length]
+        offset += item_length
+    raise ValueError('No unconnected data item in response.')
+
+def unpack_message_response(data: bytes) -> tuple[int, int, bytes]:
+    # Returns the general status, extended status and response data
+    (_, _, general_status, extended_status_size) = struct.unpack('<BBBB', data[:4])
+    extended_status = data[4:4 + (extended_status_size * 2)]
+    extended_status = int.from_bytes(extended_status, byteorder='little') if extended_status else None
+    return general_status, extended_status, data[4 + (extended_status_size * 2):]
+
+class AsyncDriver:
+    # Native asyncio EtherNet/IP client with the same generic_message interface
+    # as comms.Driver, so message presets and request/response formats are shared.
+    # Requests on one driver are sent one at a time (explicit messaging is request/reply),
+    # concurrency comes from having one driver per terminal.
+    #
+    # Messages are always unconnected, with unconnected send for routed paths.
+    def __init__(self, comms_path: str, timeout: float = SOCKET_TIMEOUT_SEC):
+        self._original_path = comms_path
+        self._driver = DRIVER_NAME_ASYNCIO
+        self._me_chunk_size = None
+        self.timeout = timeout
+
+        # Split originally supplied path into IP address and route if needed
+        if comms.is_routed_path(comms_path):
+            (address, route) = comms.convert_path_pycomm3_to_pylogix(comms_path)
+            self._route_path = pack_route_path(route)
+        else:
+            address = comms_path
+            self._route_path = None
+        (self._host, _, port) = address.partition(':')
+        self._port = int(port) if port else EIP_PORT
+
+        self._reader = None
+        self._writer = None
+        self._session = 0
+        self._context = itertools.count()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        (self._reader, self._writer) = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port),
+            self.timeout
+        )
+        try:
+            (status, _) = await self._send(EIPCommand.REGISTER_SESSION, struct.pack('<HH', EIP_PROTOCOL_VERSION, 0))
+            if status != 0: raise ConnectionError(f'Failed to register session with {self._original_path}, status: {status}.')
+        except:
+            await self._disconnect()
+            raise
+
+    async def close(self):
+        if self._writer is None: return
+        try:
+            # No reply is sent for this one
+            self._writer.write(self._pack_header(EIPCommand.UNREGISTER_SESSION, 0))
+            await self._writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        await self._disconnect()
+
+    async def _disconnect(self):
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        self._session = 0
+        if writer is None: return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    def _pack_header(self, command: int, length: int) -> bytes:
+        context = (next(self._context) & 0xFFFFFFFFFFFFFFFF).to_bytes(8, byteorder='little')
+        return struct.pack(EIP_HEADER_FORMAT, command, length, self._session, 0, context, 0)
+
+    async def _send(self, command: int, data: bytes) -> tuple[int, bytes]:
+        if self._writer is None: raise ConnectionError(f'Session to {self._original_path} is not open.')
+        header = self._pack_header(command, len(data))
+        try:
+            self._writer.write(header + data)
+            await self._writer.drain()
+            resp_header = await asyncio.wait_for(self._reader.readexactly(EIP_HEADER_SIZE_BYTES), self.timeout)
+            (resp_command, resp_length, resp_session, resp_status, resp_context, _) = struct.unpack(EIP_HEADER_FORMAT, resp_header)
+            resp_data = await asyncio.wait_for(self._reader.readexactly(resp_length), self.timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            # The session can't be trusted once a reply goes missing
+            await self._disconnect()
+            raise ConnectionError('failed to receive reply') from e
+
+        if (resp_command != command) or (resp_context != header[12:20]):
+            await self._disconnect()
+            raise ConnectionError(f'Unexpected reply from {self._original_path}.')
+        if command == EIPCommand.REGISTER_SESSION: self._session = resp_session
+        return resp_status, resp_data
+
+    async def generic_message(self, service, class_code, instance, attribute, request_data=b'', connected=False) -> Response:
+        message = pack_message_request(service, pack_request_path(class_code, instance, attribute), request_data)
+        if self._route_path: message = pack_unconnected_send(message, self._route_path)
+
+        async with self._lock:
+            (status, data) = await self._send(EIPCommand.SEND_RR_DATA, pack_send_rr_data(message))
+        if status != 0: return Response(None, None, f'Encapsulation status: {status:#x}')
+
+        (general_status, extended_status, value) = unpack_message_response(unpack_send_rr_data(data))
+        if general_status != 0:
+            error = f'General status: {general_status:#x}'
+            if extended_status is not None: error += f', extended status: {extended_status:#x}'
+            return Response(None, None, error)
+        return Response(value, None, None)
+
+    def clone(self):
+        # Not opened yet, use as an async context manager or call open()
+        return AsyncDriver(self._original_path, timeout=self.timeout)
+
+    @property
+    def me_chunk_size(self):
+        if self._me_chunk_size is not None: return self._me_chunk_size
+        probed_size = comms.ME_CHUNK_SIZES.get((self._original_path, self._driver))
+        if probed_size is not None: return probed_size
+        return comms.get_me_chunk_size(self._original_path)
+
+    @me_chunk_size.setter
+    def me_chunk_size(self, new_value):
+        # Overrides the chunk size for this session only, None to go back to the default
+        self._me_chunk_size = new_value
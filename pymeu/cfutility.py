@@ -18,6 +18,7 @@ class CFUtility(object):
         ignore_terminal_valid: bool = False, 
         ignore_driver_valid: bool = False,
         local_dmk_path: str = None,
+        pool: comms.DriverPool = None,
     ):
         """
         Initializes an instance of the MEUtility class.
@@ -29,11 +30,14 @@ class CFUtility(object):
             ignore_terminal_valid (bool): If True, ignore terminal validation checks.
             ignore_driver_valid (bool): If True, ignore driver validation checks.
             local_dmk_path (str): The default directory to assume *.DMK files are found.
+            pool (comms.DriverPool): Optional pool to borrow drivers from instead of opening a new one
+                for each operation.  Can be shared with other MEUtility and CFUtility instances.
         """
         self.comms_path = comms_path
         self.driver = driver
         self.ignore_terminal_valid = ignore_terminal_valid
         self.ignore_driver_valid = ignore_driver_valid
+        self.pool = pool
         self.local_dmk_path = LOCAL_DMK_PATH if local_dmk_path is None else local_dmk_path
 
     def flash_firmware(
@@ -54,7 +58,7 @@ class CFUtility(object):
             if os.path.sep not in dmk_path_local:
                 dmk_path_local = os.path.join(self.local_dmk_path, dmk_path_local)
 
-        with comms.Driver(self.comms_path, self.driver) as cip:
+        with comms.connect(self.comms_path, self.driver, self.pool, discard=True) as cip:
             if (self.driver == comms.DRIVER_NAME_PYLOGIX):
                 if self.ignore_driver_valid:
                     warn('Drive pylogix specified but driver validation is set to IGNORE.')
@@ -1,21 +1,41 @@
 import struct
 
+from .. import aiocomms
 from .. import comms
 from . import messages
 from . import types
 
-def get_cip_identity(cip: comms.Driver) -> types.CIPIdentity:
+def get_cip_hardware_rev(cip: comms.Driver) -> int:
+    # Not supported by every device
+    try:
+        resp = messages.get_hardware_rev(cip)
+        return struct.unpack('<H', resp.value)[0]
+    except:
+        return None
+
+async def get_cip_hardware_rev_async(cip: aiocomms.AsyncDriver) -> int:
+    try:
+        resp = await messages.get_hardware_rev(cip)
+        return struct.unpack('<H', resp.value)[0]
+    except:
+        return None
+
+def get_cip_identity(cip: comms.Driver, hardware_rev: bool = True) -> types.CIPIdentity:
+    # hardware_rev=False skips the second request, for callers that already know it
     resp1 = messages.get_identity(cip)
+    hardware_rev = get_cip_hardware_rev(cip) if hardware_rev else None
+    return _unpack_cip_identity(resp1, hardware_rev)
+
+async def get_cip_identity_async(cip: aiocomms.AsyncDriver) -> types.CIPIdentity:
+    resp1 = await messages.get_identity(cip)
+    hardware_rev = await get_cip_hardware_rev_async(cip)
+    return _unpack_cip_identity(resp1, hardware_rev)
+
+def _unpack_cip_identity(resp1, hardware_rev: int) -> types.CIPIdentity:
     vendor_id, product_type, product_code, major_rev, minor_rev, status, serial_number, product_name_length = struct.unpack('<HHHBBHLB', resp1.value[:15])
     product_name = resp1.value[15:15 + product_name_length].decode('utf-8', errors='ignore')
     serial_number_str = f'{serial_number:08x}'
 
-    try:
-        resp2 = messages.get_hardware_rev(cip)
-        hardware_rev = struct.unpack('<H', resp2.value)[0]
-    except:
-        hardware_rev = None
-
     return types.CIPIdentity(
         hardware_rev=hardware_rev,
         major_rev=major_rev,
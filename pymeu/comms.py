@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+import threading
+import time
 from warnings import warn
 
 # see which drivers are installed on the system
@@ -14,10 +17,45 @@ try:
     AVAILABLE_DRIVERS.append(DRIVER_NAME_PYLOGIX)
 except: pass
 
+# Connection size used for a connected transfer session (large forward open),
+# and the bytes of each connected message that aren't chunk data.
+CONNECTED_SIZE_DEFAULT = 4002
+CONNECTED_OVERHEAD_BYTES = 32
+
+# Defaults for DriverPool
+POOL_IDLE_TIMEOUT_SEC = 60.0
+POOL_MAX_CONNECTIONS = 4
+
+# Get Attribute Single on the vendor ID of the identity object,
+# used to check a pooled driver is still usable.
+HEALTH_CHECK_SERVICE = 0x0E
+HEALTH_CHECK_CLASS = 0x01
+HEALTH_CHECK_INSTANCE = 0x01
+HEALTH_CHECK_ATTRIBUTE = 0x01
+
+# Message rate limiters keyed by gateway (see get_gateway), shared by every
+# driver whose path goes through that gateway.  Set with set_gateway_message_rate.
+GATEWAY_RATE_LIMITERS = {}
+# Number of users of each limiter added with acquire_gateway_message_rate,
+# so it is only removed once the last of them releases it.
+GATEWAY_RATE_LIMITER_REFS = {}
+_GATEWAY_RATE_LOCK = threading.Lock()
+
+# Largest accepted ME chunk size found by probing (see me.transfer.probe_chunk_size),
+# keyed by (comms path, driver name).  Used instead of get_me_chunk_size when present.
+ME_CHUNK_SIZES = {}
+
 class Driver:
 
     def __init__(self, comms_path=None, driver=None):
         self._original_path = comms_path
+        self._gateway = get_gateway(comms_path) if comms_path else None
+        self._me_chunk_size = None
+        self._connected_size = None
+        self._saved_connected = None
+
+        # Optional me.helper.HelperCache for the file queries made on this session
+        self.helper_cache = None
 
         if not AVAILABLE_DRIVERS:
             raise ImportError("You need to install pycomm3 or pylogix")
@@ -58,6 +96,9 @@ class Driver:
             self.cip.close()
 
     def generic_message(self, service, class_code, instance, attribute, request_data=b'', connected=False):
+        limiter = GATEWAY_RATE_LIMITERS.get(self._gateway) if self._gateway else None
+        if limiter: limiter.acquire()
+
         if self._driver == DRIVER_NAME_PYLOGIX:
             ret = self.cip.Message(cip_service=service,
                                    cip_class=class_code,
@@ -70,7 +111,12 @@ class Driver:
                 status = ret.Status
             return Response(ret.Value[44:], None, status)
         elif self._driver == DRIVER_NAME_PYCOMM3:
-            if is_routed_path(self._original_path):
+            if self._connected_size:
+                # The route is part of the forward open, so nothing is added per message
+                connected = True
+                unconnected_send = False
+                route_path = False
+            elif is_routed_path(self._original_path):
                 unconnected_send = True
                 route_path = True
             else:
@@ -119,6 +165,54 @@ class Driver:
         if self._driver == DRIVER_NAME_PYLOGIX:
             self.cip.SocketTimeout = new_value
 
+    def open_connected(self, connection_size: int = CONNECTED_SIZE_DEFAULT) -> bool:
+        # Performs one forward open (a large forward open if connection_size > 511)
+        # and sends every generic message over that connection until close_connected.
+        # The ME chunk size is raised to suit the connection for the same period.
+        #
+        # Only pycomm3 exposes connected generic messages.  For other drivers this
+        # returns False and messages continue to be sent unconnected.
+        if self._driver != DRIVER_NAME_PYCOMM3: return False
+        if self._connected_size: return True
+        # Restored by close_connected (or straight away if the forward open fails),
+        # so later connections and any chunk size override aren't changed by this one
+        self._saved_connected = (self.cip._cfg['connection_size'], self._me_chunk_size)
+        self.cip._cfg['connection_size'] = connection_size
+        try:
+            opened = self.cip._forward_open()
+        except:
+            self._restore_connected()
+            raise
+        if not opened:
+            self._restore_connected()
+            return False
+        self._connected_size = connection_size
+        self._me_chunk_size = get_me_chunk_size_connected(connection_size)
+        return True
+
+    def _restore_connected(self):
+        (connection_size, me_chunk_size) = self._saved_connected
+        self.cip._cfg['connection_size'] = connection_size
+        self._me_chunk_size = me_chunk_size
+
+    def close_connected(self):
+        if not self._connected_size: return
+        self._connected_size = None
+        try:
+            if self._driver == DRIVER_NAME_PYCOMM3:
+                self.cip._forward_close()
+        finally:
+            self._restore_connected()
+
+    @property
+    def connected_size(self):
+        return self._connected_size
+
+    def clone(self):
+        # Opens another session to the same path with the same driver,
+        # so that requests can be in flight on both at once.
+        return Driver(self._original_path, driver=self._driver)
+
     def open(self):
         if self._driver == DRIVER_NAME_PYCOMM3:
             self.cip.open()
@@ -149,8 +243,222 @@ class Driver:
 
     @property
     def me_chunk_size(self):
+        if self._me_chunk_size is not None: return self._me_chunk_size
+        probed_size = ME_CHUNK_SIZES.get((self._original_path, self._driver))
+        if probed_size is not None: return probed_size
         return get_me_chunk_size(self._original_path)
 
+    @me_chunk_size.setter
+    def me_chunk_size(self, new_value):
+        # Overrides the chunk size for this session only, None to go back to the default
+        self._me_chunk_size = new_value
+
+class DriverPool:
+    # Keeps drivers open between operations, keyed by (comms path, driver name),
+    # so a sequence of operations on the same terminal doesn't set up a new
+    # session each time.  Can be shared by MEUtility and CFUtility instances.
+    #
+    # Idle drivers are checked with an identity request before being reused,
+    # closed after idle_timeout seconds without use, and at most max_connections
+    # drivers are open per path (further requests wait for one to be released).
+    def __init__(self, idle_timeout: float = POOL_IDLE_TIMEOUT_SEC, max_connections: int = POOL_MAX_CONNECTIONS):
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self._condition = threading.Condition()
+        self._idle = {}
+        self._open_counts = {}
+
+    def _close_expired(self) -> list['Driver']:
+        # Returns the expired drivers, to be closed once the lock is released
+        expired = []
+        now = time.monotonic()
+        for (key, idle) in self._idle.items():
+            while idle and ((now - idle[0][1]) > self.idle_timeout):
+                (cip, _) = idle.pop(0)
+                self._forget(key)
+                expired.append(cip)
+        return expired
+
+    def _forget(self, key: tuple[str, str]):
+        # Called with the lock held, the driver itself is closed with _close afterwards
+        self._open_counts[key] -= 1
+        self._condition.notify()
+
+    def _close(self, cips: list['Driver']):
+        # Called without the lock, so a slow or dead terminal doesn't hold up other paths
+        for cip in cips:
+            try:
+                cip.__exit__(None, None, None)
+            except Exception:
+                # Already broken, nothing more to clean up
+                pass
+
+    def acquire(self, comms_path: str, driver: str = None, timeout: float = None) -> 'Driver':
+        if driver is None: driver = AVAILABLE_DRIVERS[0] if AVAILABLE_DRIVERS else None
+        key = (comms_path, driver)
+        while True:
+            # Take an idle driver or a free slot with the lock held, then check
+            # or open the driver (both network round trips) without it.
+            expired = []
+            try:
+                with self._condition:
+                    while True:
+                        expired += self._close_expired()
+                        idle = self._idle.setdefault(key, [])
+                        if idle:
+                            # Most recently used first, since it is the most likely to still be healthy
+                            (cip, _) = idle.pop()
+                            break
+                        if self._open_counts.get(key, 0) < self.max_connections:
+                            self._open_counts[key] = self._open_counts.get(key, 0) + 1
+                            cip = None
+                            break
+                        if not self._condition.wait(timeout): raise TimeoutError(f'No connection to {comms_path} available within {timeout} seconds.')
+            finally:
+                self._close(expired)
+
+            if cip is None:
+                try:
+                    return Driver(comms_path, driver=driver)
+                except:
+                    with self._condition:
+                        self._forget(key)
+                    raise
+
+            if is_healthy(cip): return cip
+            with self._condition:
+                self._forget(key)
+            self._close([cip])
+
+    def release(self, cip: 'Driver', discard: bool = False):
+        key = (cip._original_path, cip._driver)
+        # Cached terminal state isn't carried over to the next borrower
+        cip.helper_cache = None
+        with self._condition:
+            if discard:
+                self._forget(key)
+            else:
+                self._idle.setdefault(key, []).append((cip, time.monotonic()))
+                self._condition.notify()
+        if discard: self._close([cip])
+
+    @contextmanager
+    def connect(self, comms_path: str, driver: str = None, timeout: float = None, discard: bool = False):
+        # Drivers are returned to the pool afterwards, unless an exception
+        # was raised in which case the session may be broken and is closed.
+        # Use discard for operations that end the session anyway (i.e. reboot).
+        cip = self.acquire(comms_path, driver, timeout)
+        try:
+            yield cip
+        except:
+            self.release(cip, discard=True)
+            raise
+        self.release(cip, discard=discard)
+
+    def close(self):
+        cips = []
+        with self._condition:
+            for (key, idle) in self._idle.items():
+                while idle:
+                    (cip, _) = idle.pop()
+                    self._forget(key)
+                    cips.append(cip)
+        self._close(cips)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def connect(comms_path: str, driver: str = None, pool: DriverPool = None, discard: bool = False):
+    # Opens a new driver, or borrows one from the pool if given.
+    # Either way the result is used as a context manager.
+    if pool: return pool.connect(comms_path, driver, discard=discard)
+    return Driver(comms_path, driver=driver)
+
+def is_healthy(cip: Driver) -> bool:
+    # Reads the vendor ID from the identity object as a cheap check the session still works
+    try:
+        resp = cip.generic_message(
+            service=HEALTH_CHECK_SERVICE,
+            class_code=HEALTH_CHECK_CLASS,
+            instance=HEALTH_CHECK_INSTANCE,
+            attribute=HEALTH_CHECK_ATTRIBUTE
+        )
+    except Exception:
+        return False
+    return bool(resp) and not resp.error
+
+class MessageRateLimiter:
+    # Token bucket, allowing bursts of up to burst messages and rate messages
+    # per second on average.  Callers over the limit sleep until their turn.
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.burst = burst if burst else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + ((now - self._last) * self.rate))
+            self._last = now
+            # Reserve a token even if it isn't there yet, so waiting callers queue up in order
+            self._tokens -= 1
+            delay = (-self._tokens / self.rate) if self._tokens < 0 else 0
+        if delay: time.sleep(delay)
+
+def get_gateway(path: str) -> str:
+    # The first hop IP address and route up to (not including) the final hop,
+    # ex: 192.168.1.10/bp/3/enet/192.168.2.20 -> 192.168.1.10/1/3.
+    # Paths through the same gateway share its unconnected message buffers.
+    # None for direct paths.
+    if not is_routed_path(path): return None
+    ip_address, route = convert_path_pycomm3_to_pylogix(path)
+    return ip_address + ''.join(f'/{port}/{link}' for (port, link) in route[:-1])
+
+def set_gateway_message_rate(gateway: str, rate: float, burst: int = None):
+    # Limits messages through a gateway (from get_gateway) across all drivers, None to remove
+    with _GATEWAY_RATE_LOCK:
+        GATEWAY_RATE_LIMITER_REFS.pop(gateway, None)
+        if rate:
+            GATEWAY_RATE_LIMITERS[gateway] = MessageRateLimiter(rate, burst)
+        else:
+            GATEWAY_RATE_LIMITERS.pop(gateway, None)
+
+def acquire_gateway_message_rate(gateway: str, rate: float, burst: int = None):
+    # Adds a limiter for the gateway for the duration of one user (i.e. a fleet run),
+    # shared with any other user of the same gateway.  A limiter already set with
+    # set_gateway_message_rate is used as is and left in place.
+    with _GATEWAY_RATE_LOCK:
+        if gateway in GATEWAY_RATE_LIMITER_REFS:
+            GATEWAY_RATE_LIMITER_REFS[gateway] += 1
+        elif gateway not in GATEWAY_RATE_LIMITERS:
+            GATEWAY_RATE_LIMITERS[gateway] = MessageRateLimiter(rate, burst)
+            GATEWAY_RATE_LIMITER_REFS[gateway] = 1
+
+def release_gateway_message_rate(gateway: str):
+    # Removes the limiter once the last user that acquired it releases it
+    with _GATEWAY_RATE_LOCK:
+        if gateway not in GATEWAY_RATE_LIMITER_REFS: return
+        GATEWAY_RATE_LIMITER_REFS[gateway] -= 1
+        if GATEWAY_RATE_LIMITER_REFS[gateway] <= 0:
+            GATEWAY_RATE_LIMITER_REFS.pop(gateway)
+            GATEWAY_RATE_LIMITERS.pop(gateway, None)
+
+def set_me_chunk_size(path: str, driver: str, size: int):
+    ME_CHUNK_SIZES[(path, driver)] = size
+
+def clear_me_chunk_sizes():
+    ME_CHUNK_SIZES.clear()
+
+def get_me_chunk_size_connected(connection_size: int) -> int:
+    # Over a connection the route is in the forward open, so only the
+    # sequence count, message path and chunk header come out of the budget.
+    return connection_size - CONNECTED_OVERHEAD_BYTES
+
 def get_me_chunk_size(path: str) -> int:
     # When files are transferred using ME services, this is the maximum
     # number of bytes used per one message.
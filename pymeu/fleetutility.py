@@ -0,0 +1,289 @@
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import os
+import time
+from typing import Optional
+
+from . import comms
+from .me import types
+from .meutility import LOCAL_RUNTIME_PATH, MEUtility
+
+FLEET_WORKERS_DEFAULT = 16
+FLEET_GATEWAY_WORKERS_DEFAULT = 4
+FLEET_RETRY_DELAY_SEC = 5.0
+
+class FleetUtility(object):
+    def __init__(
+        self,
+        comms_paths: list[str],
+        driver: str = None,
+        ignore_terminal_valid: bool = False,
+        ignore_driver_valid: bool = False,
+        local_runtime_path: str = None,
+        max_workers: int = FLEET_WORKERS_DEFAULT,
+        retries: int = 0,
+        retry_delay_sec: float = FLEET_RETRY_DELAY_SEC,
+        timeout_sec: float = None,
+        pool: comms.DriverPool = None,
+        terminal_info_ttl: float = 0,
+        max_workers_per_gateway: int = FLEET_GATEWAY_WORKERS_DEFAULT,
+        gateway_message_rate: float = None
+    ):
+        """
+        Initializes an instance of the FleetUtility class, which runs the same
+        MEUtility operation against several terminals at once.
+
+        Args:
+            comms_paths (list[str]): The paths to the communications resources (ex: [192.168.1.20, 192.168.1.21]).
+            driver (str): The driver name to use (ex: pycomm3 or pylogix).  If not specified, will default
+                the first one installed that can be found.
+            ignore_terminal_valid (bool): If True, ignore terminal validation checks.
+            ignore_driver_valid (bool): If True, ignore driver validation checks.
+            local_runtime_path (str): The default directory to assume *.MER files are found.
+            max_workers (int): The most terminals to work on at once.
+            retries (int): The number of times to retry a terminal whose operation failed.  Defaults to 0.
+            retry_delay_sec (float): The time to wait before retrying a terminal.
+            timeout_sec (float): If specified, the longest one attempt on a terminal can take.  It is checked
+                between file chunks, so a terminal that stops responding is still bounded by the driver's
+                own socket timeout.  Defaults to None (no limit).
+            pool (comms.DriverPool): Optional pool to borrow drivers from, passed on to each MEUtility.
+            terminal_info_ttl (float): Passed on to each MEUtility, see MEUtility.
+            max_workers_per_gateway (int): The most terminals to work on at once behind the same gateway
+                (routed paths with the same first hop and route up to the last hop, ex: 192.168.1.10/bp/3/enet/...).
+                Direct paths are only limited by max_workers.  Must be at least 1.
+            gateway_message_rate (float): If specified, the most messages per second sent through each
+                gateway, across all terminals behind it.  Defaults to None (no limit).
+        """
+        if max_workers_per_gateway < 1: raise ValueError(f'max_workers_per_gateway must be at least 1, not {max_workers_per_gateway}.')
+
+        # Duplicates removed, order kept
+        self.comms_paths = list(dict.fromkeys(comms_paths))
+        self.driver = driver
+        self.ignore_terminal_valid = ignore_terminal_valid
+        self.ignore_driver_valid = ignore_driver_valid
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay_sec = retry_delay_sec
+        self.timeout_sec = timeout_sec
+        self.pool = pool
+        self.terminal_info_ttl = terminal_info_ttl
+        self.max_workers_per_gateway = max_workers_per_gateway
+        self.gateway_message_rate = gateway_message_rate
+
+        self.local_runtime_path = LOCAL_RUNTIME_PATH if local_runtime_path is None else local_runtime_path
+
+    def _get_utility(self, comms_path: str) -> MEUtility:
+        return MEUtility(
+            comms_path,
+            driver=self.driver,
+            ignore_terminal_valid=self.ignore_terminal_valid,
+            ignore_driver_valid=self.ignore_driver_valid,
+            local_runtime_path=self.local_runtime_path,
+            pool=self.pool,
+            terminal_info_ttl=self.terminal_info_ttl
+        )
+
+    def _get_progress(
+        self,
+        comms_path: str,
+        progress: Optional[Callable[[str, str, int, int], None]],
+        deadline: float
+    ) -> Optional[Callable[[str, str, int, int], None]]:
+        # Prefixes the description with the comms path, and aborts the
+        # transfer (which cleans up its transfer instance) once past the deadline.
+        if (progress is None) and (deadline is None): return None
+        def target_progress(desc: str, unit: str, total: int, current: int):
+            if (deadline is not None) and (time.monotonic() > deadline):
+                raise TimeoutError(f'Exceeded timeout of {self.timeout_sec} seconds.')
+            if progress: progress(f'{comms_path} {desc}', unit, total, current)
+        return target_progress
+
+    def _run_target(
+        self,
+        comms_path: str,
+        function: Callable[[MEUtility, Callable], tuple[types.MEResponse, int]],
+        progress: Optional[Callable[[str, str, int, int], None]]
+    ) -> tuple[types.MEResponse, int, int]:
+        # Returns the last response, the number of bytes transferred and the number of attempts
+        for attempt in range(1, self.retries + 2):
+            deadline = (time.monotonic() + self.timeout_sec) if self.timeout_sec else None
+            meu = self._get_utility(comms_path)
+            try:
+                (resp, size) = function(meu, self._get_progress(comms_path, progress, deadline))
+            except Exception as e:
+                # Invalid terminal, unreachable path, etc.
+                device = getattr(meu, 'device', None)
+                if device is not None: device.log.append(f'Exception: {str(e)}')
+                else: print(f'{comms_path}: {str(e)}')
+                (resp, size) = (types.MEResponse(device, types.ResponseStatus.FAILURE), 0)
+
+            if resp.status == types.ResponseStatus.SUCCESS: return (resp, size, attempt)
+            if attempt <= self.retries: time.sleep(self.retry_delay_sec)
+        return (resp, 0, attempt)
+
+    def _schedule(
+        self,
+        function: Callable[[MEUtility, Callable], tuple[types.MEResponse, int]],
+        progress: Optional[Callable[[str, str, int, int], None]],
+        gateways: dict[str, str]
+    ) -> dict[str, tuple[types.MEResponse, int, int]]:
+        # Starts targets as workers free up, skipping over targets whose gateway already
+        # has max_workers_per_gateway running so they don't hold up the rest of the queue.
+        pending = deque(self.comms_paths)
+        running = {}
+        gateway_counts = {}
+        results = {}
+        workers = max(1, min(self.max_workers, len(self.comms_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for _ in range(len(pending)):
+                    if len(running) >= workers: break
+                    comms_path = pending.popleft()
+                    gateway = gateways[comms_path]
+                    if (gateway is not None) and (gateway_counts.get(gateway, 0) >= self.max_workers_per_gateway):
+                        pending.append(comms_path)
+                        continue
+                    gateway_counts[gateway] = gateway_counts.get(gateway, 0) + 1
+                    running[executor.submit(self._run_target, comms_path, function, progress)] = comms_path
+
+                (done, _) = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    comms_path = running.pop(future)
+                    gateway_counts[gateways[comms_path]] -= 1
+                    results[comms_path] = future.result()
+
+        # Same order as comms_paths
+        return {comms_path: results[comms_path] for comms_path in self.comms_paths}
+
+    def _run(
+        self,
+        function: Callable[[MEUtility, Callable], tuple[types.MEResponse, int]],
+        progress: Optional[Callable[[str, str, int, int], None]]
+    ) -> types.MEFleetResponse:
+        start_time = time.monotonic()
+        gateways = {comms_path: comms.get_gateway(comms_path) for comms_path in self.comms_paths}
+        # Reference counted, so a concurrent run through the same gateway keeps its limiter
+        limited_gateways = []
+        if self.gateway_message_rate:
+            for gateway in set(gateways.values()) - {None}:
+                comms.acquire_gateway_message_rate(gateway, self.gateway_message_rate)
+                limited_gateways.append(gateway)
+
+        try:
+            results = self._schedule(function, progress, gateways)
+        finally:
+            for gateway in limited_gateways: comms.release_gateway_message_rate(gateway)
+        elapsed_sec = time.monotonic() - start_time
+
+        responses = {comms_path: resp for (comms_path, (resp, _, _)) in results.items()}
+        succeeded = sum(1 for resp in responses.values() if resp.status == types.ResponseStatus.SUCCESS)
+        total_bytes = sum(size for (_, size, _) in results.values())
+        stats = types.MEFleetStats(
+            targets=len(responses),
+            succeeded=succeeded,
+            failed=len(responses) - succeeded,
+            attempts=sum(attempts for (_, _, attempts) in results.values()),
+            total_bytes=total_bytes,
+            elapsed_sec=elapsed_sec,
+            bytes_per_sec=(total_bytes / elapsed_sec) if elapsed_sec > 0 else 0.0
+        )
+        status = types.ResponseStatus.SUCCESS if (succeeded == len(responses)) else types.ResponseStatus.FAILURE
+        return types.MEFleetResponse(responses, stats, status)
+
+    def download(
+        self,
+        file_path_local: str,
+        file_name_terminal: str = None,
+        delete_logs: bool = False,
+        overwrite: bool = False,
+        replace_comms: bool = False,
+        run_at_startup: bool = True,
+        progress: Optional[Callable[[str, str, int, int], None]] = None,
+        window: int = 1,
+        connected: bool = False,
+        checkpoint_folder_path: str = None,
+        skip_if_same: bool = False
+    ) -> types.MEFleetResponse:
+        """
+        Downloads a *.MER file from the local device to every remote terminal.
+        The file is read once and the same copy is sent to each terminal.
+
+        Args:
+            checkpoint_folder_path (str): If specified, the local directory to keep one download checkpoint
+                per terminal in (see MEUtility.download checkpoint_path), so retries continue where the
+                failed attempt stopped.
+            Others are the same as MEUtility.download.  The progress callback is called from several
+            threads, with the comms path at the start of the description.
+        """
+        # Use default MER directory if one is not specified
+        if not os.path.isfile(file_path_local):
+            if os.path.sep not in file_path_local:
+                file_path_local = os.path.join(self.local_runtime_path, file_path_local)
+
+        with open(file_path_local, 'rb') as f:
+            file_data = f.read()
+        if checkpoint_folder_path: os.makedirs(checkpoint_folder_path, exist_ok=True)
+
+        def download_target(meu: MEUtility, target_progress: Callable) -> tuple[types.MEResponse, int]:
+            checkpoint_path = None
+            if checkpoint_folder_path:
+                checkpoint_path = os.path.join(checkpoint_folder_path, f'{get_folder_name(meu.comms_path)}.json')
+            resp = meu.download(
+                file_path_local=file_path_local,
+                file_name_terminal=file_name_terminal,
+                delete_logs=delete_logs,
+                overwrite=overwrite,
+                replace_comms=replace_comms,
+                run_at_startup=run_at_startup,
+                progress=target_progress,
+                window=window,
+                connected=connected,
+                file_data=file_data,
+                checkpoint_path=checkpoint_path,
+                skip_if_same=skip_if_same
+            )
+            # Nothing was sent to a terminal that had the same file already
+            return (resp, 0 if meu.download_skipped else len(file_data))
+
+        return self._run(download_target, progress)
+
+    def upload(
+        self,
+        folder_path_local: str,
+        file_name_terminal: str,
+        overwrite: bool = False,
+        progress: Optional[Callable[[str, str, int, int], None]] = None,
+        window: int = 1,
+        connected: bool = False
+    ) -> types.MEFleetResponse:
+        """
+        Uploads a *.MER file from every remote terminal to the local device.
+
+        Args:
+            folder_path_local (str): The local path to the target directory (ex: C:\\YourFolder).
+                Each terminal's copy is saved in a subfolder named after its comms path.
+            file_name_terminal (str): The name of the *.MER file on the terminals.
+            Others are the same as MEUtility.upload.  The progress callback is called from
+            several threads, with the comms path at the start of the description.
+        """
+        def upload_target(meu: MEUtility, target_progress: Callable) -> tuple[types.MEResponse, int]:
+            file_path_local = os.path.join(folder_path_local, get_folder_name(meu.comms_path), file_name_terminal)
+            resp = meu.upload(
+                file_path_local=file_path_local,
+                file_name_terminal=file_name_terminal,
+                overwrite=overwrite,
+                progress=target_progress,
+                window=window,
+                connected=connected
+            )
+            if resp.status != types.ResponseStatus.SUCCESS: return (resp, 0)
+            return (resp, os.path.getsize(file_path_local))
+
+        return self._run(upload_target, progress)
+
+def get_folder_name(comms_path: str) -> str:
+    # Local folder name for a comms path, ex: 192.168.1.10/bp/3/enet/192.168.2.20 -> 192.168.1.10_bp_3_enet_192.168.2.20
+    for char in ('/', '\\', ',', ':'):
+        comms_path = comms_path.replace(char, '_')
+    return comms_path
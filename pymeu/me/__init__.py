@@ -1,10 +1,12 @@
 from . import application
+from . import cache
 from . import decompress
 from . import enums
 from . import firmware
 from . import fuwhelper
 from . import helper
 from . import messages
+from . import native
 from . import primitives
 from . import registry
 from . import transfer
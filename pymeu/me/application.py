@@ -121,13 +121,16 @@ def mer_get_shortcuts(
 ) -> list[tuple[str, list[ET.Element]]]:
     
     # Application-specific function for *.MER files to
-    # get the list of communications shortcuts    
-    streams = decompress.archive_to_stream(
+    # get the list of communications shortcuts.
+    #
+    # Only the two RSLinx Enterprise streams are needed, so the
+    # archive is opened lazily rather than decompressing everything.
+    with decompress.open_archive(
         input_path=input_path,
         progress=progress
-    )
-    shortcuts = _mer_get_shortcut_names(streams)
-    paths = _mer_get_shortcut_nodes(streams, shortcuts)
+    ) as streams:
+        shortcuts = _mer_get_shortcut_names(streams)
+        paths = _mer_get_shortcut_nodes(streams, shortcuts)
     for (name, path) in paths:
         filtered_nodes = []
         for node in path:
@@ -313,11 +316,10 @@ def _recipeplus_deserialize_stream(
     stream: types.MEArchive,
     progress: Optional[Callable[[str, str, int, int], None]] = None
 ) -> types.MERecipePlusFile:
-    with olefile.OleFileIO(bytes(stream.data)) as ole:
-        recipe_streams = decompress.decompress_archive(
-            ole=ole,
-            progress=progress
-        )
+    with decompress.open_archive(
+        input_path=bytes(stream.data),
+        progress=progress
+    ) as recipe_streams:
         config = _recipeplus_get_config(streams=recipe_streams)
         ingredients = _recipeplus_get_ingredients(streams=recipe_streams)
         decimal_places = _recipeplus_get_decimal_places(streams=recipe_streams)
@@ -340,14 +342,14 @@ def recipeplus_deserialize(
 ) -> list[types.MERecipePlusFile]:
     # Application-specific function for *.MER files to
     # get RecipePlus data
-    streams = decompress.archive_to_stream(
+    with decompress.open_archive(
         input_path=input_path,
         progress=progress
-    )
-    recipe_streams = util._get_streams_by_name_prefix(streams, 'RecipePlus/')
-    result = []
-    for recipe_stream in recipe_streams:
-        result.append(_recipeplus_deserialize_stream(stream=recipe_stream, progress=progress))
+    ) as streams:
+        recipe_streams = util._get_streams_by_name_prefix(streams, 'RecipePlus/')
+        result = []
+        for recipe_stream in recipe_streams:
+            result.append(_recipeplus_deserialize_stream(stream=recipe_stream, progress=progress))
 
     return result
 
@@ -388,21 +390,21 @@ def recipeplus_to_folder(
 ):
     # Application-specific function to get raw
     # RecipePlus files extracted from *.MER/*.APA files
-    streams = decompress.archive_to_stream(
+    with decompress.open_archive(
         input_path=input_path,
         progress=progress
-    )
-    recipes = util._get_streams_by_name_prefix(streams, 'RecipePlus/')
-    for recipe in recipes:
-        with olefile.OleFileIO(bytes(recipe.data)) as ole:
-            streams = decompress.decompress_archive(
-                ole=ole,
-                progress=progress
-            )
-            for stream in streams:
-                recipe_path = []
-                recipe_path.append(os.path.splitext(recipe.path[-1])[0])
-                for path in stream.path: recipe_path.append(path)
-                stream_output_path = decompress._create_subfolders(output_path, recipe_path)
-                with open(stream_output_path, 'wb') as f:
-                    f.write(stream.data)
\ No newline at end of file
+    ) as archive:
+        recipes = util._get_streams_by_name_prefix(archive, 'RecipePlus/')
+        for recipe in recipes:
+            with olefile.OleFileIO(bytes(recipe.data)) as ole:
+                streams = decompress.decompress_archive(
+                    ole=ole,
+                    progress=progress
+                )
+                for stream in streams:
+                    recipe_path = []
+                    recipe_path.append(os.path.splitext(recipe.path[-1])[0])
+                    for path in stream.path: recipe_path.append(path)
+                    stream_output_path = decompress._create_subfolders(output_path, recipe_path)
+                    with open(stream_output_path, 'wb') as f:
+                        f.write(stream.data)
\ No newline at end of file
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import zlib
+
+from . import types
+
+# Cache files are a small header, a JSON index of the streams and then
+# the stream data back to back:
+#
+# | Bytes | Purpose
+# |-------|---------
+# | 0x00  | CACHE_MAGIC
+# | 0x08  | Index size to follow (in bytes)
+# | 0x0C+ | Index (list of [name, path, offset, size], offset from end of index)
+# |       | Stream data
+CACHE_MAGIC = b'PYMEUC01'
+CACHE_HEADER_SIZE_BYTES = 12
+CACHE_FILE_EXTENSION = '.mec'
+CACHE_DEFAULT_MAX_SIZE_BYTES = 2 * 1024 * 1024 * 1024
+CACHE_HASH_BLOCK_SIZE_BYTES = 1024 * 1024
+
+# Bundle files use the same layout, except the index is an object with any
+# metadata and the list of streams as [name, path, offset, size, crc32].
+BUNDLE_MAGIC = b'PYMEUB01'
+BUNDLE_FILE_EXTENSION = '.meb'
+
+def get_archive_key(input_path: str | bytes, *args) -> str:
+    # SHA-256 of the archive contents, with any extra values that change the
+    # resulting stream set appended (the conversion, i.e. 'archive' or 'fuc',
+    # and for firmware the KEP drivers).  Empty values are skipped, so the
+    # conversion is what keeps the same archive's stream sets apart.
+    hash = hashlib.sha256()
+    if isinstance(input_path, (bytes, bytearray)):
+        hash.update(input_path)
+    else:
+        with open(input_path, 'rb') as f:
+            while block := f.read(CACHE_HASH_BLOCK_SIZE_BYTES):
+                hash.update(block)
+    key = hash.hexdigest()
+    for arg in args:
+        if not arg: continue
+        if isinstance(arg, (list, tuple)): arg = ','.join(sorted(str(x) for x in arg))
+        key += '-' + hashlib.sha256(str(arg).encode('utf-8')).hexdigest()[:16]
+    return key
+
+class MECachedStream:
+    # Same fields as types.MEArchive, but the stream is only copied
+    # out of the memory-mapped cache file the first time data is accessed.
+    def __init__(self, mapped: mmap.mmap, offset: int, name: str, path: list[str], size: int):
+        self._mapped = mapped
+        self._offset = offset
+        self._data = None
+        self.name = name
+        self.path = path
+        self.size = size
+
+    @property
+    def data(self) -> bytearray:
+        if self._data is None: self._data = bytearray(self._mapped[self._offset:self._offset + self.size])
+        return self._data
+
+    @data.setter
+    def data(self, value: bytearray):
+        self._data = value
+
+    @property
+    def view(self) -> memoryview:
+        # Read-only view of the stream in the mapped file, without copying it out
+        if self._data is not None: return memoryview(self._data)
+        return memoryview(self._mapped)[self._offset:self._offset + self.size]
+
+    def __repr__(self) -> str:
+        return f'MECachedStream(name={self.name!r}, path={self.path!r})'
+
+def _map_file(file_path: str, magic: bytes) -> tuple[mmap.mmap, object, int]:
+    # Returns the mapped file, the index and the offset of the stream data.
+    # Raises FileNotFoundError if missing, ValueError if empty or not a valid file.
+    with open(file_path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if mapped[:len(magic)] != magic: raise ValueError(f'Invalid file: {file_path}.')
+        index_size = int.from_bytes(mapped[len(magic):CACHE_HEADER_SIZE_BYTES], byteorder='little')
+        data_offset = CACHE_HEADER_SIZE_BYTES + index_size
+        index = json.loads(mapped[CACHE_HEADER_SIZE_BYTES:data_offset].decode('utf-8'))
+    except ValueError:
+        mapped.close()
+        raise
+    return (mapped, index, data_offset)
+
+def _write_file(file_path: str, magic: bytes, index, streams: list[types.MEArchive]):
+    # Written to a temporary file first so readers never see a partial file
+    index_bytes = json.dumps(index).encode('utf-8')
+    (fd, temp_path) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(magic)
+            f.write(len(index_bytes).to_bytes(CACHE_HEADER_SIZE_BYTES - len(magic), byteorder='little'))
+            f.write(index_bytes)
+            for stream in streams:
+                f.write(stream.data)
+        os.replace(temp_path, file_path)
+    except:
+        os.remove(temp_path)
+        raise
+
+def write_bundle(file_path: str, streams: list[types.MEArchive], metadata: dict = None):
+    # Single file with the streams as given (name, path and data), a CRC32 of each
+    # and any metadata, so they can be loaded again without any other processing.
+    entries = []
+    offset = 0
+    for stream in streams:
+        size = len(stream.data)
+        entries.append([stream.name, list(stream.path), offset, size, zlib.crc32(stream.data)])
+        offset += size
+    _write_file(file_path, BUNDLE_MAGIC, {'metadata': metadata or {}, 'streams': entries}, streams)
+
+def read_bundle(file_path: str, verify: bool = True) -> tuple[dict, list[MECachedStream]]:
+    # Returns the metadata and streams written by write_bundle.  The file is
+    # memory-mapped and each stream is only read when its data is accessed.
+    # With verify, every stream is checked against its CRC32 first.
+    try:
+        (mapped, index, data_offset) = _map_file(file_path, BUNDLE_MAGIC)
+    except ValueError as e:
+        # Empty file or bad header
+        raise ValueError(f'Invalid bundle file: {file_path}.') from e
+
+    streams = []
+    try:
+        for (name, path, offset, size, crc32) in index['streams']:
+            if data_offset + offset + size > len(mapped): raise ValueError(f'Bundle file {file_path} is truncated.')
+            stream = MECachedStream(mapped, data_offset + offset, name, path, size)
+            if verify:
+                # Released right away, the mapping can't be closed while a view is held
+                with stream.view as view:
+                    if zlib.crc32(view) != crc32: raise ValueError(f'Bundle file {file_path} failed checksum for stream {name}.')
+            streams.append(stream)
+        metadata = index['metadata']
+    except:
+        # Nothing else holds the mapping yet
+        mapped.close()
+        raise
+    return (metadata, streams)
+
+class MEArchiveCache:
+    # On-disk cache of decompressed stream sets, one file per key.
+    # Least recently used files are evicted once the total size exceeds max_size_bytes.
+    def __init__(self, cache_path: str, max_size_bytes: int = CACHE_DEFAULT_MAX_SIZE_BYTES):
+        self.cache_path = cache_path
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_path, exist_ok=True)
+
+    def _get_file_path(self, key: str) -> str:
+        return os.path.join(self.cache_path, key + CACHE_FILE_EXTENSION)
+
+    def get(self, key: str) -> list[types.MEArchive] | None:
+        file_path = self._get_file_path(key)
+        try:
+            (mapped, index, data_offset) = _map_file(file_path, CACHE_MAGIC)
+        except (FileNotFoundError, ValueError):
+            # Treat anything missing or unreadable (i.e. empty) as a miss,
+            # it will be replaced on the next put
+            return None
+
+        try:
+            streams = []
+            for (name, path, offset, size) in index:
+                if data_offset + offset + size > len(mapped): raise ValueError(f'Cache file {file_path} is truncated.')
+                streams.append(MECachedStream(mapped, data_offset + offset, name, path, size))
+            # Touch the file so eviction is least recently used rather than least recently written
+            os.utime(file_path)
+        except (OSError, TypeError, ValueError):
+            # Truncated, malformed or evicted in the meantime, also a miss.
+            # Otherwise the mapping is closed once the streams are no longer referenced.
+            mapped.close()
+            return None
+        return streams
+
+    def put(self, key: str, streams: list[types.MEArchive]):
+        index = []
+        offset = 0
+        for stream in streams:
+            size = len(stream.data)
+            index.append([stream.name, list(stream.path), offset, size])
+            offset += size
+        _write_file(self._get_file_path(key), CACHE_MAGIC, index, streams)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for file in os.listdir(self.cache_path):
+            if not file.endswith(CACHE_FILE_EXTENSION): continue
+            stat = os.stat(os.path.join(self.cache_path, file))
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        total_size = sum(size for (_, size, _) in entries)
+        for (_, size, file) in sorted(entries):
+            if total_size <= self.max_size_bytes: break
+            try:
+                os.remove(os.path.join(self.cache_path, file))
+            except OSError:
+                # Still mapped on some platforms, leave it for next time
+                continue
+            total_size -= size
+
+    def clear(self):
+        for file in os.listdir(self.cache_path):
+            if file.endswith(CACHE_FILE_EXTENSION): os.remove(os.path.join(self.cache_path, file))
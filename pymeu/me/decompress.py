@@ -1,8 +1,14 @@
-from collections.abc import Callable
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from enum import StrEnum
+import mmap
 import olefile
 import os
-from typing import Optional
+import shutil
+from typing import BinaryIO, Optional
 
+from . import cache as archive_cache
+from . import native
 from . import types
 
 CHUNK_CONTROL_SIZE_BYTES = 2
@@ -16,6 +22,25 @@ TOKEN_POINTER_SIZE_BYTES = 2
 STREAM_NAME_MAPPEE = '__MAPPEE'
 STREAM_NAME_MAPPER = '__MAPPER'
 
+# Worst case a pointer token expands 2 bytes into 16, so a page
+# can never decompress to more than this multiple of its size.
+PAGE_EXPANSION_LIMIT = 8
+
+# When decompressing in parallel, streams are split into batches of whole
+# pages of about this size so one large stream (i.e. the OS image in a
+# firmware package) is spread across workers instead of being the serial tail.
+PAGE_BATCH_SIZE_BYTES = 1024 * 1024
+
+# Available page decoders.
+class DecompressEngine(StrEnum):
+    NATIVE = 'native' # Compiled decoder from native.c, only available once built (see native.build)
+    REFERENCE = 'reference' # Token-by-token decoder, kept to diff output against
+    TABLE = 'table' # Table-driven decoder using slice copies into a preallocated page buffer
+
+# Lazily built lookup of chunk control word -> (expected chunk length, token runs).
+# Token runs are a 0 for each pointer token, or N for a run of N literal tokens.
+_TOKEN_LAYOUT_TABLE = None
+
 def _get_int8_nibbles(value: int):
     high_nibble = (value >> 4) & 0x0F
     low_nibble = value & 0x0F
@@ -71,6 +96,29 @@ def _decompress_chunk(input: bytearray, control: int, data: bytearray, length: i
 
     return output[len(input):]
 
+def _build_token_layout_table() -> list[tuple[int, bytes]]:
+    table = []
+    for control in range(1 << CHUNK_DATA_SIZE_TOKENS):
+        runs = bytearray()
+        literals = 0
+        for index in range(CHUNK_DATA_SIZE_TOKENS):
+            if _is_pointer(control, index):
+                if literals: runs.append(literals)
+                literals = 0
+                runs.append(0)
+            else:
+                literals += 1
+        if literals: runs.append(literals)
+        tokens = control.bit_count()
+        length = (tokens * TOKEN_POINTER_SIZE_BYTES) + ((CHUNK_DATA_SIZE_TOKENS - tokens) * TOKEN_LITERAL_SIZE_BYTES)
+        table.append((length, bytes(runs)))
+    return table
+
+def _get_token_layout_table() -> list[tuple[int, bytes]]:
+    global _TOKEN_LAYOUT_TABLE
+    if _TOKEN_LAYOUT_TABLE is None: _TOKEN_LAYOUT_TABLE = _build_token_layout_table()
+    return _TOKEN_LAYOUT_TABLE
+
 def _decompress_page(input: bytearray) -> bytearray:
     output = bytearray()
     length = len(input)
@@ -80,7 +128,7 @@ def _decompress_page(input: bytearray) -> bytearray:
 
     # If page is not compressed, return the rest of the page as-is
     if (page_control_bytes[0] == 0x01):
-        output = input[offset:]
+        output = bytearray(input[offset:])
         return output
 
     # Then parse through the rest of the page
@@ -102,27 +150,223 @@ def _decompress_page(input: bytearray) -> bytearray:
     # Return decompressed page bytes
     return output
 
+def _decompress_page_table(input: bytearray) -> bytearray:
+    length = len(input)
+    offset = 0
+    page_control_bytes = input[offset:offset + PAGE_CONTROL_SIZE_BYTES]
+    offset += PAGE_CONTROL_SIZE_BYTES
+
+    # If page is not compressed, return the rest of the page as-is
+    if (page_control_bytes[0] == 0x01):
+        output = bytearray(input[offset:])
+        return output
+
+    # Anything malformed (truncated tokens, pointers reaching before the start
+    # of the page) is handed to the reference decoder so that the result, or the
+    # exception that marks a stream as not compressed, is identical.
+    table = _get_token_layout_table()
+    output = bytearray(length * PAGE_EXPANSION_LIMIT)
+    head = 0
+    while offset < length:
+        # At the start of each chunk is a pair of control bytes
+        if (offset + CHUNK_CONTROL_SIZE_BYTES) > length: return _decompress_page(input)
+        chunk_control_int = input[offset] | (input[offset + 1] << 8)
+        offset += CHUNK_CONTROL_SIZE_BYTES
+        (chunk_expected_length, runs) = table[chunk_control_int]
+        chunk_end = min(offset + chunk_expected_length, length)
+        if (offset >= chunk_end): return _decompress_page(input)
+
+        for run in runs:
+            if offset >= chunk_end: break
+            if run:
+                # Run of literal tokens
+                run = min(run, chunk_end - offset)
+                output[head:head + run] = input[offset:offset + run]
+                head += run
+                offset += run
+                continue
+
+            # Pointer token
+            if (offset + TOKEN_POINTER_SIZE_BYTES) > chunk_end: return _decompress_page(input)
+            token_length = (input[offset] & 0x0F) + 1
+            token_offset = ((input[offset] & 0xF0) << 4) + input[offset + 1]
+            offset += TOKEN_POINTER_SIZE_BYTES
+            if (token_offset > head) or (head == 0): return _decompress_page(input)
+
+            start = head - token_offset
+            if (token_offset == 0):
+                # Offset zero repeats the last byte
+                output[head:head + token_length] = output[head - 1:head] * token_length
+            elif (token_offset >= token_length):
+                # Source doesn't overlap the destination
+                output[head:head + token_length] = output[start:start + token_length]
+            else:
+                # Source overlaps the destination, so the pattern repeats
+                pattern = output[start:head]
+                output[head:head + token_length] = (pattern * (token_length // token_offset + 1))[:token_length]
+            head += token_length
+
+    # Return decompressed page bytes
+    del output[head:]
+    return output
+
+def _decompress_page_native(input: bytearray) -> bytearray:
+    page_control_bytes = input[0:PAGE_CONTROL_SIZE_BYTES]
+
+    # If page is not compressed, return the rest of the page as-is
+    if (page_control_bytes[0] == 0x01):
+        output = bytearray(input[PAGE_CONTROL_SIZE_BYTES:])
+        return output
+
+    # Malformed pages are handed to the reference decoder, same as the table decoder
+    output = bytearray(len(input) * PAGE_EXPANSION_LIMIT)
+    length = native.decompress_page(bytes(input), output)
+    if (length < 0): return _decompress_page(input)
+    del output[length:]
+    return output
+
+_PAGE_DECODERS = {
+    DecompressEngine.REFERENCE: _decompress_page,
+    DecompressEngine.TABLE: _decompress_page_table
+}
+
+def _get_page_decoder(engine: DecompressEngine = None) -> Callable[[bytearray], bytearray]:
+    if engine is None: engine = DEFAULT_ENGINE
+    if engine not in _PAGE_DECODERS: raise ImportError(f'Decompression engine {engine} is not available.')
+    return _PAGE_DECODERS[engine]
+
+def get_engines() -> list[str]:
+    return list(_PAGE_DECODERS)
+
+def register_engine(engine: str, decompress_page: Callable[[bytearray], bytearray]):
+    # Page decoders take the bytes of one page (after the page header) and
+    # return the decompressed page, raising if the page isn't compressed data.
+    _PAGE_DECODERS[engine] = decompress_page
+
+# Prefer the compiled decoder when it has been built
+if native.load():
+    register_engine(DecompressEngine.NATIVE, _decompress_page_native)
+    DEFAULT_ENGINE = DecompressEngine.NATIVE
+else:
+    DEFAULT_ENGINE = DecompressEngine.TABLE
+
 def _decompress_stream(
     input: bytearray,
     progress_desc: str = None,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
 ) -> bytearray:
     output = bytearray()
-    length = len(input)
+    for page in iter_decompress_stream(
+        input=input,
+        progress_desc=progress_desc,
+        progress=progress,
+        engine=engine
+    ):
+        output += page
+    return output
+
+def iter_decompress_stream(
+    input: BinaryIO | bytes,
+    progress_desc: str = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
+) -> Iterator[bytearray]:
+    # Yields one decompressed page at a time.
+    # Pointers never reach into a previous page, so only the page being decoded
+    # (and its 4095 byte context) is held rather than the whole output.
+    #
+    # Pages are read from input as they are needed, so it can be a file-like object.
+    # A page that fails to decompress raises, and it is up to the caller
+    # to decide what to do with the output already consumed.
+    decompress_page = _get_page_decoder(engine)
+    if isinstance(input, (bytes, bytearray, memoryview)):
+        # Buffers are sliced in place, so a memory-mapped stream is never copied whole
+        buffer = memoryview(input)
+        length = len(buffer)
+        read = lambda offset, size: buffer[offset:offset + size]
+    else:
+        start = input.tell()
+        length = input.seek(0, os.SEEK_END) - start
+        input.seek(start)
+        read = lambda offset, size: input.read(size)
+
     offset = 0
     while offset < length:
         # At the start of each page there is an 4 byte header to signify page length
-        page_size = int.from_bytes(input[offset:offset + PAGE_HEADER_SIZE_BYTES], byteorder='little')
+        page_size = int.from_bytes(read(offset, PAGE_HEADER_SIZE_BYTES), byteorder='little')
         offset += PAGE_HEADER_SIZE_BYTES
-        page_bytes = input[offset:offset + page_size]
+        page_bytes = read(offset, page_size)
         offset += page_size
 
-        output += _decompress_page(page_bytes)
+        page = decompress_page(page_bytes)
         if progress:
             desc = f'Decompressing'
             if progress_desc: desc += f' {progress_desc}'
-            progress(desc, 'bytes', length, offset)
+            progress(desc, 'bytes', length, min(offset, length))
+        yield page
 
+def _write_stream_or_raw(
+    input: BinaryIO | bytes,
+    output: BinaryIO,
+    progress_desc: str = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
+):
+    # Streaming counterpart of _decompress_stream_or_raw.  If any page fails,
+    # whatever was written is discarded and the stream is copied as-is.
+    is_buffer = isinstance(input, (bytes, bytearray, memoryview))
+    if not is_buffer: start = input.tell()
+    try:
+        for page in iter_decompress_stream(
+            input=input,
+            progress_desc=progress_desc,
+            progress=progress,
+            engine=engine
+        ):
+            output.write(page)
+    except Exception as e:
+        # Some streams aren't compressed.
+        output.seek(0)
+        output.truncate()
+        if is_buffer:
+            output.write(input)
+        else:
+            input.seek(start)
+            shutil.copyfileobj(input, output)
+
+def _index_pages(input: bytearray) -> list[tuple[int, int]]:
+    # Returns (offset, size) of each page including its header, stepping
+    # through the page headers the same way iter_decompress_stream does.
+    pages = []
+    length = len(input)
+    offset = 0
+    while offset < length:
+        page_size = int.from_bytes(input[offset:offset + PAGE_HEADER_SIZE_BYTES], byteorder='little')
+        pages.append((offset, PAGE_HEADER_SIZE_BYTES + page_size))
+        offset += PAGE_HEADER_SIZE_BYTES + page_size
+    return pages
+
+def _split_stream(input: bytearray, batch_size: int = PAGE_BATCH_SIZE_BYTES) -> list[bytes]:
+    # Each page starts with a fresh output, so any run of whole pages
+    # is itself a stream that decompresses independently of the others.
+    batches = []
+    batch_start = 0
+    batch_end = 0
+    for (offset, size) in _index_pages(input):
+        if (batch_end - batch_start) >= batch_size:
+            batches.append(bytes(input[batch_start:batch_end]))
+            batch_start = offset
+        batch_end = offset + size
+    if (batch_end > batch_start) or not batches: batches.append(bytes(input[batch_start:batch_end]))
+    return batches
+
+def _join_batches(results: list[bytearray]) -> bytearray:
+    output = bytearray(sum(len(x) for x in results))
+    offset = 0
+    for result in results:
+        output[offset:offset + len(result)] = result
+        offset += len(result)
     return output
 
 def _create_subfolders(output_path: str, archive_paths: list[str]):
@@ -147,11 +391,45 @@ def _get_mapper_for_mappee(ole: olefile.OleFileIO, mappee_name: str) -> str:
     mapper_data = ole.openstream(mapper_name).read()
     return _get_mapper_filename(mapper_data)
 
-def decompress_archive(
-    ole: olefile.OleFileIO,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
-) -> list[types.MEArchive]:
-    streams = []
+def _map_container(ole: olefile.OleFileIO) -> mmap.mmap | None:
+    # Only containers opened from a file on disk can be mapped
+    try:
+        return mmap.mmap(ole.fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # io.UnsupportedOperation (i.e. in-memory containers) is an OSError
+        return None
+
+def _unmap_container(mapped: mmap.mmap | None, streams: list[bytes | memoryview]):
+    if mapped is None: return
+    for stream in streams:
+        if isinstance(stream, memoryview): stream.release()
+    try:
+        mapped.close()
+    except BufferError:
+        # A slice is still referenced somewhere (i.e. a traceback),
+        # the mapping is closed when it is collected instead.
+        pass
+
+def _read_stream(ole: olefile.OleFileIO, mapped: mmap.mmap | None, name: str) -> bytes | memoryview:
+    # Returns a view into the mapped container when the sectors of the stream
+    # are contiguous in the file, otherwise the stream is read (copied) as usual.
+    # Small streams live in the mini stream, so are always copied.
+    entry = ole.direntries[ole._find(name)]
+    if (mapped is None) or (entry.size < ole.minisectorcutoff): return ole.openstream(name).read()
+
+    sector = entry.isectStart
+    sectors = (entry.size + ole.sectorsize - 1) // ole.sectorsize
+    for index in range(sector, sector + sectors - 1):
+        if (index >= len(ole.fat)) or (ole.fat[index] != index + 1): return ole.openstream(name).read()
+
+    # Sector 0 starts after the header, which is one sector long
+    offset = (sector + 1) * ole.sectorsize
+    if (offset + entry.size) > len(mapped): return ole.openstream(name).read()
+    return memoryview(mapped)[offset:offset + entry.size]
+
+def _list_streams(ole: olefile.OleFileIO) -> list[tuple[str, str, list[str]]]:
+    # Returns (original name, restored name, restored path) for each file stream
+    results = []
     for stream_path in ole.listdir():
         stream_name = '/'.join(stream_path)
         if (ole.exists(stream_name) and not ole.get_type(stream_name) == olefile.STGTY_STORAGE):
@@ -167,54 +445,273 @@ def decompress_archive(
                 stream_path[-1] = actual_name
             if stream_name.startswith(STREAM_NAME_MAPPER):
                 continue
-            
-            stream_data = ole.openstream(original_name).read()
-            try:
-                stream_data = _decompress_stream(
+
+            results.append((original_name, stream_name, stream_path))
+    return results
+
+def _decompress_batch(input: bytes, engine: DecompressEngine = None) -> bytearray | None:
+    # Runs in the worker processes.  Returns None if the batch isn't compressed data,
+    # anything else (i.e. the engine isn't available in the worker) raises to the caller.
+    _get_page_decoder(engine)
+    try:
+        return _decompress_stream(input=input, engine=engine)
+    except Exception as e:
+        return None
+
+def _decompress_stream_or_raw(
+    input: bytearray,
+    progress_desc: str = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
+) -> bytearray:
+    try:
+        return _decompress_stream(
+            input=input,
+            progress_desc=progress_desc,
+            progress=progress,
+            engine=engine
+        )
+    except Exception as e:
+        # Some streams aren't compressed.
+        #
+        # Is there a better way to retain them and still
+        # print exceptions for failed decompressions?
+        #print(e)
+        if isinstance(input, memoryview): return bytes(input)
+        return input
+
+def decompress_archive(
+    ole: olefile.OleFileIO,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None,
+    workers: int = None,
+    executor: Executor = None,
+    map_container: bool = True
+) -> list[types.MEArchive]:
+    # Check engine up front, otherwise every stream would be kept as not compressed
+    _get_page_decoder(engine)
+    parallel = (executor is not None) or (workers is not None and workers > 1)
+    if parallel and ((executor is None) or isinstance(executor, ProcessPoolExecutor)):
+        # Worker processes only have the built in engines, not ones added with register_engine
+        if (engine is not None) and (engine not in set(DecompressEngine)):
+            raise ValueError(f'Decompression engine {engine} is not built in, so it can\'t be used with a process pool.  Use workers=None or a thread pool executor.')
+
+    # Raw stream bytes are always read here, since the OLE container can't be shared.
+    # If an executor or more than one worker is specified, the streams are then
+    # decompressed in parallel (a process pool is created for the workers if no
+    # executor is given).  Progress is then reported per stream instead of per byte.
+    # If any page of a stream fails, the whole stream is kept as-is like before.
+    # Engines added with register_engine can't be used with a process pool.
+    #
+    # When the container is a file on disk it is memory-mapped (unless map_container
+    # is False), and streams stored in contiguous sectors are decompressed straight
+    # from the mapping instead of being copied first.
+    entries = _list_streams(ole)
+    mapped = _map_container(ole) if map_container else None
+    raw_streams = []
+    try:
+        if not parallel:
+            # One stream at a time, so only one raw stream is held alongside the output
+            results = []
+            for (original_name, stream_name, _) in entries:
+                stream_data = _read_stream(ole, mapped, original_name)
+                results.append(_decompress_stream_or_raw(
                     input=stream_data,
                     progress_desc=stream_name,
-                    progress=progress
-                )
-            except Exception as e:
-                # Some streams aren't compressed.
-                #
-                # Is there a better way to retain them and still
-                # print exceptions for failed decompressions?
-                #print(e)
-                pass
-
-            stream_info = types.MEArchive(
-                name=stream_name,
-                data=stream_data,
-                path=stream_path,
-                size=len(stream_data)
-            )
-                
-            streams.append(stream_info)
+                    progress=progress,
+                    engine=engine
+                ))
+                if isinstance(stream_data, memoryview): stream_data.release()
+        else:
+            raw_streams = [_read_stream(ole, mapped, original_name) for (original_name, _, _) in entries]
+            pool = executor if executor else ProcessPoolExecutor(max_workers=workers)
+            try:
+                # Large streams are split into batches of pages, so work is spread
+                # evenly even when one stream dominates the archive.
+                futures = []
+                for stream_data in raw_streams:
+                    batches = _split_stream(stream_data)
+                    futures.append([pool.submit(_decompress_batch, input=batch, engine=engine) for batch in batches])
+
+                results = []
+                for (stream_data, stream_futures) in zip(raw_streams, futures):
+                    # Pool failures (i.e. a broken process pool) raise here
+                    batch_results = [x.result() for x in stream_futures]
+                    if any(batch_result is None for batch_result in batch_results):
+                        # Some streams aren't compressed.
+                        results.append(bytes(stream_data) if isinstance(stream_data, memoryview) else stream_data)
+                    else:
+                        results.append(_join_batches(batch_results))
+                    if progress: progress('Decompressing', 'streams', len(futures), len(results))
+            finally:
+                if not executor: pool.shutdown()
+    finally:
+        _unmap_container(mapped, raw_streams)
+
+    streams = []
+    for (stream_data, (_, stream_name, stream_path)) in zip(results, entries):
+        stream_info = types.MEArchive(
+            name=stream_name,
+            data=stream_data,
+            path=stream_path,
+            size=len(stream_data)
+        )
+        streams.append(stream_info)
     return streams
 
 def archive_to_stream(
     input_path: str | bytes,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None,
+    workers: int = None,
+    executor: Executor = None,
+    cache: archive_cache.MEArchiveCache = None
 ) -> list[types.MEArchive]:
+    # If a cache is given, streams are loaded from it when the archive
+    # contents have been decompressed before.
+    if cache:
+        key = archive_cache.get_archive_key(input_path, 'archive')
+        streams = cache.get(key)
+        if streams is not None: return streams
+
     with olefile.OleFileIO(input_path) as ole:
         streams = decompress_archive(
             ole=ole,
-            progress=progress
+            progress=progress,
+            engine=engine,
+            workers=workers,
+            executor=executor
         )
-        return streams
+
+    if cache: cache.put(key, streams)
+    return streams
+
+class MELazyStream:
+    # Same fields as types.MEArchive, but the stream is only read
+    # and decompressed the first time data (or size) is accessed.
+    def __init__(self, archive: 'MELazyArchive', original_name: str, name: str, path: list[str]):
+        self._archive = archive
+        self._original_name = original_name
+        self._data = None
+        self.name = name
+        self.path = path
+
+    @property
+    def data(self) -> bytearray:
+        if self._data is None: self._data = self._archive._read(self._original_name, self.name)
+        return self._data
+
+    @data.setter
+    def data(self, value: bytearray):
+        self._data = value
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def extract(self, output_path: str):
+        # Writes the stream to output_path a page at a time, unless it
+        # has already been read into memory.
+        if self._data is not None:
+            with open(output_path, 'wb') as f:
+                f.write(self._data)
+        else:
+            self._archive._write(self._original_name, self.name, output_path)
+
+    def __repr__(self) -> str:
+        return f'MELazyStream(name={self.name!r}, path={self.path!r})'
+
+class MELazyArchive(Mapping):
+    # Read-only view of an ME archive keyed by stream name (with MAPPER names restored).
+    # Only the directory and MAPPER streams are read up front, so the archive
+    # must stay open until the needed streams have been accessed.
+    def __init__(
+        self,
+        input_path: str | bytes,
+        progress: Optional[Callable[[str, str, int, int], None]] = None,
+        engine: DecompressEngine = None
+    ):
+        # Check engine up front, otherwise every stream would be kept as not compressed
+        _get_page_decoder(engine)
+        self._engine = engine
+        self._progress = progress
+        self._ole = olefile.OleFileIO(input_path)
+        self._mapped = _map_container(self._ole)
+        self._streams = {}
+        for (original_name, stream_name, stream_path) in _list_streams(self._ole):
+            self._streams[stream_name] = MELazyStream(self, original_name, stream_name, stream_path)
+
+    def _write(self, original_name: str, stream_name: str, output_path: str):
+        stream_data = _read_stream(self._ole, self._mapped, original_name)
+        try:
+            with open(output_path, 'wb') as output:
+                _write_stream_or_raw(
+                    input=stream_data,
+                    output=output,
+                    progress_desc=stream_name,
+                    progress=self._progress,
+                    engine=self._engine
+                )
+        finally:
+            if isinstance(stream_data, memoryview): stream_data.release()
+
+    def _read(self, original_name: str, stream_name: str) -> bytearray:
+        stream_data = _read_stream(self._ole, self._mapped, original_name)
+        try:
+            return _decompress_stream_or_raw(
+                input=stream_data,
+                progress_desc=stream_name,
+                progress=self._progress,
+                engine=self._engine
+            )
+        finally:
+            if isinstance(stream_data, memoryview): stream_data.release()
+
+    def __getitem__(self, name: str) -> MELazyStream:
+        return self._streams[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._streams)
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def close(self):
+        _unmap_container(self._mapped, [])
+        self._ole.close()
+
+    def __enter__(self) -> 'MELazyArchive':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def open_archive(
+    input_path: str | bytes,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
+) -> MELazyArchive:
+    # Lazy alternative to archive_to_stream for when only some streams are needed.
+    return MELazyArchive(
+        input_path=input_path,
+        progress=progress,
+        engine=engine
+    )
 
 def archive_to_folder(
     input_path: str | bytes, 
     output_path: str,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    engine: DecompressEngine = None
 ):
+    # Streams are decompressed straight to their files a page at a time,
+    # so the decompressed archive is never held in memory.
     if not(os.path.exists(output_path)): os.makedirs(output_path, exist_ok=True)
-    streams = archive_to_stream(
+    with open_archive(
         input_path=input_path,
-        progress=progress
-    )
-    for stream in streams:
-        stream_output_path = _create_subfolders(output_path, stream.path)
-        with open(stream_output_path, 'wb') as f:
-            f.write(stream.data)
\ No newline at end of file
+        progress=progress,
+        engine=engine
+    ) as streams:
+        for stream in streams.values():
+            stream_output_path = _create_subfolders(output_path, stream.path)
+            stream.extract(stream_output_path)
@@ -7,6 +7,7 @@ from typing import Optional
 from warnings import warn
 
 from .. import comms
+from . import cache as archive_cache
 from . import decompress
 from . import fuwhelper
 from . import helper
@@ -33,6 +34,9 @@ CE_BLACKLIST_FILES = [
     'wingding.ttf'
 ]
 
+# Most firmware files downloaded at once on v6+ terminals (see transfer.download_many)
+FIRMWARE_DOWNLOAD_WORKERS = 2
+
 def _create_upgrade_dat(
     version: types.MEFupUpgradeInfVersion,
     card: types.MEFupUpgradeInfCard, 
@@ -220,17 +224,28 @@ def _deserialize_fup_upgrade_inf(input: str) -> types.MEFupUpgradeInf:
 def fup_to_fuc(
     input_path: str,
     kep_drivers: list[str] = None,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ) -> list[types.MEArchive]:
     # Application-specific handling for *.FUP files that
     # keeps streams in memory.
     #
     # This results in an intermediate form that can be used to
     # form the firmware upgrade card or over-the-wire format.
+    #
+    # If a cache is given, the result is loaded from it when the same
+    # package has been converted before with the same KEP drivers.
+    if cache:
+        key = archive_cache.get_archive_key(input_path, 'fuc', kep_drivers)
+        streams = cache.get(key)
+        if streams is not None: return streams
+
     with olefile.OleFileIO(input_path) as ole:
         streams = decompress.decompress_archive(
             ole=ole,
-            progress=progress
+            progress=progress,
+            workers=workers
         )
 
         # In the *.FUP packages specifically, there is some data
@@ -241,13 +256,17 @@ def fup_to_fuc(
         # If KepDrivers were specified, insert the useroptions.txt
         # file to enumerate them
         if kep_drivers: streams.insert(0, _create_user_options(kep_drivers=kep_drivers))
-        return streams
+
+    if cache: cache.put(key, streams)
+    return streams
 
 def fup_to_fuc_folder(
     input_path: str,
     output_path: str,
     kep_drivers: list[str] = None,
     progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ):
     # Application-specific handling for *.FUP files that
     # writes streams to a folder.
@@ -256,24 +275,52 @@ def fup_to_fuc_folder(
     # form the firmware upgrade card or over-the-wire format.
 
     if not(os.path.exists(output_path)): os.makedirs(output_path, exist_ok=True)
-    streams = fup_to_fuc(
+    if cache or (workers and workers > 1):
+        # Parallel decompression and caching work on whole streams in memory
+        streams = fup_to_fuc(
+            input_path=input_path,
+            kep_drivers=kep_drivers,
+            progress=progress,
+            workers=workers,
+            cache=cache
+        )
+        for stream in streams:
+            # In *.FUP packages specifically, there are some _INFORMATION files
+            # that don't need to be exported
+            if stream.name.endswith(INFORMATION_NAME): continue
+
+            stream_output_path = decompress._create_subfolders(output_path, stream.path)
+            with open(stream_output_path, 'wb') as f:
+                f.write(stream.data)
+        return
+
+    # Otherwise streams are written a page at a time, and only the
+    # small *.inf streams needed for Upgrade.dat are read into memory.
+    with decompress.open_archive(
         input_path=input_path,
-        kep_drivers=kep_drivers,
         progress=progress
-    )
-    for stream in streams:
-        # In *.FUP packages specifically, there are some _INFORMATION files
-        # that don't need to be exported
-        if stream.name.endswith(INFORMATION_NAME): continue
+    ) as archive:
+        streams = [_get_upgrade_dat(streams=archive, kep_drivers=kep_drivers)]
+        if kep_drivers: streams.insert(0, _create_user_options(kep_drivers=kep_drivers))
+        for stream in streams:
+            stream_output_path = decompress._create_subfolders(output_path, stream.path)
+            with open(stream_output_path, 'wb') as f:
+                f.write(stream.data)
 
-        stream_output_path = decompress._create_subfolders(output_path, stream.path)
-        with open(stream_output_path, 'wb') as f:
-            f.write(stream.data)
+        for stream in archive.values():
+            # In *.FUP packages specifically, there are some _INFORMATION files
+            # that don't need to be exported
+            if stream.name.endswith(INFORMATION_NAME): continue
+
+            stream_output_path = decompress._create_subfolders(output_path, stream.path)
+            stream.extract(stream_output_path)
 
 def fup_to_fwc(
     input_path: str,
     kep_drivers: list[str] = None,
     progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ) -> list[types.MEArchive]:
     # Application-specific handling for *.FUP files that
     # keeps streams in memory.
@@ -283,7 +330,9 @@ def fup_to_fwc(
     streams = fup_to_fuc(
         input_path=input_path,
         kep_drivers=kep_drivers,
-        progress=progress
+        progress=progress,
+        workers=workers,
+        cache=cache
     )
     upgrade_inf = _get_upgrade_inf(streams)
     
@@ -311,6 +360,8 @@ def fup_to_fwc_folder(
     output_path: str,
     kep_drivers: list[str] = None,
     progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ):
     # Application-specific handling for *.FUP files that
     # writes streams to a folder.
@@ -322,7 +373,9 @@ def fup_to_fwc_folder(
     streams = fup_to_fwc(
         input_path=input_path,
         kep_drivers=kep_drivers,
-        progress=progress
+        progress=progress,
+        workers=workers,
+        cache=cache
     )
     for stream in streams:
         stream_output_path = decompress._create_subfolders(output_path, stream.path)
@@ -332,7 +385,9 @@ def fup_to_fwc_folder(
 def fup_to_otw(
     input_path: str,
     kep_drivers: list[str] = None,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ) -> list[types.MEArchive]:
     # Application-specific handling for *.FUP files that
     # keeps streams in memory.
@@ -342,7 +397,9 @@ def fup_to_otw(
     streams = fup_to_fuc(
         input_path=input_path,
         kep_drivers=kep_drivers,
-        progress=progress
+        progress=progress,
+        workers=workers,
+        cache=cache
     )
     upgrade_inf = _get_upgrade_inf(streams)
 
@@ -369,6 +426,8 @@ def fup_to_otw_folder(
     output_path: str,
     kep_drivers: list[str] = None,
     progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
 ):
     # Application-specific handling for *.FUP files that
     # writes streams to a folder.
@@ -382,13 +441,57 @@ def fup_to_otw_folder(
     streams = fup_to_otw(
         input_path=input_path,
         kep_drivers=kep_drivers,
-        progress=progress
+        progress=progress,
+        workers=workers,
+        cache=cache
     )
     for stream in streams:
         stream_output_path = decompress._create_subfolders(output_path, stream.path)
         with open(stream_output_path, 'wb') as f:
             f.write(stream.data)
 
+def prepare_flash_bundle(
+    input_path: str,
+    output_path: str,
+    kep_drivers: list[str] = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = None,
+    cache: archive_cache.MEArchiveCache = None
+) -> str:
+    # Application-specific handling for *.FUP files that
+    # writes the Over-The-Wire streams to a single bundle file.
+    #
+    # The bundle can be passed to flash_fup_to_terminal (after
+    # load_flash_bundle) instead of the *.FUP file, so flashing
+    # several terminals only decompresses the package once.
+    streams = fup_to_otw(
+        input_path=input_path,
+        kep_drivers=kep_drivers,
+        progress=progress,
+        workers=workers,
+        cache=cache
+    )
+    metadata = {
+        'fup_name': os.path.basename(input_path),
+        'kep_drivers': list(kep_drivers or [])
+    }
+    archive_cache.write_bundle(output_path, streams, metadata)
+    return output_path
+
+def load_flash_bundle(input_path: str, verify: bool = True) -> types.MEFupFlashBundle:
+    # The streams stay in the memory-mapped bundle file until sent
+    (metadata, streams) = archive_cache.read_bundle(input_path, verify)
+    return types.MEFupFlashBundle(
+        fup_name=metadata['fup_name'],
+        kep_drivers=metadata['kep_drivers'],
+        streams=streams
+    )
+
+def _get_stream_data(stream: types.MEArchive) -> bytes:
+    # Bundle streams are sent straight from the mapped file rather than copied out first
+    if isinstance(stream, archive_cache.MECachedStream): return stream.view
+    return stream.data
+
 def get_or_download_fuwhelper(
     cip: comms.Driver,
     device: types.MEDeviceInfo,
@@ -420,14 +523,24 @@ def flash_fup_to_terminal(
     fuwhelper_path_local: str,
     fuwcover_path_local: str = None,
     kep_drivers: list[str] = None,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    download_workers: int = FIRMWARE_DOWNLOAD_WORKERS,
+    bundle: types.MEFupFlashBundle = None,
+    helper_workers: int = None
 ):
-    # Read FUP into memory
-    streams_otw = fup_to_otw(
-        input_path=fup_path_local,
-        kep_drivers=kep_drivers,
-        progress=progress
-    )
+    if bundle:
+        # Already prepared, with the KEP drivers it was prepared with
+        if (kep_drivers is not None) and (sorted(kep_drivers) != sorted(bundle.kep_drivers)):
+            raise ValueError(f'KEP drivers {kep_drivers} do not match bundle KEP drivers {bundle.kep_drivers}.')
+        kep_drivers = bundle.kep_drivers
+        streams_otw = bundle.streams
+    else:
+        # Read FUP into memory
+        streams_otw = fup_to_otw(
+            input_path=fup_path_local,
+            kep_drivers=kep_drivers,
+            progress=progress
+        )
 
     # Ensure firmware upgrade helper is in place
     get_or_download_fuwhelper(
@@ -471,8 +584,8 @@ def flash_fup_to_terminal(
         windows_total_space = fuwhelper.get_total_space(cip, device.me_paths, '\\Windows')
 
         # Check files from MEFileInfo.inf?
-        for file in mefilelist_inf_data.mefiles:
-            fuwhelper.get_file_exists(cip, device.me_paths, f'\\Storage Card{file}')
+        mefile_paths = [f'\\Storage Card{file}' for file in mefilelist_inf_data.mefiles]
+        transfer.get_files_exist(cip, device, mefile_paths, fuwhelper.get_files_exist)
 
         transfer.download_file(
             cip=cip,
@@ -487,10 +600,11 @@ def flash_fup_to_terminal(
         fuwhelper.clear_folder(cip, device.me_paths, '\\Storage Card\\Rockwell Software\\RSViewME')
 
         # Delete files from MEFileInfo.inf?
-        for file in mefilelist_inf_data.mefiles:
-            if fuwhelper.get_file_exists(cip, device.me_paths, f'\\Storage Card{file}'):
+        mefiles_exist = transfer.get_files_exist(cip, device, mefile_paths, fuwhelper.get_files_exist)
+        for file_path in mefile_paths:
+            if mefiles_exist[file_path]:
                 try:
-                    fuwhelper.delete_file(cip, device.me_paths, f'\\Storage Card{file}')
+                    fuwhelper.delete_file(cip, device.me_paths, file_path)
                 except Exception as e:
                     print(e)
 
@@ -545,7 +659,7 @@ def flash_fup_to_terminal(
                 transfer.download(
                     cip=cip,
                     device=device,
-                    file_data=stream.data,
+                    file_data=_get_stream_data(stream),
                     file_path_terminal=stream_path_terminal,
                     overwrite=True,
                     progress=progress
@@ -560,20 +674,30 @@ def flash_fup_to_terminal(
         fuwhelper.stop_process(cip, device.me_paths, 'FUWCover.exe')
         fuwhelper.start_process(cip, device.me_paths, '\\Storage Card\\upgrade\\autorun.exe')
     else:
-        if not(fuwhelper.get_folder_exists(cip, device.me_paths, '\\Storage Card')):
-            fuwhelper.create_folder(cip, device.me_paths, '\\Storage Card')
-        if not(fuwhelper.get_folder_exists(cip, device.me_paths, '\\Storage Card\\vfs')):
-            fuwhelper.create_folder(cip, device.me_paths, '\\Storage Card\\vfs')
-        if not(fuwhelper.get_folder_exists(cip, device.me_paths, '\\Storage Card\\vfs\\platform firmware')):
-            fuwhelper.create_folder(cip, device.me_paths, '\\Storage Card\\vfs\\platform firmware')
-        if (fuwhelper.get_file_exists(cip, device.me_paths, '\\Storage Card\\Step2.dat')):
+        # Check everything up front in one batch, then act on the results in order
+        folder_paths = ['\\Storage Card', '\\Storage Card\\vfs', '\\Storage Card\\vfs\\platform firmware']
+        file_paths = ['\\Storage Card\\Step2.dat']
+        if not kep_drivers: file_paths.append('\\Windows\\useroptions.txt')
+        (folders_exist, files_exist, processes_running) = fuwhelper.get_states(
+            cip=cip,
+            paths=device.me_paths,
+            folder_paths=folder_paths,
+            file_paths=file_paths,
+            process_names=['MERuntime.exe'],
+            workers=helper_workers
+        )
+
+        for folder_path in folder_paths:
+            if not(folders_exist[folder_path]):
+                fuwhelper.create_folder(cip, device.me_paths, folder_path)
+        if files_exist['\\Storage Card\\Step2.dat']:
             fuwhelper.delete_file(cip, device.me_paths, '\\Storage Card\\Step2.dat')
-        if fuwhelper.get_process_running(cip, device.me_paths, 'MERuntime.exe'):
+        if processes_running['MERuntime.exe']:
             fuwhelper.stop_process_me(cip, device.me_paths)
-        if not kep_drivers:
-            if fuwhelper.get_file_exists(cip, device.me_paths, '\\Windows\\useroptions.txt'):
-                fuwhelper.delete_file(cip, device.me_paths, '\\Windows\\useroptions.txt')
+        if files_exist.get('\\Windows\\useroptions.txt'):
+            fuwhelper.delete_file(cip, device.me_paths, '\\Windows\\useroptions.txt')
 
+        files = {}
         for stream in streams_otw:
             if stream.name == 'useroptions.txt': stream.path = ['Windows', 'useroptions.txt']
             if stream.path[0].lower() != 'windows' and stream.path[0].lower() != 'storage card' and stream.path[0].lower() != 'vfs':
@@ -582,14 +706,15 @@ def flash_fup_to_terminal(
             else:
                 # Files with absolute directories
                 stream_path_terminal = '\\' + '\\'.join(stream.path)
+            files[stream_path_terminal] = _get_stream_data(stream)
 
-            transfer.download(
-                cip=cip,
-                device=device,
-                file_data=stream.data,
-                file_path_terminal=stream_path_terminal,
-                overwrite=True,
-                progress=progress
-            )
+        transfer.download_many(
+            cip=cip,
+            device=device,
+            files=files,
+            overwrite=True,
+            progress=progress,
+            workers=download_workers
+        )
 
     return True
\ No newline at end of file
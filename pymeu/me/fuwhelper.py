@@ -65,6 +65,33 @@ def get_file_exists(cip: comms.Driver, paths: types.MEPaths, file_path: str) ->
     if (resp_code != 0): return False    
     return bool(int(resp_data))
 
+def get_files_exist(cip: comms.Driver, paths: types.MEPaths, file_paths: list[str], workers: int = None) -> dict[str, bool]:
+    req_args_list = [[paths.fuwhelper_file, FuwHelperFunctions.GET_FILE_EXISTS, file_path] for file_path in file_paths]
+    results = helper.run_functions(cip, req_args_list, workers)
+    return {file_path: (resp_code == 0) and bool(int(resp_data)) for (file_path, (resp_code, resp_data)) in zip(file_paths, results)}
+
+def get_states(
+    cip: comms.Driver,
+    paths: types.MEPaths,
+    folder_paths: list[str] = [],
+    file_paths: list[str] = [],
+    process_names: list[str] = [],
+    workers: int = None
+) -> tuple[dict[str, bool], dict[str, bool], dict[str, bool]]:
+    # Folder exists, file exists and process running checks all in one batch,
+    # over up to workers sessions (see helper.run_functions).
+    # Returns a dict for each, the same as the single checks.
+    req_args_list = (
+        [[paths.fuwhelper_file, FuwHelperFunctions.GET_FOLDER_EXISTS, folder_path] for folder_path in folder_paths] +
+        [[paths.fuwhelper_file, FuwHelperFunctions.GET_FILE_EXISTS, file_path] for file_path in file_paths] +
+        [[paths.fuwhelper_file, FuwHelperFunctions.GET_PROCESS_RUNNING, process_name] for process_name in process_names]
+    )
+    results = iter(helper.run_functions(cip, req_args_list, workers))
+    states = []
+    for names in (folder_paths, file_paths, process_names):
+        states.append({name: (resp_code == 0) and bool(int(resp_data)) for (name, (resp_code, resp_data)) in zip(names, results)})
+    return tuple(states)
+
 def get_folder_exists(cip: comms.Driver, paths: types.MEPaths, folder_path: str) -> bool:
     req_args = [paths.fuwhelper_file, FuwHelperFunctions.GET_FOLDER_EXISTS, folder_path]
     resp_code, resp_data = helper.run_function(cip, req_args)
@@ -1,7 +1,11 @@
 
+from concurrent.futures import ThreadPoolExecutor
 from enum import StrEnum
+import itertools
+from typing import Optional
 from warnings import warn
 
+from .. import aiocomms
 from .. import comms
 from . import messages
 from . import types 
@@ -11,6 +15,83 @@ from . import types
 # Further investigation needed.
 CREATE_DIR_SUCCESS = 183 # 'b\xb7'
 
+# Most sessions to the terminal used at once by run_functions by default.  Additional
+# sessions are opt-in, since each is another connection to the terminal (and through any
+# gateway).  Read when run_functions is called, so it can be changed at runtime.
+HELPER_WORKERS = 1
+
+class HelperCache:
+    # Results of the file queries below for one session, so repeated checks don't go
+    # back to the terminal.  Kept current by our own downloads, folder creation and
+    # deletes, and cleared on reboot.  Terminal paths are case insensitive.
+    # Set as cip.helper_cache to use it (see MEUtility).
+    def __init__(self):
+        self.file_exists = {}
+        self.file_sizes = {}
+        self.folder_exists = {}
+        self.file_lists = {}
+
+    def _clear_file_lists(self, folder_path: str):
+        # Listings of the folder a file changed in
+        folder_path = folder_path.lower()
+        for search_path in list(self.file_lists):
+            if search_path.rsplit('\\', 1)[0] == folder_path: del self.file_lists[search_path]
+
+    def get_file_exists(self, file_path: str) -> Optional[bool]:
+        return self.file_exists.get(file_path.lower())
+
+    def get_file_size(self, file_path: str) -> Optional[int]:
+        return self.file_sizes.get(file_path.lower())
+
+    def get_folder_exists(self, folder_path: str) -> Optional[bool]:
+        return self.folder_exists.get(folder_path.lower())
+
+    def get_file_list(self, search_path: str) -> Optional[list[str]]:
+        file_list = self.file_lists.get(search_path.lower())
+        return list(file_list) if file_list is not None else None
+
+    def set_file_exists(self, file_path: str, exists: bool):
+        self.file_exists[file_path.lower()] = exists
+        if not exists: self.file_sizes.pop(file_path.lower(), None)
+
+    def set_file_size(self, file_path: str, size: int):
+        self.file_exists[file_path.lower()] = True
+        self.file_sizes[file_path.lower()] = size
+
+    def set_folder_exists(self, folder_path: str, exists: bool):
+        self.folder_exists[folder_path.lower()] = exists
+
+    def set_file_list(self, search_path: str, file_list: list[str]):
+        self.file_lists[search_path.lower()] = list(file_list)
+
+    def add_file(self, file_path: str, size: int):
+        self.set_file_size(file_path, size)
+        folder_path = file_path.rsplit('\\', 1)[0]
+        self._clear_file_lists(folder_path)
+        while folder_path:
+            self.set_folder_exists(folder_path, True)
+            folder_path = folder_path.rsplit('\\', 1)[0] if ('\\' in folder_path) else ''
+
+    def remove_file(self, file_path: str):
+        self.set_file_exists(file_path, False)
+        self._clear_file_lists(file_path.rsplit('\\', 1)[0])
+
+    def forget_file(self, file_path: str):
+        # State unknown (i.e. a failed download), ask the terminal next time
+        self.file_exists.pop(file_path.lower(), None)
+        self.file_sizes.pop(file_path.lower(), None)
+        self._clear_file_lists(file_path.rsplit('\\', 1)[0])
+
+    def clear(self):
+        self.file_exists.clear()
+        self.file_sizes.clear()
+        self.folder_exists.clear()
+        self.file_lists.clear()
+
+def get_cache(cip: comms.Driver) -> Optional[HelperCache]:
+    # AsyncDriver and other sessions without one aren't cached
+    return getattr(cip, 'helper_cache', None)
+
 # Known functions available from RemoteHelper.
 class HelperFunctions(StrEnum):
     CREATE_FILE_LIST = 'FileBrowse' # Args: {Search Path}\\*.{Search Extension}::{Results File Path}, Returns: 1 if result generated
@@ -67,40 +148,154 @@ def run_function(cip: comms.Driver, req_args):
         Only a certain subset of functions are whitelisted for access
         by this method.  They are documented in the HelperFunctions enum.
     """
-    req_data = b''.join(arg.encode() + b'\x00' for arg in req_args)
-
-    resp = messages.run_function(cip, req_data)
+    resp = messages.run_function(cip, _pack_function_request(req_args))
+    return _unpack_function_response(resp, req_args)
+
+async def run_function_async(cip: aiocomms.AsyncDriver, req_args):
+    # Same as run_function, for an AsyncDriver
+    resp = await messages.run_function(cip, _pack_function_request(req_args))
+    return _unpack_function_response(resp, req_args)
+
+def _run_function_or_exception(cip: comms.Driver, req_args) -> tuple[int, str] | Exception:
+    try:
+        return run_function(cip, req_args)
+    except Exception as e:
+        return e
+
+def run_functions(
+    cip: comms.Driver,
+    req_args_list: list,
+    workers: int = None,
+    return_exceptions: bool = False
+) -> list[tuple[int, str] | Exception]:
+    # Runs several independent functions with up to workers requests in flight,
+    # each over its own session to the terminal (the same as registry.get_values),
+    # so a batch takes about len(req_args_list) / workers round trips.
+    # Returns the response code and data for each, in request order.
+    #
+    # A request that fails doesn't stop the others.  Once all have finished the first
+    # failure (in request order) is raised, or with return_exceptions, each failure
+    # is returned in place of its response.
+    req_args_list = list(req_args_list)
+    if workers is None: workers = HELPER_WORKERS
+    workers = max(1, min(workers, len(req_args_list)))
+    if workers == 1:
+        results = [_run_function_or_exception(cip, req_args) for req_args in req_args_list]
+    else:
+        indexes = list(range(len(req_args_list)))
+        groups = [indexes[i::workers] for i in range(workers)]
+        def run_group(index: int) -> list[tuple[int, tuple[int, str] | Exception]]:
+            if index == 0:
+                session = cip
+            else:
+                try:
+                    session = cip.clone()
+                except Exception:
+                    # The terminal (or a gateway) may refuse another session,
+                    # so this group is run on cip once the others are done.
+                    return None
+            try:
+                return [(i, _run_function_or_exception(session, req_args_list[i])) for i in groups[index]]
+            finally:
+                if session is not cip: session.__exit__(None, None, None)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            group_results = list(executor.map(run_group, range(workers)))
+        for (index, group_result) in enumerate(group_results):
+            if group_result is None: group_results[index] = [(i, _run_function_or_exception(cip, req_args_list[i])) for i in groups[index]]
+        results = dict(itertools.chain.from_iterable(group_results))
+        results = [results[i] for i in indexes]
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception): raise result
+    return results
+
+def _pack_function_request(req_args) -> bytes:
+    return b''.join(arg.encode() + b'\x00' for arg in req_args)
+
+def _unpack_function_response(resp, req_args) -> tuple[int, str]:
     if not resp: raise Exception(f'Failed to run function: {req_args}.')
     resp_code = int.from_bytes(resp.value[:4], byteorder='little', signed=False)
     resp_data = resp.value[4:].decode('utf-8').strip('\x00')
     return resp_code, resp_data
 
-def create_file_list_med(cip: comms.Driver, paths: types.MEPaths):
-    req_args = [paths.helper_file,HelperFunctions.CREATE_FILE_LIST, f'\\Temp\\~MER.00\\*.med::{paths.upload_list}']
+def create_file_list(cip: comms.Driver, paths: types.MEPaths, search_path: str):
+    # Lists files matching search_path (ex: \Windows\*.*) to the upload list file
+    req_args = [paths.helper_file, HelperFunctions.CREATE_FILE_LIST, f'{search_path}::{paths.upload_list}']
+    cache = get_cache(cip)
+    if cache: cache.forget_file(paths.upload_list)
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != 0): raise Exception(f'Response code was not zero.  Examine packets.')
     return True
 
+def create_file_list_med(cip: comms.Driver, paths: types.MEPaths):
+    return create_file_list(cip, paths, get_file_list_med_search_path(paths))
+
 def create_file_list_mer(cip: comms.Driver, paths: types.MEPaths):
-    req_args = [paths.helper_file,HelperFunctions.CREATE_FILE_LIST, f'{paths.runtime}\\*.mer::{paths.upload_list}']
-    resp_code, resp_data = run_function(cip, req_args)
-    if (resp_code != 0): raise Exception(f'Response code was not zero.  Examine packets.')
-    return True
+    return create_file_list(cip, paths, get_file_list_mer_search_path(paths))
+
+def get_file_list_med_search_path(paths: types.MEPaths) -> str:
+    return '\\Temp\\~MER.00\\*.med'
+
+def get_file_list_mer_search_path(paths: types.MEPaths) -> str:
+    return f'{paths.runtime}\\*.mer'
 
 def create_folder(cip: comms.Driver, paths: types.MEPaths, dir: str) -> bool:
     req_args = [paths.helper_file, HelperFunctions.CREATE_FOLDER, dir]
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != CREATE_DIR_SUCCESS): raise Exception(f'Failed to execute function: {req_args}, response code: {resp_code}, response data: {resp_data}.')
+    cache = get_cache(cip)
+    if cache: cache.set_folder_exists(dir, True)
     return True
 
 def create_folders(cip: comms.Driver, paths: types.MEPaths, folder_path_terminal: str) -> bool:
+    # Usually there already, so only check each parent folder (all at once) if not
+    if get_folder_exists(cip=cip, paths=paths, folder_path=folder_path_terminal): return True
+
+    subfolders = folder_path_terminal.split('\\')
+    folder_paths = ['\\'.join(subfolders[:i + 1]) for i in range(1, len(subfolders))]
+    folders_exist = get_folders_exist(cip, paths, folder_paths)
+    for current_path in folder_paths:
+        if not folders_exist[current_path]:
+            print(f'Create folder: {current_path}')
+            if not create_folder(cip, paths, current_path): return False
+
+    return True
+
+def create_all_folders(cip: comms.Driver, paths: types.MEPaths, folder_paths_terminal: list[str]) -> bool:
+    # Same as create_folders for several folders, with each round of checks in one batch
+    folder_paths_terminal = list(dict.fromkeys(folder_paths_terminal))
+    folders_exist = get_folders_exist(cip, paths, folder_paths_terminal)
+    missing = [folder_path for folder_path in folder_paths_terminal if not folders_exist[folder_path]]
+    if not missing: return True
+
+    folder_paths = {}
+    for folder_path_terminal in missing:
+        subfolders = folder_path_terminal.split('\\')
+        folder_paths.update(dict.fromkeys('\\'.join(subfolders[:i + 1]) for i in range(1, len(subfolders))))
+    folders_exist = get_folders_exist(cip, paths, list(folder_paths))
+    # Parents before their subfolders
+    for current_path in sorted(folder_paths, key=lambda folder_path: folder_path.count('\\')):
+        if not folders_exist[current_path]:
+            print(f'Create folder: {current_path}')
+            if not create_folder(cip, paths, current_path): return False
+
+    return True
+
+async def create_folder_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths, dir: str) -> bool:
+    req_args = [paths.helper_file, HelperFunctions.CREATE_FOLDER, dir]
+    resp_code, resp_data = await run_function_async(cip, req_args)
+    if (resp_code != CREATE_DIR_SUCCESS): raise Exception(f'Failed to execute function: {req_args}, response code: {resp_code}, response data: {resp_data}.')
+    return True
+
+async def create_folders_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths, folder_path_terminal: str) -> bool:
     subfolders = folder_path_terminal.split('\\')
     current_path = subfolders[0]
     for folder in subfolders[1:]:
         current_path = f'{current_path}\\{folder}'
-        if not get_folder_exists(cip=cip, paths=paths, folder_path=current_path):
-            print(f'Create folder: {current_path}')
-            if not create_folder(cip, paths, current_path): return False
+        if not await get_folder_exists_async(cip=cip, paths=paths, folder_path=current_path):
+            if not await create_folder_async(cip, paths, current_path): return False
 
     return True
 
@@ -134,8 +329,11 @@ def create_me_shortcut(cip: comms.Driver, paths: types.MEPaths, file: str, repla
 
 def delete_file(cip: comms.Driver, paths: types.MEPaths, file_path: str) -> bool:
     req_args = [paths.helper_file, HelperFunctions.DELETE_FILE, file_path]
+    cache = get_cache(cip)
+    if cache: cache.forget_file(file_path)
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != 0): raise Exception(f'Failed to delete file on terminal: {file_path}, response code: {resp_code}, response data: {resp_data}.')
+    if cache: cache.remove_file(file_path)
     return True
 
 def delete_file_list(cip: comms.Driver, paths: types.MEPaths) -> bool:
@@ -151,24 +349,69 @@ def delete_folder(cip: comms.Driver, paths: types.MEDevicePaths, folder_path: st
 '''
 
 def get_file_exists(cip: comms.Driver, paths: types.MEPaths, file_path: str) -> bool:
+    cache = get_cache(cip)
+    if cache and (cache.get_file_exists(file_path) is not None): return cache.get_file_exists(file_path)
     req_args = [paths.helper_file, HelperFunctions.GET_FILE_EXISTS, file_path]
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != 0): return False    
+    exists = bool(int(resp_data))
+    if cache: cache.set_file_exists(file_path, exists)
+    return exists
+
+async def get_file_exists_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths, file_path: str) -> bool:
+    req_args = [paths.helper_file, HelperFunctions.GET_FILE_EXISTS, file_path]
+    resp_code, resp_data = await run_function_async(cip, req_args)
+    if (resp_code != 0): return False
     return bool(int(resp_data))
 
+def get_files_exist(cip: comms.Driver, paths: types.MEPaths, file_paths: list[str], workers: int = None) -> dict[str, bool]:
+    cache = get_cache(cip)
+    files_exist = {file_path: cache.get_file_exists(file_path) for file_path in file_paths} if cache else {}
+    remaining = [file_path for file_path in dict.fromkeys(file_paths) if files_exist.get(file_path) is None]
+    req_args_list = [[paths.helper_file, HelperFunctions.GET_FILE_EXISTS, file_path] for file_path in remaining]
+    results = run_functions(cip, req_args_list, workers) if remaining else []
+    for (file_path, (resp_code, resp_data)) in zip(remaining, results):
+        files_exist[file_path] = (resp_code == 0) and bool(int(resp_data))
+        if cache and (resp_code == 0): cache.set_file_exists(file_path, files_exist[file_path])
+    return {file_path: files_exist[file_path] for file_path in file_paths}
+
 def get_file_size(cip: comms.Driver, paths: types.MEPaths, file_path: str) -> int:
+    cache = get_cache(cip)
+    if cache and (cache.get_file_size(file_path) is not None): return cache.get_file_size(file_path)
     if not(get_file_exists(cip, paths, file_path)): raise FileNotFoundError(f'File {file_path} does not exist on remote terminal.')
     req_args = [paths.helper_file, HelperFunctions.GET_FILE_SIZE, file_path]
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != 0): raise Exception(f'Failed to execute function: {req_args}, response code: {resp_code}, response data: {resp_data}.')
+    if cache: cache.set_file_size(file_path, int(resp_data))
     return int(resp_data)
 
 def get_folder_exists(cip: comms.Driver, paths: types.MEPaths, folder_path: str) -> bool:
+    cache = get_cache(cip)
+    if cache and (cache.get_folder_exists(folder_path) is not None): return cache.get_folder_exists(folder_path)
     req_args = [paths.helper_file, HelperFunctions.GET_FOLDER_EXISTS, folder_path]
     resp_code, resp_data = run_function(cip, req_args)
     if (resp_code != 0): return False    
+    exists = bool(int(resp_data))
+    if cache: cache.set_folder_exists(folder_path, exists)
+    return exists
+
+async def get_folder_exists_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths, folder_path: str) -> bool:
+    req_args = [paths.helper_file, HelperFunctions.GET_FOLDER_EXISTS, folder_path]
+    resp_code, resp_data = await run_function_async(cip, req_args)
+    if (resp_code != 0): return False
     return bool(int(resp_data))
 
+def get_folders_exist(cip: comms.Driver, paths: types.MEPaths, folder_paths: list[str], workers: int = None) -> dict[str, bool]:
+    cache = get_cache(cip)
+    folders_exist = {folder_path: cache.get_folder_exists(folder_path) for folder_path in folder_paths} if cache else {}
+    remaining = [folder_path for folder_path in dict.fromkeys(folder_paths) if folders_exist.get(folder_path) is None]
+    req_args_list = [[paths.helper_file, HelperFunctions.GET_FOLDER_EXISTS, folder_path] for folder_path in remaining]
+    results = run_functions(cip, req_args_list, workers) if remaining else []
+    for (folder_path, (resp_code, resp_data)) in zip(remaining, results):
+        folders_exist[folder_path] = (resp_code == 0) and bool(int(resp_data))
+        if cache and (resp_code == 0): cache.set_folder_exists(folder_path, folders_exist[folder_path])
+    return {folder_path: folders_exist[folder_path] for folder_path in folder_paths}
+
 def get_free_space(cip: comms.Driver, paths: types.MEPaths, folder_path: str) -> int:
     if not(get_folder_exists(cip, paths, folder_path)): raise FileNotFoundError(f'Folder {folder_path} does not exist on remote terminal.')
     req_args = [paths.helper_file, HelperFunctions.GET_FREE_SPACE, folder_path]
@@ -187,7 +430,16 @@ def get_version(cip: comms.Driver, paths: types.MEPaths, file_path: str) -> str:
     if (resp_code != 0): raise Exception(f'Failed to execute function: {req_args}, response code: {resp_code}, response data: {resp_data}.')
     return str(resp_data)
 
+async def get_version_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths, file_path: str) -> str:
+    if not(await get_file_exists_async(cip, paths, file_path)): raise FileNotFoundError(f'File {file_path} does not exist on remote terminal.')
+    req_args = [paths.helper_file, HelperFunctions.GET_VERSION, file_path]
+    resp_code, resp_data = await run_function_async(cip, req_args)
+    if (resp_code != 0): raise Exception(f'Failed to execute function: {req_args}, response code: {resp_code}, response data: {resp_data}.')
+    return str(resp_data)
+
 def reboot(cip: comms.Driver, paths: types.MEPaths):
+    cache = get_cache(cip)
+    if cache: cache.clear()
     req_args = [paths.helper_file, HelperFunctions.REBOOT,'']
     req_data = b''.join(arg.encode() + b'\x00' for arg in req_args)
     resp = messages.run_function(cip, req_data)
\ No newline at end of file
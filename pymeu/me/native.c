@@ -0,0 +1,80 @@
+/*
+ * Native page decoder for ME compressed streams.
+ *
+ * Mirrors _decompress_page_table in decompress.py.  See docs/me/compression.md
+ * for the page/chunk/token layout.  Anything malformed returns -1 so the caller
+ * can hand the page to the reference decoder and get identical results.
+ */
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#if defined(_WIN32)
+#define ME_EXPORT __declspec(dllexport)
+#else
+#define ME_EXPORT
+#endif
+
+#define CHUNK_CONTROL_SIZE_BYTES 2
+#define CHUNK_DATA_SIZE_TOKENS 16
+#define PAGE_CONTROL_SIZE_BYTES 4
+#define TOKEN_LITERAL_SIZE_BYTES 1
+#define TOKEN_POINTER_SIZE_BYTES 2
+
+static size_t bit_count(unsigned int value)
+{
+    size_t count = 0;
+    while (value) {
+        count += value & 1;
+        value >>= 1;
+    }
+    return count;
+}
+
+ME_EXPORT long long me_decompress_page(const uint8_t *input, size_t length, uint8_t *output, size_t output_size)
+{
+    size_t offset = PAGE_CONTROL_SIZE_BYTES;
+    size_t head = 0;
+
+    while (offset < length) {
+        /* At the start of each chunk is a pair of control bytes */
+        if ((offset + CHUNK_CONTROL_SIZE_BYTES) > length) return -1;
+        unsigned int control = input[offset] | (input[offset + 1] << 8);
+        offset += CHUNK_CONTROL_SIZE_BYTES;
+
+        size_t tokens = bit_count(control);
+        size_t chunk_end = offset + (tokens * TOKEN_POINTER_SIZE_BYTES) + ((CHUNK_DATA_SIZE_TOKENS - tokens) * TOKEN_LITERAL_SIZE_BYTES);
+        if (chunk_end > length) chunk_end = length;
+        if (offset >= chunk_end) return -1;
+
+        for (int index = 0; (index < CHUNK_DATA_SIZE_TOKENS) && (offset < chunk_end); index++) {
+            if (!((control >> index) & 1)) {
+                /* Literal token */
+                if (head >= output_size) return -1;
+                output[head++] = input[offset];
+                offset += TOKEN_LITERAL_SIZE_BYTES;
+                continue;
+            }
+
+            /* Pointer token */
+            if ((offset + TOKEN_POINTER_SIZE_BYTES) > chunk_end) return -1;
+            size_t token_length = (input[offset] & 0x0F) + 1;
+            size_t token_offset = ((size_t)(input[offset] & 0xF0) << 4) + input[offset + 1];
+            offset += TOKEN_POINTER_SIZE_BYTES;
+            if ((head == 0) || (token_offset > head)) return -1;
+            if ((head + token_length) > output_size) return -1;
+
+            if (token_offset == 0) {
+                /* Offset zero repeats the last byte */
+                memset(output + head, output[head - 1], token_length);
+            } else {
+                /* Forward copy so an overlapping source repeats the pattern */
+                const uint8_t *source = output + head - token_offset;
+                for (size_t i = 0; i < token_length; i++) output[head + i] = source[i];
+            }
+            head += token_length;
+        }
+    }
+
+    return (long long)head;
+}
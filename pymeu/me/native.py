@@ -0,0 +1,56 @@
+import ctypes
+import os
+import subprocess
+import sys
+
+NATIVE_SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'native.c')
+if sys.platform == 'win32':
+    NATIVE_LIBRARY_PATH = os.path.join(os.path.dirname(__file__), 'pymeu_native.dll')
+elif sys.platform == 'darwin':
+    NATIVE_LIBRARY_PATH = os.path.join(os.path.dirname(__file__), 'libpymeu_native.dylib')
+else:
+    NATIVE_LIBRARY_PATH = os.path.join(os.path.dirname(__file__), 'libpymeu_native.so')
+
+_library = None
+
+def build(compiler: str = None) -> str:
+    """
+    Compiles the bundled native decoder source into a shared library
+    next to this module, so it is picked up the next time pymeu is imported.
+
+    Args:
+        compiler (str): The compiler to use.  Defaults to the CC environment
+            variable, or cc (cl on Windows).
+
+    Returns:
+        Path to the shared library that was built.
+    """
+    if sys.platform == 'win32':
+        compiler = compiler or os.environ.get('CC', 'cl')
+        args = [compiler, '/O2', '/LD', NATIVE_SOURCE_PATH, f'/Fe{NATIVE_LIBRARY_PATH}']
+    else:
+        compiler = compiler or os.environ.get('CC', 'cc')
+        args = [compiler, '-O2', '-shared', '-fPIC', '-o', NATIVE_LIBRARY_PATH, NATIVE_SOURCE_PATH]
+    subprocess.run(args, check=True)
+    return NATIVE_LIBRARY_PATH
+
+def decompress_page(input: bytes, output: bytearray) -> int:
+    # Returns the number of bytes written to output, or -1 if the page is malformed.
+    output_buffer = (ctypes.c_char * len(output)).from_buffer(output)
+    return _library.me_decompress_page(input, len(input), output_buffer, len(output))
+
+def is_available() -> bool:
+    return _library is not None
+
+def load() -> bool:
+    global _library
+    if _library is not None: return True
+    if not os.path.exists(NATIVE_LIBRARY_PATH): return False
+    try:
+        library = ctypes.CDLL(NATIVE_LIBRARY_PATH)
+        library.me_decompress_page.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_void_p, ctypes.c_size_t]
+        library.me_decompress_page.restype = ctypes.c_longlong
+    except (OSError, AttributeError):
+        return False
+    _library = library
+    return True
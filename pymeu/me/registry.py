@@ -1,8 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from enum import StrEnum
+import itertools
 
+from .. import aiocomms
 from .. import comms
 from . import messages
 
+# Most sessions get_values opens to the terminal at once by default, including the one
+# passed in.  Additional sessions are opt-in, since each is another connection to the
+# terminal.  Read when get_values is called, so it can be changed at runtime.
+REGISTRY_WORKERS = 1
+
 # Known registry keys on the terminal that should be whitelisted for read access through RemoteHelper.
 class RegKeys(StrEnum):
     CIP_VERSION_MAJOR = 'HKEY_LOCAL_MACHINE\SOFTWARE\Rockwell Software\RSLinxNG\CIP Identity\MajorRevision'                 # ex: 11
@@ -45,9 +53,18 @@ def get_value(cip: comms.Driver, key: str) -> str:
         Only a certain subset of registry keys are whitelisted for access
         by this method.  They are documented in the RegKeys enum.
     '''
-    req_data = b''.join(arg.encode() + b'\x00' for arg in key)
+    resp = messages.read_registry(cip, _pack_value_request(key))
+    return _unpack_value_response(resp, key)
+
+async def get_value_async(cip: aiocomms.AsyncDriver, key: str) -> str:
+    # Same as get_value, for an AsyncDriver
+    resp = await messages.read_registry(cip, _pack_value_request(key))
+    return _unpack_value_response(resp, key)
+
+def _pack_value_request(key: str) -> bytes:
+    return b''.join(arg.encode() + b'\x00' for arg in key)
 
-    resp = messages.read_registry(cip, req_data)
+def _unpack_value_response(resp, key: str) -> str:
     if not resp: raise Exception(f'Failed to read registry key: {key}')
     resp_code = int.from_bytes(resp.value[:4], byteorder='little', signed=False)
     if (resp_code != 0): raise Exception(f'Failed to read registry key: {key}, response code: {resp_code}.')
@@ -56,6 +73,39 @@ def get_value(cip: comms.Driver, key: str) -> str:
     resp_value = str(resp.value[8:].decode('utf-8').strip('\x00'))
     return resp_value
 
+def get_values(cip: comms.Driver, keys: list[str], workers: int = None) -> dict[str, str]:
+    # Reads several registry keys, with the requests spread over up to workers
+    # sessions to the terminal so they overlap rather than going one after another.
+    # The drivers are synchronous, so each additional session is a clone of cip
+    # opened (in parallel) for the duration of the call.
+    keys = list(keys)
+    if workers is None: workers = REGISTRY_WORKERS
+    workers = max(1, min(workers, len(keys)))
+    if workers == 1: return {key: get_value(cip, [key]) for key in keys}
+
+    groups = [keys[i::workers] for i in range(workers)]
+    def read_group(index: int) -> list[tuple[str, str]]:
+        if index == 0:
+            session = cip
+        else:
+            try:
+                session = cip.clone()
+            except Exception:
+                # The terminal (or a gateway) may refuse another session,
+                # so this group is read on cip once the others are done.
+                return None
+        try:
+            return [(key, get_value(session, [key])) for key in groups[index]]
+        finally:
+            if session is not cip: session.__exit__(None, None, None)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read_group, range(workers)))
+    for (index, result) in enumerate(results):
+        if result is None: results[index] = [(key, get_value(cip, [key])) for key in groups[index]]
+    values = dict(itertools.chain.from_iterable(results))
+    return {key: values[key] for key in keys}
+
 def get_me_version(cip: comms.Driver) -> str:
     return get_value(cip, [RegKeys.ME_VERSION])
 
@@ -69,7 +119,10 @@ def get_product_type(cip: comms.Driver) -> int:
     return int(get_value(cip, [RegKeys.CIP_PRODUCT_TYPE]))
 
 def get_serial_number(cip: comms.Driver) -> str:
-    serial_number = get_value(cip, [RegKeys.CIP_SERIAL_NUMBER])
+    return format_serial_number(get_value(cip, [RegKeys.CIP_SERIAL_NUMBER]))
+
+def format_serial_number(serial_number: str) -> str:
+    # Stored in decimal, displayed the same as the CIP identity serial number
     serial_number_str = f'{int(serial_number):08x}'
     return serial_number_str
 
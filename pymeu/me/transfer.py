@@ -1,18 +1,42 @@
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from enum import IntEnum
+import hashlib
+import itertools
+import json
 import os
+import queue
 import struct
+import threading
 from typing import Optional
 from warnings import warn
 
+from .. import aiocomms
 from .. import comms
 from . import messages
 from . import helper
+from . import registry
 from . import types
 from . import util
 
 END_OF_FILE = b'\x00\x00\x00\x00\x02\x00\xff\xff'
 
+# Folders with at least this many files to check are listed once by get_files_exist
+# instead of checking each file on its own
+FILE_LIST_MIN_FILES = 4
+
+# Most transfer instances open at once by download_many
+DOWNLOAD_WORKERS = 4
+
+# *.MER files end with the CRC32 of the rest of the file, which is_same_file relies on
+MER_CHECKSUM_SIZE_BYTES = 4
+
+# Upper limit when probing for the largest chunk size, in line with
+# the largest connection size supported by a large forward open.
+PROBE_CHUNK_SIZE_MAX = 3990
+
 # Known values associated with some file services, with unclear purpose or meaning.
 # Further investigation needed.
 GET_UNK1_VALUES = {
@@ -26,6 +50,14 @@ GET_UNK3_VALUES = {
     b'\x64\x00'
 }
 
+# Attributes read by _is_ready, with the known values and name used in warnings
+READY_CHECKS = [
+    (b'\x30\x01', GET_UNK1_VALUES, 'UNK1'),
+    (b'\x30\x08', GET_UNK2_VALUES, 'UNK2'),
+    (b'\x30\x09', GET_UNK3_VALUES, 'UNK3')
+]
+SET_READY_DATA = b'\x30\x01\xff\xff'
+
 class TransferType(IntEnum):
     DOWNLOAD = int.from_bytes(b'\x01', byteorder='big')
     UPLOAD = int.from_bytes(b'\x00', byteorder='big')
@@ -61,11 +93,16 @@ def _create_download(
         | Bytes 4->5    | Transfer instance (use this instance for download)  |
         | Bytes 6->7    | Chunk size in bytes                                 |
     '''
+    req_data = _pack_create_download(cip, file_path_terminal, file_size, overwrite)
+    resp = messages.create_transfer(cip, req_data)
+    return _unpack_create_download(cip, resp, file_path_terminal)
+
+def _pack_create_download(cip: comms.Driver, file_path_terminal: str, file_size: int, overwrite: bool) -> bytes:
     req_header = struct.pack('<BBHI', TransferType.DOWNLOAD, int(overwrite), cip.me_chunk_size, file_size)
     req_args = [file_path_terminal]
-    req_data = req_header + b''.join(arg.encode() + b'\x00' for arg in req_args)
+    return req_header + b''.join(arg.encode() + b'\x00' for arg in req_args)
 
-    resp = messages.create_transfer(cip, req_data)
+def _unpack_create_download(cip: comms.Driver, resp, file_path_terminal: str) -> int:
     resp_exception_text = f'Failed to create transfer instance for download of {file_path_terminal}.'
     if not resp: raise Exception(f'{resp_exception_text}.  No message response.')
  
@@ -104,11 +141,16 @@ def _create_upload(
         | Bytes 6->7    | Chunk size in bytes                                 |
         | Bytes 8->11   | File size in bytes                                  |
     '''
+    req_data = _pack_create_upload(cip, file_path_terminal)
+    resp = messages.create_transfer(cip, req_data)
+    return _unpack_create_upload(cip, resp, file_path_terminal)
+
+def _pack_create_upload(cip: comms.Driver, file_path_terminal: str) -> bytes:
     req_header = struct.pack('<BBH', TransferType.UPLOAD, 0x00, cip.me_chunk_size)
     req_args = [f'{file_path_terminal}']
-    req_data = req_header + b''.join(arg.encode() + b'\x00' for arg in req_args)
+    return req_header + b''.join(arg.encode() + b'\x00' for arg in req_args)
 
-    resp = messages.create_transfer(cip, req_data)
+def _unpack_create_upload(cip: comms.Driver, resp, file_path_terminal: str) -> tuple[int, int]:
     resp_exception_text = f'Failed to create transfer instance for upload of {file_path_terminal}.'
     if not resp: raise Exception(f'{resp_exception_text}.  No message response.')
 
@@ -121,12 +163,121 @@ def _create_upload(
 def _delete(cip: comms.Driver, instance: int):
     return messages.delete_transfer(cip, instance)
 
+def _write_chunk(cip: comms.Driver, instance: int, req_chunk_number: int, req_chunk: bytearray):
+    req_header = struct.pack('<IH', req_chunk_number, len(req_chunk))
+    req_data = req_header + req_chunk
+    # Returns a coroutine for an AsyncDriver
+    return messages.write_file_chunk(cip, instance, req_data)
+
+def _check_write_chunk(resp, req_chunk_number: int):
+    if not resp: raise Exception(f'Failed to write chunk {req_chunk_number} to terminal.')
+    req_next_chunk_number = req_chunk_number + 1
+    resp_unk1, resp_chunk_number, resp_next_chunk_number = struct.unpack('<III', resp.value)
+    if (resp_unk1 != 0 ): raise Exception(f'Response unknown bytes: {resp_unk1}, expected: 0.')
+    if (resp_chunk_number != req_chunk_number ): raise Exception(f'Response chunk number: {resp_chunk_number}, expected: {req_chunk_number}.')
+    if (resp_next_chunk_number != req_next_chunk_number): raise Exception(f'Response next chunk number: {resp_next_chunk_number}, expected: {req_next_chunk_number}.')
+
+def _open_connected(cip: comms.Driver, device: types.MEDeviceInfo):
+    if cip.open_connected():
+        device.log.append(f'Using connected messaging with connection size {cip.connected_size} bytes.')
+    else:
+        device.log.append(f'Connected messaging not available, using unconnected messaging.')
+
+def _open_sessions(cip: comms.Driver, count: int) -> queue.Queue:
+    # Pool of sessions to the same terminal, one per request in flight.
+    # The first is always the session the transfer instance was created on.
+    # If it is connected, the others are too so they can carry the same chunk size.
+    sessions = queue.Queue()
+    sessions.put(cip)
+    for _ in range(count - 1):
+        session = cip.clone()
+        if cip.connected_size and not session.open_connected(cip.connected_size):
+            session.__exit__(None, None, None)
+            _close_sessions(cip, sessions)
+            raise Exception('Failed to open connected messaging for additional session.')
+        sessions.put(session)
+    return sessions
+
+def _close_sessions(cip: comms.Driver, sessions: queue.Queue):
+    while not sessions.empty():
+        session = sessions.get()
+        if session is not cip: session.__exit__(None, None, None)
+
+def _send_on_session(sessions: queue.Queue, function: Callable, *args):
+    session = sessions.get()
+    try:
+        return function(session, *args)
+    finally:
+        sessions.put(session)
+
+def _write_download_windowed(
+    cip: comms.Driver, 
+    file_data: bytearray, 
+    instance: int, 
+    window: int,
+    progress_desc: str = None, 
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    start_chunk_number: int = 1,
+    on_chunk: Optional[Callable[[int], None]] = None
+) -> bool:
+    # Keeps up to window chunks in flight, each on its own session, and checks
+    # the responses in chunk order.  Any chunk whose response is missing or
+    # doesn't echo the expected chunk numbers (i.e. it arrived ahead of the
+    # previous chunk) is sent again once all chunks before it are written,
+    # and that retransmission is checked the same as the stop-and-wait mode.
+    chunk_size = cip.me_chunk_size
+    total_bytes = len(file_data)
+    chunks = iter(enumerate(range((start_chunk_number - 1) * chunk_size, total_bytes, chunk_size), start=start_chunk_number))
+
+    def write_chunk(session: comms.Driver, req_chunk_number: int, req_chunk: bytearray):
+        try:
+            resp = _write_chunk(session, instance, req_chunk_number, req_chunk)
+            _check_write_chunk(resp, req_chunk_number)
+            return True
+        except Exception as e:
+            return False
+
+    sessions = _open_sessions(cip, window)
+    try:
+        with ThreadPoolExecutor(max_workers=window) as pool:
+            in_flight = deque()
+            def submit_next():
+                item = next(chunks, None)
+                if item is None: return
+                (req_chunk_number, req_offset) = item
+                req_chunk = file_data[req_offset:req_offset + chunk_size]
+                future = pool.submit(_send_on_session, sessions, write_chunk, req_chunk_number, req_chunk)
+                in_flight.append((req_chunk_number, req_chunk, req_offset, future))
+
+            for _ in range(window): submit_next()
+            while in_flight:
+                (req_chunk_number, req_chunk, req_offset, future) = in_flight.popleft()
+                if not future.result():
+                    resp = _send_on_session(sessions, _write_chunk, instance, req_chunk_number, req_chunk)
+                    _check_write_chunk(resp, req_chunk_number)
+                if on_chunk: on_chunk(req_chunk_number)
+
+                # Update progress callback
+                current_bytes = req_offset + len(req_chunk)
+                if progress: progress(f'Download {progress_desc}','bytes', total_bytes, current_bytes)
+                submit_next()
+    finally:
+        _close_sessions(cip, sessions)
+
+    # Close out file
+    req_data = END_OF_FILE
+    resp = messages.write_file_chunk(cip, instance, req_data)
+    return True
+
 def _write_download(
     cip: comms.Driver, 
     file_data: bytearray, 
     instance: int, 
     progress_desc: str = None, 
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    start_chunk_number: int = 1,
+    on_chunk: Optional[Callable[[int], None]] = None
 ) -> bool:
     """
     Downloads a file from the local device to the remote terminal.
@@ -151,25 +302,37 @@ def _write_download(
         | Bytes 0->3    | Unknown purpose                                     |
         | Bytes 4->7    | Chunk number echo                                   |
         | Bytes 8->11   | Next chunk number expected                          |
+
+    If window is more than 1, up to that many chunks are kept in flight at
+    once over additional sessions to the terminal (see _write_download_windowed).
+
+    Chunks before start_chunk_number are assumed to be written already (resuming
+    a transfer instance), and on_chunk is called with each acknowledged chunk number.
     """
-    req_chunk_number = 1
-    req_offset = 0
+    if window > 1:
+        return _write_download_windowed(
+            cip=cip,
+            file_data=file_data,
+            instance=instance,
+            window=window,
+            progress_desc=progress_desc,
+            progress=progress,
+            start_chunk_number=start_chunk_number,
+            on_chunk=on_chunk
+        )
+
+    req_chunk_number = start_chunk_number
+    req_offset = (start_chunk_number - 1) * cip.me_chunk_size
     total_bytes = len(file_data)
     while req_offset < total_bytes:
         req_chunk = file_data[req_offset:req_offset + cip.me_chunk_size]
-        req_header = struct.pack('<IH', req_chunk_number, len(req_chunk))
-        req_next_chunk_number = req_chunk_number + 1
-        req_data = req_header + req_chunk
 
         # End of file
         if not req_chunk: break
 
-        resp = messages.write_file_chunk(cip, instance, req_data)
-        if not resp: raise Exception(f'Failed to write chunk {req_chunk_number} to terminal.')
-        resp_unk1, resp_chunk_number, resp_next_chunk_number = struct.unpack('<III', resp.value)
-        if (resp_unk1 != 0 ): raise Exception(f'Response unknown bytes: {resp_unk1}, expected: 0.')
-        if (resp_chunk_number != req_chunk_number ): raise Exception(f'Response chunk number: {resp_chunk_number}, expected: {req_chunk_number}.')
-        if (resp_next_chunk_number != req_next_chunk_number): raise Exception(f'Response next chunk number: {resp_next_chunk_number}, expected: {req_next_chunk_number}.')
+        resp = _write_chunk(cip, instance, req_chunk_number, req_chunk)
+        _check_write_chunk(resp, req_chunk_number)
+        if on_chunk: on_chunk(req_chunk_number)
 
         # Update progress callback
         current_bytes = req_offset + len(req_chunk)
@@ -184,12 +347,93 @@ def _write_download(
     resp = messages.write_file_chunk(cip, instance, req_data)
     return True
 
-def _read_upload(
+def _read_chunk(cip: comms.Driver, instance: int, req_chunk_number: int) -> tuple[int, int, bytes]:
+    req_data = struct.pack('<I', req_chunk_number)
+    resp = messages.read_file_chunk(cip, instance, req_data)
+    return _unpack_read_chunk(resp, req_chunk_number)
+
+def _unpack_read_chunk(resp, req_chunk_number: int) -> tuple[int, int, bytes]:
+    if not resp: raise Exception(f'Failed to read chunk {req_chunk_number} to terminal.')
+    resp_unk1 = int.from_bytes(resp.value[:4], byteorder='little', signed=False)
+    resp_chunk_number = int.from_bytes(resp.value[4:8], byteorder='little', signed=False)
+    resp_chunk_size = int.from_bytes(resp.value[8:9], byteorder='little', signed=False)
+    resp_data = bytes(resp.value[10:])
+
+    if (resp_unk1 != 0 ): raise Exception(f'Response unknown bytes: {resp_unk1}, expected: 0.')
+    if (resp_chunk_number != req_chunk_number) and (resp_chunk_number != 0): raise Exception(f'Response chunk number: {resp_chunk_number}. expected: {req_chunk_number}.')
+    return (resp_chunk_number, resp_chunk_size, resp_data)
+
+def _is_end_of_file(resp_chunk_number: int, resp_chunk_size: int, resp_data: bytes) -> bool:
+    return (resp_chunk_number == 0) and (resp_chunk_size == 2) and (resp_data == b'\xff\xff')
+
+def _read_upload_windowed(
     cip: comms.Driver, 
     file_size: int, 
     instance: int, 
+    window: int,
     progress_desc: str = None,
     progress: Optional[Callable[[str, str, int, int], None]] = None
+) -> bytearray:
+    # Keeps up to window chunk reads in flight, each on its own session, and
+    # copies each chunk into place by chunk number in a buffer preallocated
+    # from the file size.  Responses are handled in chunk order; a chunk that
+    # failed is read again before moving on.  No further chunks are requested
+    # once the end-of-file response is seen.
+    chunk_size = cip.me_chunk_size
+    chunk_numbers = itertools.count(start=1)
+    resp_binary = bytearray(file_size)
+    resp_end = 0
+    end_of_file = False
+
+    def read_chunk(session: comms.Driver, req_chunk_number: int):
+        try:
+            return _read_chunk(session, instance, req_chunk_number)
+        except Exception as e:
+            return None
+
+    sessions = _open_sessions(cip, window)
+    try:
+        with ThreadPoolExecutor(max_workers=window) as pool:
+            in_flight = deque()
+            def submit_next():
+                req_chunk_number = next(chunk_numbers)
+                in_flight.append((req_chunk_number, pool.submit(_send_on_session, sessions, read_chunk, req_chunk_number)))
+
+            for _ in range(window): submit_next()
+            while in_flight:
+                (req_chunk_number, future) = in_flight.popleft()
+                result = future.result()
+
+                # Anything requested past the end of file is discarded
+                if end_of_file: continue
+                if result is None: result = _send_on_session(sessions, _read_chunk, instance, req_chunk_number)
+                if _is_end_of_file(*result):
+                    end_of_file = True
+                    continue
+
+                # Copy into place, growing the buffer if the file is larger than reported
+                (_, _, resp_data) = result
+                offset = (req_chunk_number - 1) * chunk_size
+                if (offset + len(resp_data)) > len(resp_binary): resp_binary.extend(bytes(offset + len(resp_data) - len(resp_binary)))
+                resp_binary[offset:offset + len(resp_data)] = resp_data
+                resp_end = offset + len(resp_data)
+
+                # Update progress callback
+                if progress: progress(f'Upload {progress_desc}','bytes', file_size, resp_end)
+                submit_next()
+    finally:
+        _close_sessions(cip, sessions)
+
+    del resp_binary[resp_end:]
+    return resp_binary
+
+def _read_upload(
+    cip: comms.Driver, 
+    file_size: int, 
+    instance: int, 
+    progress_desc: str = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1
 ) -> bytearray:
     """
     Uploads a file from the remote terminal to the local device.
@@ -213,24 +457,27 @@ def _read_upload(
         | Bytes 4->7    | Chunk number echo                                   |
         | Bytes 8->9    | Chunk size in bytes                                 |
         | Bytes 10->N   | Chunk data                                          |
+
+    If window is more than 1, up to that many chunks are read ahead at once
+    over additional sessions to the terminal (see _read_upload_windowed).
     """
+    if window > 1:
+        return _read_upload_windowed(
+            cip=cip,
+            file_size=file_size,
+            instance=instance,
+            window=window,
+            progress_desc=progress_desc,
+            progress=progress
+        )
+
     req_chunk_number = 1
     resp_binary = bytearray()
     while True:
-        req_data = struct.pack('<I', req_chunk_number)
-
-        resp = messages.read_file_chunk(cip, instance, req_data)
-        if not resp: raise Exception(f'Failed to read chunk {req_chunk_number} to terminal.')
-        resp_unk1 = int.from_bytes(resp.value[:4], byteorder='little', signed=False)
-        resp_chunk_number = int.from_bytes(resp.value[4:8], byteorder='little', signed=False)
-        resp_chunk_size = int.from_bytes(resp.value[8:9], byteorder='little', signed=False)
-        resp_data = bytes(resp.value[10:])
-
-        if (resp_unk1 != 0 ): raise Exception(f'Response unknown bytes: {resp_unk1}, expected: 0.')
-        if (resp_chunk_number != req_chunk_number) and (resp_chunk_number != 0): raise Exception(f'Response chunk number: {resp_chunk_number}. expected: {req_chunk_number}.')
+        (resp_chunk_number, resp_chunk_size, resp_data) = _read_chunk(cip, instance, req_chunk_number)
 
         # End of file
-        if (resp_chunk_number == 0) and (resp_chunk_size == 2) and (resp_data == b'\xff\xff'):
+        if _is_end_of_file(resp_chunk_number, resp_chunk_size, resp_data):
             #print('End of file')
             break
 
@@ -245,47 +492,173 @@ def _read_upload(
 
     return resp_binary
 
+def _is_chunk_size_accepted(cip: comms.Driver, file_path_terminal: str, chunk_size: int) -> bool:
+    # Reads the first chunk of a file on the terminal with the given chunk size.
+    # Upload is used since it leaves nothing behind on the terminal.
+    cip.me_chunk_size = chunk_size
+    instance = None
+    try:
+        instance, file_size = _create_upload(cip=cip, file_path_terminal=file_path_terminal)
+        (resp_chunk_number, resp_chunk_size, resp_data) = _read_chunk(cip, instance, 1)
+        return (resp_chunk_number == 1) and (len(resp_data) == chunk_size)
+    except Exception as e:
+        return False
+    finally:
+        cip.me_chunk_size = None
+        if instance is not None:
+            try:
+                _delete(cip=cip, instance=instance)
+            except Exception as e:
+                # Don't let cleanup replace the probe result
+                pass
+
+def probe_chunk_size(
+    cip: comms.Driver,
+    device: types.MEDeviceInfo,
+    file_path_terminal: str = None,
+    max_chunk_size: int = PROBE_CHUNK_SIZE_MAX,
+    force: bool = False
+) -> int:
+    """
+    Finds the largest chunk size the terminal accepts over this path and driver,
+    and keeps it (per comms path and driver) so that later transfers on any
+    session to the same path use it.
+
+    The default chunk size from comms.get_me_chunk_size is assumed to work.
+    Larger sizes are tried with a binary search, each by reading the first chunk
+    of file_path_terminal (the RemoteHelper file if not specified) and checking
+    a full chunk came back, so the result can't be larger than that file.
+    """
+    key = (cip._original_path, cip._driver)
+    if not force and (key in comms.ME_CHUNK_SIZES): return comms.ME_CHUNK_SIZES[key]
+    if file_path_terminal is None: file_path_terminal = device.me_paths.helper_file
+
+    low = comms.get_me_chunk_size(cip._original_path)
+    high = max_chunk_size
+    while low < high:
+        candidate = (low + high + 1) // 2
+        if _is_chunk_size_accepted(cip, file_path_terminal, candidate):
+            low = candidate
+        else:
+            high = candidate - 1
+
+    comms.set_me_chunk_size(cip._original_path, cip._driver, low)
+    device.log.append(f'Using chunk size of {low} bytes.')
+    return low
+
 def _is_ready(cip: comms.Driver) -> bool:
     # I don't know what any of these three attributes are for yet.
     # It may be checking that the file exchange is available.
-    resp = messages.read_file_ready(cip, b'\x30\x01')
-    if not resp: return False
-    if resp.value not in GET_UNK1_VALUES:
-        warn(f'Invalid UNK1 value.  Please file a bug report with all available information.')
-        return False
+    for (req_data, known_values, name) in READY_CHECKS:
+        resp = messages.read_file_ready(cip, req_data)
+        if not _check_ready(resp, known_values, name): return False
 
-    resp = messages.read_file_ready(cip, b'\x30\x08')
-    if not resp: return False
-    if resp.value not in GET_UNK2_VALUES:
-        warn(f'Invalid UNK2 value.  Please file a bug report with all available information.')
-        return False
+    return True
 
-    resp = messages.read_file_ready(cip, b'\x30\x09')
+def _check_ready(resp, known_values: set, name: str) -> bool:
     if not resp: return False
-    if resp.value not in GET_UNK3_VALUES:
-        warn(f'Invalid UNK3 value.  Please file a bug report with all available information.')
+    if resp.value not in known_values:
+        warn(f'Invalid {name} value.  Please file a bug report with all available information.')
         return False
-
     return True
 
 def _set_ready(cip: comms.Driver) -> bool:
     # I don't know what setting this attribute does yet.
     # It may be marking the file exchange as in use.
     #
-    resp = messages.write_file_ready(cip, b'\x30\x01\xff\xff')
+    resp = messages.write_file_ready(cip, SET_READY_DATA)
     if not resp: return False
 
     return True
 
+def _new_checkpoint(cip: comms.Driver, file_data: bytearray, file_path_terminal: str) -> types.MEDownloadCheckpoint:
+    return types.MEDownloadCheckpoint(
+        comms_path=cip._original_path,
+        file_path_terminal=file_path_terminal,
+        file_hash=hashlib.sha256(file_data).hexdigest(),
+        file_size=len(file_data),
+        chunk_size=cip.me_chunk_size
+    )
+
+def _load_checkpoint(checkpoint_path: str) -> Optional[types.MEDownloadCheckpoint]:
+    try:
+        with open(checkpoint_path, 'r') as f:
+            return types.MEDownloadCheckpoint(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (TypeError, ValueError):
+        # Treat anything unreadable as no checkpoint, it will be replaced
+        return None
+
+def _save_checkpoint(checkpoint_path: str, checkpoint: types.MEDownloadCheckpoint):
+    # Written to a temporary file first so a crash never leaves a partial checkpoint
+    temp_path = f'{checkpoint_path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(asdict(checkpoint), f)
+    os.replace(temp_path, checkpoint_path)
+
+def _remove_checkpoint(checkpoint_path: str):
+    try:
+        os.remove(checkpoint_path)
+    except FileNotFoundError:
+        pass
+
+def _is_same_download(saved: types.MEDownloadCheckpoint, checkpoint: types.MEDownloadCheckpoint) -> bool:
+    return (
+        (saved.comms_path == checkpoint.comms_path) and
+        (saved.file_path_terminal == checkpoint.file_path_terminal) and
+        (saved.file_hash == checkpoint.file_hash) and
+        (saved.file_size == checkpoint.file_size) and
+        (saved.chunk_size == checkpoint.chunk_size)
+    )
+
+def _resume_download(cip: comms.Driver, checkpoint: types.MEDownloadCheckpoint, file_data: bytearray) -> bool:
+    # Sends the chunk after the last acknowledged one on the saved transfer instance.
+    # False if the terminal doesn't accept it (i.e. it rebooted since and the instance is gone).
+    req_chunk_number = checkpoint.chunk_number + 1
+    req_offset = checkpoint.chunk_number * checkpoint.chunk_size
+    if req_offset >= len(file_data): return True
+    try:
+        resp = _write_chunk(cip, checkpoint.instance, req_chunk_number, file_data[req_offset:req_offset + checkpoint.chunk_size])
+        _check_write_chunk(resp, req_chunk_number)
+    except Exception as e:
+        return False
+    checkpoint.chunk_number = req_chunk_number
+    return True
+
+def discard_checkpoint(cip: comms.Driver, device: types.MEDeviceInfo, checkpoint_path: str) -> bool:
+    # Deletes the transfer instance a failed download left open for resuming (which also
+    # frees the terminal for other transfers) and removes the checkpoint.  False if there
+    # was no checkpoint.  The checkpoint must be for the terminal at cip's comms path.
+    saved = _load_checkpoint(checkpoint_path)
+    if saved is None:
+        _remove_checkpoint(checkpoint_path)
+        return False
+    if saved.comms_path != cip._original_path: raise ValueError(f'Checkpoint {checkpoint_path} is for {saved.comms_path}, not {cip._original_path}.')
+
+    if saved.instance is not None:
+        # Already gone if the terminal rebooted since
+        resp = _delete(cip=cip, instance=saved.instance)
+        if resp: device.log.append(f'Deleted transfer instance {saved.instance} from checkpoint {checkpoint_path}.')
+    _remove_checkpoint(checkpoint_path)
+    return True
+
 def download(
     cip: comms.Driver, 
     device: types.MEDeviceInfo, 
     file_data: bytearray, 
     file_path_terminal: str, 
     overwrite: bool = False,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False,
+    checkpoint_path: str = None
 ) -> bool:
+    # With checkpoint_path, each acknowledged chunk is recorded there and the transfer
+    # instance is left open on failure, so the next call with the same file and
+    # checkpoint_path continues from the next chunk instead of starting over.
     instance = None
+    checkpoint = None
     try:
         dirname, basename = util.split_file_path(file_path_terminal)
         try:
@@ -295,56 +668,310 @@ def download(
         except Exception as e:
             print(e)
 
-        file_exists = helper.get_file_exists(cip, device.me_paths, file_path_terminal)
-        if (overwrite and not file_exists): overwrite = False
-        if (file_exists and not overwrite): raise FileExistsError(f'File {file_path_terminal} exists on terminal already and overwrite was not specified.')
+        # Opened first since it can change the chunk size
+        if connected: _open_connected(cip, device)
 
-        if not(_is_ready(cip)): raise Exception('Terminal not ready for file transfer lock.')
-        instance = _create_download(
-            cip=cip,
-            file_path_terminal=file_path_terminal,
-            file_size=len(file_data),
-            overwrite=overwrite
-        )
+        start_chunk_number = 1
+        if checkpoint_path:
+            checkpoint = _new_checkpoint(cip, file_data, file_path_terminal)
+            saved = _load_checkpoint(checkpoint_path)
+            if saved and (saved.instance is not None) and (saved.comms_path != checkpoint.comms_path):
+                # Its transfer instance can only be deleted over that path, so it isn't replaced
+                raise Exception(f'Checkpoint {checkpoint_path} has transfer instance {saved.instance} open on {saved.comms_path}.  Discard it with discard_checkpoint for that path first.')
+            if saved and (saved.instance is not None):
+                if _is_same_download(saved, checkpoint) and _resume_download(cip, saved, file_data):
+                    checkpoint = saved
+                    instance = saved.instance
+                    start_chunk_number = saved.chunk_number + 1
+                    device.log.append(f'Resuming download of {file_path_terminal} at chunk {start_chunk_number} using transfer instance {instance}.')
+                else:
+                    # Different file, or the transfer instance is gone, start over
+                    _delete(cip=cip, instance=saved.instance)
+                    device.log.append(f'Discarded checkpoint for transfer instance {saved.instance}.')
+
+                    # Any partial file left behind was created by the earlier attempt
+                    if saved.created_file and (saved.file_path_terminal == file_path_terminal): overwrite = True
+
+        if instance is None:
+            file_exists = helper.get_file_exists(cip, device.me_paths, file_path_terminal)
+            if (overwrite and not file_exists): overwrite = False
+            if (file_exists and not overwrite): raise FileExistsError(f'File {file_path_terminal} exists on terminal already and overwrite was not specified.')
+
+            if not(_is_ready(cip)): raise Exception('Terminal not ready for file transfer lock.')
+            instance = _create_download(
+                cip=cip,
+                file_path_terminal=file_path_terminal,
+                file_size=len(file_data),
+                overwrite=overwrite
+            )
+
+            if not(_set_ready(cip)): raise Exception('Terminal refused file transfer lock.')
+            if checkpoint:
+                checkpoint.instance = instance
+                checkpoint.created_file = not file_exists
+                _save_checkpoint(checkpoint_path, checkpoint)
+
+        def save_chunk(chunk_number: int):
+            checkpoint.chunk_number = chunk_number
+            _save_checkpoint(checkpoint_path, checkpoint)
 
-        if not(_set_ready(cip)): raise Exception('Terminal refused file transfer lock.')
         _write_download(
             cip=cip,
             file_data=file_data,
             instance=instance,
             progress_desc=file_path_terminal,
-            progress=progress
+            progress=progress,
+            window=window,
+            start_chunk_number=start_chunk_number,
+            on_chunk=save_chunk if checkpoint else None
         )
+        if start_chunk_number > 1:
+            # Check the chunks from the earlier attempt made it into the file.
+            # Asked of the terminal, any cached size is from before this download.
+            cache = helper.get_cache(cip)
+            if cache: cache.forget_file(file_path_terminal)
+            file_size = helper.get_file_size(cip, device.me_paths, file_path_terminal)
+            if file_size != len(file_data): raise Exception(f'Resumed file size: {file_size}, expected: {len(file_data)}.')
         device.log.append(f'Downloaded {file_path_terminal} using transfer instance {instance}.')
+        cache = helper.get_cache(cip)
+        if cache: cache.add_file(file_path_terminal, len(file_data))
 
         _delete(
             cip=cip,
             instance=instance
         )
+        if checkpoint: _remove_checkpoint(checkpoint_path)
     except Exception as e:
-        if instance is not None: _delete(cip=cip, instance=instance)
+        cache = helper.get_cache(cip)
+        if cache: cache.forget_file(file_path_terminal)
+        # Left open for the next attempt if it was saved to the checkpoint
+        if (instance is not None) and not(checkpoint and (checkpoint.instance == instance)): _delete(cip=cip, instance=instance)
         raise Exception(f'Download {file_path_terminal} failed: {str(e)}')
+    finally:
+        if connected: cip.close_connected()
 
     return True
 
+def download_many(
+    cip: comms.Driver,
+    device: types.MEDeviceInfo,
+    files: dict[str, bytearray],
+    overwrite: bool = False,
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    workers: int = DOWNLOAD_WORKERS
+) -> bool:
+    # Downloads several files ({terminal path: data}) with up to workers transfer instances
+    # open at once, each on its own session.  The folders are created and the files checked
+    # for all of them up front, instead of once per file as in download.
+    #
+    # If the terminal refuses a transfer instance while others are open, workers is lowered
+    # to the number open and the file waits for one to finish, so it settles at what the
+    # terminal accepts.  Progress is reported for all files together.  If any file fails,
+    # the rest are stopped, their transfer instances deleted and the first failure raised.
+    if not files: return True
+    file_paths = list(files)
+    try:
+        # Attempt to ensure the directories exist
+        helper.create_all_folders(cip, device.me_paths, [util.split_file_path(file_path)[0] for file_path in file_paths])
+    except Exception as e:
+        print(e)
+
+    files_exist = get_files_exist(cip, device, file_paths)
+    for file_path in file_paths:
+        if (files_exist[file_path] and not overwrite): raise FileExistsError(f'File {file_path} exists on terminal already and overwrite was not specified.')
+
+    workers = max(1, min(workers, len(file_paths)))
+    # condition guards the counters only.  create_lock serializes the ready checks and
+    # transfer instance creation (terminal round trips), so neither closing an instance
+    # nor reporting progress waits on them.
+    condition = threading.Condition()
+    create_lock = threading.Lock()
+    progress_lock = threading.Lock()
+    opened = [0]
+    limit = [workers]
+    errors = []
+    total_bytes = sum(len(file_data) for file_data in files.values())
+    current_bytes = dict.fromkeys(file_paths, 0)
+    cache = helper.get_cache(cip)
+
+    def open_instance(session: comms.Driver, file_path: str) -> int:
+        # One at a time, so the ready checks and transfer instance creation don't interleave.
+        # While create_lock is held opened can only go down, so the wait holds until created.
+        with create_lock:
+            while True:
+                with condition:
+                    condition.wait_for(lambda: errors or (opened[0] < limit[0]))
+                    if errors: raise Exception('Stopped after another download failed.')
+                try:
+                    if not(_is_ready(session)): raise Exception('Terminal not ready for file transfer lock.')
+                    instance = _create_download(
+                        cip=session,
+                        file_path_terminal=file_path,
+                        file_size=len(files[file_path]),
+                        overwrite=files_exist[file_path]
+                    )
+                except Exception as e:
+                    with condition:
+                        if opened[0] == 0: raise
+                        limit[0] = opened[0]
+                    device.log.append(f'Terminal refused another transfer instance, limiting to {limit[0]} at once: {str(e)}')
+                    continue
+                with condition:
+                    opened[0] += 1
+                break
+
+            if not(_set_ready(session)):
+                close_instance(session, instance)
+                raise Exception('Terminal refused file transfer lock.')
+        return instance
+
+    def close_instance(session: comms.Driver, instance: int):
+        try:
+            _delete(cip=session, instance=instance)
+        finally:
+            with condition:
+                opened[0] -= 1
+                condition.notify_all()
+
+    def file_progress(file_path: str) -> Callable[[str, str, int, int], None]:
+        def target_progress(desc: str, unit: str, total: int, current: int):
+            if errors: raise Exception('Stopped after another download failed.')
+            with progress_lock:
+                current_bytes[file_path] = current
+                if progress: progress(f'Download {len(file_paths)} files', unit, total_bytes, sum(current_bytes.values()))
+        return target_progress
+
+    def download_one(session: comms.Driver, file_path: str):
+        try:
+            instance = open_instance(session, file_path)
+            try:
+                _write_download(
+                    cip=session,
+                    file_data=files[file_path],
+                    instance=instance,
+                    progress_desc=file_path,
+                    progress=file_progress(file_path)
+                )
+            finally:
+                close_instance(session, instance)
+            device.log.append(f'Downloaded {file_path} using transfer instance {instance}.')
+            if cache: cache.add_file(file_path, len(files[file_path]))
+        except Exception as e:
+            if cache: cache.forget_file(file_path)
+            with condition:
+                errors.append(Exception(f'Download {file_path} failed: {str(e)}'))
+                condition.notify_all()
+
+    sessions = _open_sessions(cip, workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for file_path in file_paths:
+                pool.submit(_send_on_session, sessions, download_one, file_path)
+    finally:
+        _close_sessions(cip, sessions)
+
+    # The first failure, the rest were stopped because of it
+    if errors: raise errors[0]
+    return True
+
+def _read_last_chunk(cip: comms.Driver, file_path_terminal: str) -> tuple[int, bytes]:
+    # Uploads only the last chunk of a file, returns the file size and chunk data
+    instance = None
+    try:
+        instance, file_size = _create_upload(cip=cip, file_path_terminal=file_path_terminal)
+        if file_size == 0: return (file_size, b'')
+        req_chunk_number = ((file_size - 1) // cip.me_chunk_size) + 1
+        resp_chunk_number, resp_chunk_size, resp_data = _read_chunk(cip, instance, req_chunk_number)
+        if _is_end_of_file(resp_chunk_number, resp_chunk_size, resp_data): raise Exception(f'Response end of file for chunk {req_chunk_number}.')
+        return (file_size, resp_data)
+    finally:
+        if instance is not None: _delete(cip=cip, instance=instance)
+
+def is_same_file(
+    cip: comms.Driver, 
+    device: types.MEDeviceInfo, 
+    file_data: bytearray, 
+    file_path_terminal: str
+) -> bool:
+    # True if the terminal has a file of the same size whose last chunk matches file_data.
+    # Only for *.MER files, whose last 4 bytes are the CRC32 of the rest of the file
+    # (see application._mer_rewrite_checksum), so this compares the whole file while
+    # only uploading one chunk.  For other files the tail says nothing about the rest.
+    if not _is_mer_path(file_path_terminal): raise ValueError(f'Only *.MER files can be compared, not {file_path_terminal}.')
+    if not _has_mer_checksum(file_data):
+        device.log.append(f'Did not compare {file_path_terminal}, the local file does not end with its CRC32.')
+        return False
+    try:
+        file_size = helper.get_file_size(cip, device.me_paths, file_path_terminal)
+    except FileNotFoundError:
+        return False
+    if file_size != len(file_data): return False
+
+    try:
+        file_size, resp_data = _read_last_chunk(cip, file_path_terminal)
+    except Exception as e:
+        device.log.append(f'Could not read end of {file_path_terminal} to compare: {str(e)}')
+        return False
+    if file_size != len(file_data): return False
+    # The checksum spans the last two chunks, so the last one alone doesn't cover it
+    if len(resp_data) < MER_CHECKSUM_SIZE_BYTES: return False
+    return resp_data == bytes(file_data[-len(resp_data):])
+
+def _is_mer_path(file_path: str) -> bool:
+    return file_path.lower().endswith('.mer')
+
+def _has_mer_checksum(file_data: bytearray) -> bool:
+    if len(file_data) < MER_CHECKSUM_SIZE_BYTES: return False
+    checksum = int.from_bytes(file_data[-MER_CHECKSUM_SIZE_BYTES:], byteorder='little', signed=False)
+    return util.crc32_checksum(file_data[:-MER_CHECKSUM_SIZE_BYTES]) == checksum
+
+def _is_startup_mer(cip: comms.Driver, file_name_terminal: str, replace_comms: bool, delete_logs: bool) -> bool:
+    # True if the terminal is set to run this *.MER at startup with the same options already
+    values = registry.get_values(cip, [
+        registry.RegKeys.ME_STARTUP_OPTIONS,
+        registry.RegKeys.ME_STARTUP_APP,
+        registry.RegKeys.ME_STARTUP_DELETE_LOGS,
+        registry.RegKeys.ME_STARTUP_REPLACE_COMMS
+    ])
+    startup_file = os.path.basename(values[registry.RegKeys.ME_STARTUP_APP].replace('\\','/'))
+    return (
+        (int(values[registry.RegKeys.ME_STARTUP_OPTIONS]) == 1) and
+        (startup_file.lower() == file_name_terminal.lower()) and
+        (bool(int(values[registry.RegKeys.ME_STARTUP_REPLACE_COMMS])) == replace_comms) and
+        (bool(int(values[registry.RegKeys.ME_STARTUP_DELETE_LOGS])) == delete_logs)
+    )
+
 def download_file(
     cip: comms.Driver, 
     device: types.MEDeviceInfo, 
     file_path_local: str,
     file_path_terminal: str,
     overwrite: bool = True,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False,
+    checkpoint_path: str = None,
+    skip_if_same: bool = False
 ) -> bool:
+    # Only *.MER files can be compared without uploading the whole file (see is_same_file)
+    if skip_if_same and not _is_mer_path(file_path_terminal): raise ValueError(f'skip_if_same is only supported for *.MER files, not {file_path_terminal}.')
     with open(file_path_local, 'rb') as source_file:
-        return download(
-            cip=cip,
-            device=device,
-            file_data=bytearray(source_file.read()),
-            file_path_terminal=file_path_terminal,
-            overwrite=overwrite,
-            progress=progress
-        )
-    
+        file_data = bytearray(source_file.read())
+    if skip_if_same and is_same_file(cip, device, file_data, file_path_terminal):
+        device.log.append(f'Skipped download of {file_path_terminal}, the same file is on the terminal already.')
+        return True
+    return download(
+        cip=cip,
+        device=device,
+        file_data=file_data,
+        file_path_terminal=file_path_terminal,
+        overwrite=overwrite,
+        progress=progress,
+        window=window,
+        connected=connected,
+        checkpoint_path=checkpoint_path
+    )
+
 def download_file_mer(
     cip: comms.Driver, 
     device: types.MEDeviceInfo, 
@@ -354,18 +981,52 @@ def download_file_mer(
     run_at_startup: bool,
     replace_comms: bool,
     delete_logs: bool,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False,
+    file_data: bytes = None,
+    checkpoint_path: str = None,
+    skip_if_same: bool = False
 ) -> bool:
+    # file_data, if given, is sent instead of reading file_path_local
+    # (i.e. one copy shared by downloads to several terminals).
     file_path_terminal = f'{device.me_paths.runtime}\\{file_name_terminal}'
-    download_file(
-        cip=cip,
-        device=device,
-        file_path_local=file_path_local,
-        file_path_terminal=file_path_terminal,
-        overwrite=overwrite,
-        progress=progress
-    )
+    if skip_if_same and (file_data is None):
+        with open(file_path_local, 'rb') as source_file:
+            file_data = source_file.read()
+
+    skipped = skip_if_same and is_same_file(cip, device, file_data, file_path_terminal)
+    if skipped:
+        device.log.append(f'Skipped download of {file_path_terminal}, the same file is on the terminal already.')
+    elif file_data is None:
+        download_file(
+            cip=cip,
+            device=device,
+            file_path_local=file_path_local,
+            file_path_terminal=file_path_terminal,
+            overwrite=overwrite,
+            progress=progress,
+            window=window,
+            connected=connected,
+            checkpoint_path=checkpoint_path
+        )
+    else:
+        download(
+            cip=cip,
+            device=device,
+            file_data=file_data,
+            file_path_terminal=file_path_terminal,
+            overwrite=overwrite,
+            progress=progress,
+            window=window,
+            connected=connected,
+            checkpoint_path=checkpoint_path
+        )
     if run_at_startup:
+        # Nothing changed, so no reason to reboot
+        if skipped and _is_startup_mer(cip, file_name_terminal, replace_comms, delete_logs):
+            device.log.append(f'Terminal is set to run {file_name_terminal} at startup already.')
+            return True
         helper.create_me_shortcut(
             cip=cip,
             paths=device.me_paths,
@@ -380,19 +1041,23 @@ def upload(
     cip: comms.Driver, 
     device: types.MEDeviceInfo, 
     file_path_terminal: str, 
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False
 ) -> bytearray:
     instance = None
     try:
         file_exists = helper.get_file_exists(cip=cip, paths=device.me_paths, file_path=file_path_terminal)
         if file_exists:
+            if connected: _open_connected(cip, device)
             instance, file_size = _create_upload(cip=cip, file_path_terminal=file_path_terminal)
             resp_binary = _read_upload(
                 cip=cip,
                 file_size=file_size,
                 instance=instance,
                 progress_desc=file_path_terminal,
-                progress=progress
+                progress=progress,
+                window=window
             )
             _delete(cip=cip, instance=instance)
             return resp_binary
@@ -400,19 +1065,25 @@ def upload(
     except Exception as e:
         if instance is not None: _delete(cip=cip, instance=instance)
         raise Exception(f'Upload {file_path_terminal} failed: {str(e)}')
+    finally:
+        if connected: cip.close_connected()
 
 def upload_file(
     cip: comms.Driver, 
     device: types.MEDeviceInfo, 
     file_path_local: str,
     file_path_terminal: str,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False
 ):
     resp_binary = upload(
         cip=cip,
         device=device,
         file_path_terminal=file_path_terminal,
-        progress=progress
+        progress=progress,
+        window=window,
+        connected=connected
     )
     if not(os.path.exists(file_path_local)): os.makedirs(os.path.dirname(file_path_local), exist_ok=True)
     with open(file_path_local, 'wb') as dest_file:
@@ -423,7 +1094,9 @@ def upload_file_mer(
     device: types.MEDeviceInfo, 
     file_path_local,
     file_name_terminal,
-    progress: Optional[Callable[[str, str, int, int], None]] = None
+    progress: Optional[Callable[[str, str, int, int], None]] = None,
+    window: int = 1,
+    connected: bool = False
 ) -> bool:
     file_path_terminal = f'{device.me_paths.runtime}\\{file_name_terminal}'
     upload_file(
@@ -431,7 +1104,9 @@ def upload_file_mer(
         device=device,
         file_path_local=file_path_local,
         file_path_terminal=file_path_terminal,
-        progress=progress
+        progress=progress,
+        window=window,
+        connected=connected
     )
     return True
 
@@ -450,19 +1125,67 @@ def upload_list(
     resp_list = resp_str.split(':')
     return resp_list
 
+def _upload_file_list(cip: comms.Driver, device: types.MEDeviceInfo, search_path: str) -> list[str]:
+    # Files matching search_path, listed with FileBrowse and uploaded, or from the session's helper cache
+    cache = helper.get_cache(cip)
+    file_list = cache.get_file_list(search_path) if cache else None
+    if file_list is not None: return file_list
+
+    helper.create_file_list(cip, device.me_paths, search_path)
+    try:
+        file_list = upload_list(cip=cip, device=device, file_path_terminal=device.me_paths.upload_list)
+    finally:
+        helper.delete_file_list(cip, device.me_paths)
+    if cache: cache.set_file_list(search_path, file_list)
+    return file_list
+
+def _upload_file_names(cip: comms.Driver, device: types.MEDeviceInfo, folder_path: str) -> set[str]:
+    # Lower case names of the files in a folder on the terminal
+    file_list = _upload_file_list(cip, device, f'{folder_path}\\*.*')
+    return {file.split('\\')[-1].lower() for file in file_list if file}
+
+def get_files_exist(
+    cip: comms.Driver,
+    device: types.MEDeviceInfo,
+    file_paths: list[str],
+    fallback: Callable[[comms.Driver, types.MEPaths, list[str]], dict[str, bool]] = None
+) -> dict[str, bool]:
+    # Checks whether many files exist with a handful of requests.  Folders with at least
+    # FILE_LIST_MIN_FILES of the files are listed with FileBrowse and the listing uploaded once.
+    # The rest, and any folder that can't be listed, are checked by fallback, which runs the
+    # individual checks over several sessions (helper.get_files_exist if not specified).
+    if fallback is None: fallback = helper.get_files_exist
+    folders = {}
+    for file_path in dict.fromkeys(file_paths):
+        dirname, basename = util.split_file_path(file_path)
+        folders.setdefault(dirname, []).append(file_path)
+
+    files_exist = {}
+    remaining = []
+    for (folder_path, folder_file_paths) in folders.items():
+        if len(folder_file_paths) < FILE_LIST_MIN_FILES:
+            remaining += folder_file_paths
+            continue
+        try:
+            file_names = _upload_file_names(cip, device, folder_path)
+        except Exception as e:
+            device.log.append(f'Could not list {folder_path}, checking files individually: {str(e)}')
+            remaining += folder_file_paths
+            continue
+        cache = helper.get_cache(cip)
+        for file_path in folder_file_paths:
+            files_exist[file_path] = util.split_file_path(file_path)[1].lower() in file_names
+            if cache and (cache.get_file_exists(file_path) is None): cache.set_file_exists(file_path, files_exist[file_path])
+
+    if remaining: files_exist.update(fallback(cip, device.me_paths, remaining))
+    return {file_path: files_exist[file_path] for file_path in file_paths}
+
 def upload_list_med(
     cip: comms.Driver, 
     device: types.MEDeviceInfo
 ) -> list[str]:
     try:
-        helper.create_file_list_med(cip, device.me_paths)
-        file_list = upload_list(
-            cip=cip,
-            device=device,
-            file_path_terminal=f'{device.me_paths.upload_list}'
-        )
-        helper.delete_file_list(cip, device.me_paths)        
-        return file_list
+        return _upload_file_list(cip, device, helper.get_file_list_med_search_path(device.me_paths))
     except Exception as e:
         return None
     
@@ -471,13 +1194,144 @@ def upload_list_mer(
     device: types.MEDeviceInfo
 ) -> list[str]:
     try:
-        helper.create_file_list_mer(cip, device.me_paths)
-        file_list = upload_list(
+        return _upload_file_list(cip, device, helper.get_file_list_mer_search_path(device.me_paths))
+    except Exception as e:
+        return None
+
+# Async variants of download and upload for an AsyncDriver.  These use the same
+# request and response formats, one chunk at a time, and are meant for driving
+# many terminals concurrently from one event loop rather than for speeding up
+# a single transfer (see window for that).
+async def _is_ready_async(cip: aiocomms.AsyncDriver) -> bool:
+    for (req_data, known_values, name) in READY_CHECKS:
+        resp = await messages.read_file_ready(cip, req_data)
+        if not _check_ready(resp, known_values, name): return False
+
+    return True
+
+async def _set_ready_async(cip: aiocomms.AsyncDriver) -> bool:
+    resp = await messages.write_file_ready(cip, SET_READY_DATA)
+    if not resp: return False
+
+    return True
+
+async def _write_download_async(
+    cip: aiocomms.AsyncDriver, 
+    file_data: bytearray, 
+    instance: int, 
+    progress_desc: str = None, 
+    progress: Optional[Callable[[str, str, int, int], None]] = None
+) -> bool:
+    req_chunk_number = 1
+    req_offset = 0
+    total_bytes = len(file_data)
+    while req_offset < total_bytes:
+        req_chunk = file_data[req_offset:req_offset + cip.me_chunk_size]
+        resp = await _write_chunk(cip, instance, req_chunk_number, req_chunk)
+        _check_write_chunk(resp, req_chunk_number)
+
+        # Update progress callback
+        current_bytes = req_offset + len(req_chunk)
+        if progress: progress(f'Download {progress_desc}','bytes', total_bytes, current_bytes)
+
+        # Continue to next chunk
+        req_chunk_number += 1
+        req_offset += len(req_chunk)
+
+    # Close out file
+    await messages.write_file_chunk(cip, instance, END_OF_FILE)
+    return True
+
+async def _read_upload_async(
+    cip: aiocomms.AsyncDriver, 
+    file_size: int, 
+    instance: int, 
+    progress_desc: str = None,
+    progress: Optional[Callable[[str, str, int, int], None]] = None
+) -> bytearray:
+    req_chunk_number = 1
+    resp_binary = bytearray()
+    while True:
+        resp = await messages.read_file_chunk(cip, instance, struct.pack('<I', req_chunk_number))
+        (resp_chunk_number, resp_chunk_size, resp_data) = _unpack_read_chunk(resp, req_chunk_number)
+
+        # End of file
+        if _is_end_of_file(resp_chunk_number, resp_chunk_size, resp_data): break
+
+        resp_binary += resp_data
+
+        # Update progress callback
+        if progress: progress(f'Upload {progress_desc}','bytes', file_size,len(resp_binary))
+
+        # Continue to next chunk
+        req_chunk_number += 1
+
+    return resp_binary
+
+async def download_async(
+    cip: aiocomms.AsyncDriver, 
+    device: types.MEDeviceInfo, 
+    file_data: bytearray, 
+    file_path_terminal: str, 
+    overwrite: bool = False,
+    progress: Optional[Callable[[str, str, int, int], None]] = None
+) -> bool:
+    instance = None
+    try:
+        dirname, basename = util.split_file_path(file_path_terminal)
+        try:
+            # Attempt to ensure the directory exists
+            await helper.create_folders_async(cip, device.me_paths, dirname)
+        except Exception as e:
+            print(e)
+
+        file_exists = await helper.get_file_exists_async(cip, device.me_paths, file_path_terminal)
+        if (overwrite and not file_exists): overwrite = False
+        if (file_exists and not overwrite): raise FileExistsError(f'File {file_path_terminal} exists on terminal already and overwrite was not specified.')
+
+        if not(await _is_ready_async(cip)): raise Exception('Terminal not ready for file transfer lock.')
+        req_data = _pack_create_download(cip, file_path_terminal, len(file_data), overwrite)
+        instance = _unpack_create_download(cip, await messages.create_transfer(cip, req_data), file_path_terminal)
+
+        if not(await _set_ready_async(cip)): raise Exception('Terminal refused file transfer lock.')
+        await _write_download_async(
             cip=cip,
-            device=device,
-            file_path_terminal=f'{device.me_paths.upload_list}'
+            file_data=file_data,
+            instance=instance,
+            progress_desc=file_path_terminal,
+            progress=progress
         )
-        helper.delete_file_list(cip, device.me_paths)
-        return file_list
+        device.log.append(f'Downloaded {file_path_terminal} using transfer instance {instance}.')
+
+        await messages.delete_transfer(cip, instance)
     except Exception as e:
-        return None
\ No newline at end of file
+        if instance is not None: await messages.delete_transfer(cip, instance)
+        raise Exception(f'Download {file_path_terminal} failed: {str(e)}')
+
+    return True
+
+async def upload_async(
+    cip: aiocomms.AsyncDriver, 
+    device: types.MEDeviceInfo, 
+    file_path_terminal: str, 
+    progress: Optional[Callable[[str, str, int, int], None]] = None
+) -> bytearray:
+    instance = None
+    try:
+        file_exists = await helper.get_file_exists_async(cip=cip, paths=device.me_paths, file_path=file_path_terminal)
+        if file_exists:
+            req_data = _pack_create_upload(cip, file_path_terminal)
+            instance, file_size = _unpack_create_upload(cip, await messages.create_transfer(cip, req_data), file_path_terminal)
+            resp_binary = await _read_upload_async(
+                cip=cip,
+                file_size=file_size,
+                instance=instance,
+                progress_desc=file_path_terminal,
+                progress=progress
+            )
+            await messages.delete_transfer(cip, instance)
+            return resp_binary
+        raise FileNotFoundError(f'File {file_path_terminal} does not exist on terminal.')
+    except Exception as e:
+        if instance is not None: await messages.delete_transfer(cip, instance)
+        raise Exception(f'Upload {file_path_terminal} failed: {str(e)}')
@@ -50,6 +50,13 @@ class MEFupMEFileListInf:
     info: MEFupMEFileListInfInfo
     mefiles: list[str]
     
+@dataclass
+class MEFupFlashBundle:
+    # Over-the-wire streams of a *.FUP file, as loaded from a bundle file
+    fup_name: str
+    kep_drivers: list[str]
+    streams: list[MEArchive]
+
 @dataclass
 class MEIdentity:
     helper_version: str
@@ -81,6 +88,17 @@ class MEDeviceInfo:
     startup_mer_file: str
     me_paths: MEPaths
 
+@dataclass
+class MEDownloadCheckpoint:
+    comms_path: str
+    file_path_terminal: str
+    file_hash: str
+    file_size: int
+    chunk_size: int
+    instance: int = None
+    chunk_number: int = 0
+    created_file: bool = False
+
 @dataclass
 class MERecipePlusDataSet:
     name: str
@@ -124,4 +142,20 @@ class MERecipePlusFile:
 @dataclass
 class MEResponse(object):
     device: MEDeviceInfo
+    status: str
+
+@dataclass
+class MEFleetStats(object):
+    targets: int
+    succeeded: int
+    failed: int
+    attempts: int
+    total_bytes: int
+    elapsed_sec: float
+    bytes_per_sec: float
+
+@dataclass
+class MEFleetResponse(object):
+    responses: dict[str, MEResponse]
+    stats: MEFleetStats
     status: str
\ No newline at end of file
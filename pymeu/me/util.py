@@ -1,4 +1,4 @@
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Mapping
 import os
 import time
 from typing import Optional
@@ -9,6 +9,7 @@ from . import helper
 from . import registry
 from . import transfer
 from . import types
+from . import validation
 
 def crc32_checksum(data):
     return zlib.crc32(data) & 0xFFFFFFFF
@@ -74,15 +75,21 @@ def get_major_rev(
     major_rev = int(device.me_identity.me_version.split(".")[0])
     return major_rev
 
-def _get_stream_by_name_exact(streams: list[types.MEArchive], name: str, case_insensitive: bool = True) -> types.MEArchive:
+def _iter_streams(streams: list[types.MEArchive] | Mapping[str, types.MEArchive]) -> Iterable[types.MEArchive]:
+    # Lazy archives (decompress.MELazyArchive) are mappings keyed by stream name.
+    # Only names are compared, so their streams aren't read until data is accessed.
+    if isinstance(streams, Mapping): return streams.values()
+    return streams
+
+def _get_stream_by_name_exact(streams: list[types.MEArchive] | Mapping[str, types.MEArchive], name: str, case_insensitive: bool = True) -> types.MEArchive:
     if case_insensitive:
-        return next(x for x in streams if x.name.lower() == name.lower())
+        return next(x for x in _iter_streams(streams) if x.name.lower() == name.lower())
     else:
-        return next(x for x in streams if x.name == name)
+        return next(x for x in _iter_streams(streams) if x.name == name)
 
-def _get_streams_by_name_prefix(streams: list[types.MEArchive], name: str, case_insensitive: bool = True) -> list[types.MEArchive]:
+def _get_streams_by_name_prefix(streams: list[types.MEArchive] | Mapping[str, types.MEArchive], name: str, case_insensitive: bool = True) -> list[types.MEArchive]:
     results = []
-    for x in streams:
+    for x in _iter_streams(streams):
         if case_insensitive:
             if x.name.lower().startswith(name.lower()): results.append(x)
         else:
@@ -96,8 +103,17 @@ def _path_to_list(path: str) -> list[str]:
 
 def reboot(
     cip: comms.Driver, 
-    device: types.MEDeviceInfo
+    device: types.MEDeviceInfo,
+    workers: int = None
 ):
+    # workers is passed on to registry.get_values for the startup options check.
+    #
+    # Files may change at startup (i.e. logs deleted), nothing cached for this session still holds.
+    # The terminal info is read fresh next time too, whichever operation rebooted the terminal.
+    cache = helper.get_cache(cip)
+    if cache: cache.clear()
+    validation.invalidate_terminal_info(cip._original_path)
+
     cip1 = comms.Driver(cip._original_path)
     cip1.timeout = 0.25
     cip1.open()
@@ -121,17 +137,23 @@ def reboot(
         if ((device.me_identity.major_rev < 12) or ((device.me_identity.major_rev == 12) and (device.me_identity.minor_rev < 108))):
             device.log.append(f'Did not attempt additional reboot because terminal is below minimum applicable version.')
             return
-        if (registry.get_startup_options(cip) != 1):
+        values = registry.get_values(cip, [
+            registry.RegKeys.ME_STARTUP_OPTIONS,
+            registry.RegKeys.ME_STARTUP_APP,
+            registry.RegKeys.ME_STARTUP_DELETE_LOGS,
+            registry.RegKeys.ME_STARTUP_REPLACE_COMMS
+        ], workers)
+        if (int(values[registry.RegKeys.ME_STARTUP_OPTIONS]) != 1):
             device.log.append(f'Did not attempt additional reboot because terminal Startup Options are not set to Run Current Application.')
             return
-        startup_file = os.path.basename(registry.get_startup_mer(cip).replace('\\','/'))
+        startup_file = os.path.basename(values[registry.RegKeys.ME_STARTUP_APP].replace('\\','/'))
         if not(startup_file.lower().endswith('.mer')):
             device.log.append(f'Did not attempt additional reboot because terminal does not have valid startup *.MER defined.')
             return
 
         # Rebuild existing ME Startup Shortcut on terminal
-        delete_logs = registry.get_startup_delete_logs(cip)
-        replace_comms = registry.get_startup_replace_comms(cip)
+        delete_logs = bool(int(values[registry.RegKeys.ME_STARTUP_DELETE_LOGS]))
+        replace_comms = bool(int(values[registry.RegKeys.ME_STARTUP_REPLACE_COMMS]))
         device.log.append(f'Setting file: {startup_file} to run at startup with Replace Comms: {replace_comms}, Delete Logs: {delete_logs}.')
         helper.create_me_shortcut(cip, device.me_paths, startup_file, replace_comms, delete_logs)
 
@@ -1,8 +1,10 @@
 import os
 import struct
+import time
 
+from .. import aiocomms
 from .. import comms
-from ..common.validation import get_cip_identity
+from ..common.validation import get_cip_hardware_rev, get_cip_identity, get_cip_identity_async
 
 from . import helper
 from . import registry
@@ -143,21 +145,46 @@ PRODUCT_TYPES = {
     24
 }
 
+# Terminal info keyed by (comms path, CIP serial number), with the time it was read.
+# Only used when get_terminal_info is called with a ttl.
+TERMINAL_INFO_CACHE = {}
+
 HELPER_FILE_NAME = 'RemoteHelper.DLL'
 RUNTIME_PATH = 'Rockwell Software\\RSViewME\\Runtime'
 UPLOAD_LIST_PATH = f'{RUNTIME_PATH}\\Results.txt'
 
-def get_me_identity(cip: comms.Driver, paths: types.MEPaths) -> types.MEIdentity:
-    me_version = registry.get_me_version(cip)
+# Registry keys read for the MEIdentity
+ME_IDENTITY_KEYS = [
+    registry.RegKeys.ME_VERSION,
+    registry.RegKeys.CIP_VERSION_MAJOR,
+    registry.RegKeys.CIP_VERSION_MINOR,
+    registry.RegKeys.CIP_PRODUCT_CODE,
+    registry.RegKeys.CIP_PRODUCT_NAME,
+    registry.RegKeys.CIP_PRODUCT_TYPE,
+    registry.RegKeys.CIP_SERIAL_NUMBER,
+    registry.RegKeys.CIP_VENDOR_ID
+]
+
+def get_me_identity(cip: comms.Driver, paths: types.MEPaths, workers: int = None) -> types.MEIdentity:
+    # workers is passed on to registry.get_values
+    values = registry.get_values(cip, ME_IDENTITY_KEYS, workers)
     helper_version = helper.get_version(cip, paths, paths.helper_file)
+    return _build_me_identity(values, helper_version)
+
+async def get_me_identity_async(cip: aiocomms.AsyncDriver, paths: types.MEPaths) -> types.MEIdentity:
+    values = {key: await registry.get_value_async(cip, [key]) for key in ME_IDENTITY_KEYS}
+    helper_version = await helper.get_version_async(cip, paths, paths.helper_file)
+    return _build_me_identity(values, helper_version)
 
-    major_rev = registry.get_version_major(cip)
-    minor_rev = registry.get_version_minor(cip)
-    product_code = registry.get_product_code(cip)
-    product_name = registry.get_product_name(cip)
-    product_type = registry.get_product_type(cip)
-    serial_number = registry.get_serial_number(cip)
-    vendor_id = registry.get_vendor_id(cip)
+def _build_me_identity(values: dict[str, str], helper_version: str) -> types.MEIdentity:
+    me_version = values[registry.RegKeys.ME_VERSION]
+    major_rev = int(values[registry.RegKeys.CIP_VERSION_MAJOR])
+    minor_rev = int(values[registry.RegKeys.CIP_VERSION_MINOR])
+    product_code = int(values[registry.RegKeys.CIP_PRODUCT_CODE])
+    product_name = str(values[registry.RegKeys.CIP_PRODUCT_NAME])
+    product_type = int(values[registry.RegKeys.CIP_PRODUCT_TYPE])
+    serial_number = registry.format_serial_number(values[registry.RegKeys.CIP_SERIAL_NUMBER])
+    vendor_id = int(values[registry.RegKeys.CIP_VENDOR_ID])
 
     return types.MEIdentity(
         helper_version=helper_version,
@@ -172,7 +199,12 @@ def get_me_identity(cip: comms.Driver, paths: types.MEPaths) -> types.MEIdentity
     )
 
 def get_me_paths(cip: comms.Driver) -> types.MEPaths:
-    me_version = registry.get_me_version(cip)
+    return _build_me_paths(registry.get_me_version(cip))
+
+async def get_me_paths_async(cip: aiocomms.AsyncDriver) -> types.MEPaths:
+    return _build_me_paths(await registry.get_value_async(cip, [registry.RegKeys.ME_VERSION]))
+
+def _build_me_paths(me_version: str) -> types.MEPaths:
     major_rev = int(me_version.split(".")[0])
 
     if major_rev <= 5:
@@ -194,15 +226,56 @@ def get_me_paths(cip: comms.Driver) -> types.MEPaths:
         runtime=runtime_path,
         fuwhelper_file=fuwhelper_file_path)
 
-def get_terminal_info(cip: comms.Driver) -> types.MEDeviceInfo:
-    cip_identity = get_cip_identity(cip)
+def get_terminal_info(cip: comms.Driver, ttl: float = 0, workers: int = None) -> types.MEDeviceInfo:
+    # With a ttl (in seconds), info read from the same terminal (same comms path and
+    # serial number) within that time is reused, so only the CIP identity is requested.
+    # workers is the most sessions the registry keys are read over (see registry.get_values).
+    cip_identity = get_cip_identity(cip, hardware_rev=not(ttl > 0))
+    if ttl > 0:
+        key = (cip._original_path, cip_identity.serial_number)
+        cached = TERMINAL_INFO_CACHE.get(key)
+        if cached and ((time.monotonic() - cached[0]) <= ttl):
+            (_, cip_identity.hardware_rev, me_paths, me_identity) = cached
+            return types.MEDeviceInfo(
+                comms_path=cip._original_path,
+                cip_identity=cip_identity,
+                me_identity=me_identity,
+                log=[],
+                files=[],
+                running_med_file=None,
+                startup_mer_file=None,
+                me_paths=me_paths)
+        cip_identity.hardware_rev = get_cip_hardware_rev(cip)
+
     try:
         me_paths = get_me_paths(cip)
-        me_identity = get_me_identity(cip, me_paths)
+        me_identity = get_me_identity(cip, me_paths, workers)
+    except:
+        me_paths = types.MEPaths(None,None,None,None,None)
+        me_identity = types.MEIdentity(None,None,None,None,None,None,None,None,None)
+    else:
+        if ttl > 0: TERMINAL_INFO_CACHE[key] = (time.monotonic(), cip_identity.hardware_rev, me_paths, me_identity)
+
+    return types.MEDeviceInfo(
+        comms_path=cip._original_path,
+        cip_identity=cip_identity,
+        me_identity=me_identity,
+        log=[],
+        files=[],
+        running_med_file=None,
+        startup_mer_file=None,
+        me_paths=me_paths)
+
+async def get_terminal_info_async(cip: aiocomms.AsyncDriver) -> types.MEDeviceInfo:
+    # Same as get_terminal_info (without the cache), for an AsyncDriver
+    cip_identity = await get_cip_identity_async(cip)
+    try:
+        me_paths = await get_me_paths_async(cip)
+        me_identity = await get_me_identity_async(cip, me_paths)
     except:
         me_paths = types.MEPaths(None,None,None,None,None)
         me_identity = types.MEIdentity(None,None,None,None,None,None,None,None,None)
-        
+
     return types.MEDeviceInfo(
         comms_path=cip._original_path,
         cip_identity=cip_identity,
@@ -213,6 +286,12 @@ def get_terminal_info(cip: comms.Driver) -> types.MEDeviceInfo:
         startup_mer_file=None,
         me_paths=me_paths)
 
+def invalidate_terminal_info(comms_path: str = None):
+    # Drops cached terminal info for a comms path (any serial number), or all of it.
+    # Called before operations that may change it, such as reboot and firmware flash.
+    for key in list(TERMINAL_INFO_CACHE):
+        if (comms_path is None) or (key[0] == comms_path): TERMINAL_INFO_CACHE.pop(key, None)
+
 def extract_version_prefix(version: str) -> str:
     """Extracts the major and minor version (e.g., '12.00') from a version string."""
     return '.'.join(version.split('.')[:2])
@@ -6,6 +6,7 @@ from warnings import warn
 from . import comms
 from .me import firmware
 from .me import fuwhelper
+from .me import helper
 from .me import transfer
 from .me import types
 from .me import util
@@ -25,6 +26,10 @@ class MEUtility(object):
         local_bin_path: str = None,
         local_fup_path: str = None,
         local_runtime_path: str = None,
+        probe_chunk_size: bool = False,
+        pool: comms.DriverPool = None,
+        terminal_info_ttl: float = 0,
+        registry_workers: int = None
     ):
         """
         Initializes an instance of the MEUtility class.
@@ -38,11 +43,27 @@ class MEUtility(object):
             local_bin_path (str): The default directory to assume Helper/Cover files are found.
             local_fup_path (str): The default directory to assume *.FUP files are found.
             local_runtime_path (str): The default directory to assume *.MER files are found.
+            probe_chunk_size (bool): If True, the largest file chunk size the terminal accepts over this
+                path and driver is found before the first upload or download, and reused for later
+                transfers to the same path.  Defaults to False.
+            pool (comms.DriverPool): Optional pool to borrow drivers from instead of opening a new one
+                for each operation.  Can be shared with other MEUtility and CFUtility instances.
+            terminal_info_ttl (float): If greater than zero, terminal info read from the same terminal
+                within this many seconds is reused, so that only the CIP identity is requested before
+                each operation.  Cleared on reboot or firmware flash.  Defaults to 0 (always read).
+            registry_workers (int): The most sessions to the terminal used at once to read the registry
+                keys for the terminal info and reboot, so the reads overlap instead of going one after
+                another.  Falls back to one session if the terminal refuses another.  Defaults to
+                me.registry.REGISTRY_WORKERS (1).
         """
         self.comms_path = comms_path
         self.driver = driver
         self.ignore_terminal_valid = ignore_terminal_valid
         self.ignore_driver_valid = ignore_driver_valid
+        self.pool = pool
+        self.terminal_info_ttl = terminal_info_ttl
+        self.registry_workers = registry_workers
+        self.probe_chunk_size = probe_chunk_size
 
         self.local_bin_path = LOCAL_BIN_PATH if local_bin_path is None else local_bin_path
         self.local_fup_path = LOCAL_FUP_PATH if local_fup_path is None else local_fup_path 
@@ -93,6 +114,11 @@ class MEUtility(object):
         replace_comms: bool = False,
         run_at_startup: bool = True,
         progress: Optional[Callable[[str, str, int, int], None]] = None, 
+        window: int = 1,
+        connected: bool = False,
+        file_data: bytes = None,
+        checkpoint_path: str = None,
+        skip_if_same: bool = False
     ) -> types.MEResponse:
         """
         Downloads a *.MER file from the local device to the remote terminal.
@@ -108,6 +134,26 @@ class MEUtility(object):
             run_at_startup (bool) : If True, will also set this *.MER file to be run at terminal startup and
                 reboot the terminal now.  Defaults to True.
             progress: Optional callback for progress indication.
+            window (int): The number of file chunks to keep in flight at once, each over its own
+                session to the terminal.  Helps most over high-latency routed paths.  Defaults to 1
+                (wait for each chunk to be acknowledged before sending the next).
+            connected (bool): If True, the file chunks are sent over one connection to the terminal (large
+                forward open) instead of as unconnected messages, which also allows larger chunks.  Only
+                available with pycomm3, otherwise unconnected messages are used.  Defaults to False.
+            file_data (bytes): The contents of file_path_local if already read, so that one copy can be
+                shared by downloads to several terminals.  The local file is still used for validation.
+            checkpoint_path (str): If specified, the local file to record download progress in.  If the download
+                fails part way, the terminal's transfer instance is left open and calling download again with
+                the same file and checkpoint_path continues from the last acknowledged chunk.  Starts over if
+                the terminal rebooted in between.  The checkpoint is removed once the download completes.
+                While the transfer instance is left open the terminal refuses other file transfers (its
+                file transfer lock stays held) until the download is resumed, the terminal is rebooted, or
+                the checkpoint is discarded with discard_download_checkpoint.  A checkpoint with a transfer
+                instance open on a different comms path is refused rather than replaced.
+            skip_if_same (bool): If True, the download is skipped when the terminal already has a *.MER file
+                of the same size and the same trailing checksum, found by uploading only its last chunk.  If it
+                is also set to run at startup with the same options, the terminal is not rebooted either.
+                download_skipped is set to whether the file was skipped.  Defaults to False.
         """
         # Use default MER directory if one is not specified
         if not os.path.isfile(file_path_local):
@@ -116,9 +162,11 @@ class MEUtility(object):
 
         if file_name_terminal is None: file_name_terminal = os.path.basename(file_path_local)
 
-        with comms.Driver(self.comms_path, self.driver) as cip:
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            # File queries are cached for the rest of this call (see helper.HelperCache)
+            cip.helper_cache = helper.HelperCache()
             # Validate device at this communications path is a terminal of known version.
-            self.device = validation.get_terminal_info(cip)
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -126,13 +174,26 @@ class MEUtility(object):
                     raise Exception('Invalid device selected.  Use ignore_terminal_valid=True when initializing MEUtility object to proceed at your own risk.')
                 
             # Validate that all starting conditions for downnload to terminal are good
+            self.download_skipped = False
             try:
+                # Compared first, since only an identical file already there isn't a conflict.
+                # A different file still needs overwrite.
+                if skip_if_same:
+                    if file_data is None:
+                        with open(file_path_local, 'rb') as source_file:
+                            file_data = source_file.read()
+                    self.download_skipped = transfer.is_same_file(
+                        cip=cip,
+                        device=self.device,
+                        file_data=file_data,
+                        file_path_terminal=f'{self.device.me_paths.runtime}\\{file_name_terminal}'
+                    )
                 resp = validation.is_valid_download(
                     cip=cip,
                     device=self.device,
                     file_path_local=file_path_local,
                     file_name_terminal=file_name_terminal,
-                    overwrite=overwrite
+                    overwrite=overwrite or self.download_skipped
                 )
                 if resp:
                     self.device.log.append(f'Validated download for {file_path_local}.')
@@ -146,6 +207,7 @@ class MEUtility(object):
 
             # Perform *.MER download to terminal
             try:
+                if self.probe_chunk_size: transfer.probe_chunk_size(cip, self.device)
                 resp = transfer.download_file_mer(
                     cip=cip,
                     device=self.device,
@@ -155,7 +217,12 @@ class MEUtility(object):
                     run_at_startup=run_at_startup,
                     replace_comms=replace_comms,
                     delete_logs=delete_logs,
-                    progress=progress
+                    progress=progress,
+                    window=window,
+                    connected=connected,
+                    file_data=file_data,
+                    checkpoint_path=checkpoint_path,
+                    skip_if_same=self.download_skipped
                 )
                 if not(resp):
                     self.device.log.append(f'Failed to download to terminal.')
@@ -167,13 +234,46 @@ class MEUtility(object):
 
         return types.MEResponse(self.device, types.ResponseStatus.SUCCESS)
     
+    def discard_download_checkpoint(
+        self,
+        checkpoint_path: str
+    ) -> types.MEResponse:
+        """
+        Deletes the transfer instance left open on the remote terminal by a failed download with
+        checkpoint_path, which frees the terminal for other file transfers, and removes the checkpoint.
+
+        Args:
+            checkpoint_path (str): The checkpoint_path passed to download.  It must be for this
+                comms path.
+        """
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
+            if not(validation.is_valid_me_terminal(self.device)):
+                if self.ignore_terminal_valid:
+                    warn('Invalid device selected, but terminal validation is set to IGNORE.')
+                else:
+                    raise Exception('Invalid device selected.  Use ignore_terminal_valid=True when initializing MEUtility object to proceed at your own risk.')
+
+            try:
+                if not(transfer.discard_checkpoint(cip, self.device, checkpoint_path)):
+                    self.device.log.append(f'No checkpoint found at {checkpoint_path}.')
+            except Exception as e:
+                self.device.log.append(f'Exception: {str(e)}')
+                self.device.log.append(f'Failed to discard download checkpoint.')
+                return types.MEResponse(self.device, types.ResponseStatus.FAILURE)
+
+        return types.MEResponse(self.device, types.ResponseStatus.SUCCESS)
+
     def flash_firmware(
         self, 
-        fup_path_local: str, 
-        fuwhelper_path_local: str, 
+        fup_path_local: str = None, 
+        fuwhelper_path_local: str = None, 
         fuwcover_path_local: str = None,
         kep_drivers: list[str] = None,
-        progress: Optional[Callable[[str, str, int, int], None]] = None
+        progress: Optional[Callable[[str, str, int, int], None]] = None,
+        download_workers: int = firmware.FIRMWARE_DOWNLOAD_WORKERS,
+        bundle: str | types.MEFupFlashBundle = None,
+        helper_workers: int = None
     ) -> types.MEResponse:
         """
         Flashes a firmware image to the remote terminal.
@@ -184,7 +284,20 @@ class MEUtility(object):
             fuwcover_path_local (str): The local path to the firmware cover file if applicable (ex: C:\\Program Files (x86)\\Rockwell Software\\RSView Enterprise\\FUWCover4xX.exe)
             kep_drivers (list[str]): The names of the KepDrivers to enable by default.
             progress: Optional callback for progress indication.
+            download_workers (int): The most firmware files to download at once on v6+ terminals, each with
+                its own transfer instance and session.  Lowered automatically if the terminal refuses one.
+                Use 1 to download one file at a time.
+            bundle (str | types.MEFupFlashBundle): Instead of fup_path_local, the local path to a bundle file
+                from me.firmware.prepare_flash_bundle, or a bundle already loaded with me.firmware.load_flash_bundle
+                (to reuse for several terminals).  The KEP drivers are the ones the bundle was prepared with.
+            helper_workers (int): The most sessions to the terminal used at once for the FUWhelper folder,
+                file and process checks before a v6+ flash, so they are in flight together instead of one
+                after another.  Falls back to one session if the terminal refuses another.  Defaults to
+                me.helper.HELPER_WORKERS (1).
         """
+        if (fup_path_local is None) == (bundle is None): raise ValueError('Specify one of fup_path_local or bundle.')
+        if fuwhelper_path_local is None: raise ValueError('fuwhelper_path_local must be specified.')
+
         # Use default RSView directory if one is not specified
         if not os.path.isfile(fuwhelper_path_local):
             if os.path.sep not in fuwhelper_path_local:
@@ -197,11 +310,18 @@ class MEUtility(object):
                     fuwcover_path_local = os.path.join(self.local_bin_path, fuwcover_path_local)
 
         # Use default RSView directory if one is not specified
-        if not os.path.isfile(fup_path_local):
+        if (fup_path_local is not None) and not os.path.isfile(fup_path_local):
             if os.path.sep not in fup_path_local:
                 fup_path_local = os.path.join(self.local_fup_path, fup_path_local)
 
-        with comms.Driver(self.comms_path, self.driver) as cip:
+        # Checked before connecting, so a bad bundle doesn't touch the terminal
+        if isinstance(bundle, str):
+            # Use default RSView directory if one is not specified
+            if not os.path.isfile(bundle) and (os.path.sep not in bundle):
+                bundle = os.path.join(self.local_fup_path, bundle)
+            bundle = firmware.load_flash_bundle(bundle)
+
+        with comms.connect(self.comms_path, self.driver, self.pool, discard=True) as cip:
             if (self.driver == comms.DRIVER_NAME_PYCOMM3) and comms.is_routed_path(self.comms_path):
                 if (cip._const_timeout_ticks != b'\xFF'):
                     if self.ignore_driver_valid:
@@ -220,7 +340,7 @@ class MEUtility(object):
             cip.timeout = 255.0
 
             # Validate device at this communications path is a terminal of known version.
-            self.device = validation.get_terminal_info(cip)
+            self.device = validation.get_terminal_info(cip, workers=self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)) or not(validation.is_native_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -228,6 +348,7 @@ class MEUtility(object):
                     raise Exception('Invalid device selected.  Use ignore_terminal_valid=True when initializing MEUtility object to proceed at your own risk.')
 
             # Perform firmware flash to terminal
+            validation.invalidate_terminal_info(self.comms_path)
             try:
                 resp = firmware.flash_fup_to_terminal(
                     cip=cip,
@@ -236,7 +357,10 @@ class MEUtility(object):
                     fuwhelper_path_local=fuwhelper_path_local,
                     fuwcover_path_local=fuwcover_path_local,
                     kep_drivers=kep_drivers,
-                    progress=progress
+                    progress=progress,
+                    download_workers=download_workers,
+                    bundle=bundle,
+                    helper_workers=helper_workers
                 )
                 if not(resp):
                     self.device.log.append(f'Failed to flash terminal.')
@@ -268,8 +392,9 @@ class MEUtility(object):
                 or transfers so that Diagnostics window doesn't pop up on the remote
                 terminal.  Defaults to False.
         """
-        with comms.Driver(self.comms_path, self.driver) as cip:
-            self.device = validation.get_terminal_info(cip)
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            cip.helper_cache = helper.HelperCache()
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -291,8 +416,8 @@ class MEUtility(object):
         """
         Reboots the remote terminal now.
         """
-        with comms.Driver(self.comms_path, self.driver) as cip:
-            self.device = validation.get_terminal_info(cip)
+        with comms.connect(self.comms_path, self.driver, self.pool, discard=True) as cip:
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
 
             if not(validation.is_valid_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
@@ -300,8 +425,9 @@ class MEUtility(object):
                 else:
                     raise Exception('Invalid device selected.  Use kwarg ignore_terminal_valid=True when initializing MEUtility object to proceed at your own risk.')
 
+            validation.invalidate_terminal_info(self.comms_path)
             try:
-                util.reboot(cip, self.device)
+                util.reboot(cip, self.device, self.registry_workers)
             except Exception as e:
                 self.device.log.append(f'Failed to reboot terminal.')
                 return types.MEResponse(self.device, types.ResponseStatus.FAILURE)
@@ -319,8 +445,8 @@ class MEUtility(object):
         Args:
             fuwhelper_path_local (str): The local path to the firmware helper file (ex: C:\\Program Files (x86)\\Rockwell Software\\RSView Enterprise\\FUWhelper6xX.dll)
         """
-        with comms.Driver(self.comms_path, self.driver) as cip:
-            self.device = validation.get_terminal_info(cip)
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)) or not(validation.is_native_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -365,6 +491,8 @@ class MEUtility(object):
         file_name_terminal: str = None,
         overwrite: bool = False,
         progress: Optional[Callable[[str, str, int, int], None]] = None, 
+        window: int = 1,
+        connected: bool = False
     ) -> types.MEResponse:
         """
         Uploads a *.MER file from the remote terminal to the local device.
@@ -375,6 +503,11 @@ class MEUtility(object):
             overwrite (bool) : If True, will replace the file on the local device with the uploaded
                 copy from the remote terminal.  Defaults to False.
             progress: Optional callback for progress indication.
+            window (int): The number of file chunks to read ahead at once, each over its own
+                session to the terminal.  Defaults to 1 (read one chunk at a time).
+            connected (bool): If True, the file chunks are sent over one connection to the terminal (large
+                forward open) instead of as unconnected messages, which also allows larger chunks.  Only
+                available with pycomm3, otherwise unconnected messages are used.  Defaults to False.
         """
 
         # Create local path if it doesn't exist yet
@@ -382,9 +515,10 @@ class MEUtility(object):
 
         if file_name_terminal is None: file_name_terminal = os.path.basename(file_path_local)
 
-        with comms.Driver(self.comms_path, self.driver) as cip:
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            cip.helper_cache = helper.HelperCache()
             # Validate device at this communications path is a terminal of known version.
-            self.device = validation.get_terminal_info(cip)
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -398,12 +532,15 @@ class MEUtility(object):
 
             # Perform *.MER upload from terminal
             try:
+                if self.probe_chunk_size: transfer.probe_chunk_size(cip, self.device)
                 resp = transfer.upload_file_mer(
                     cip=cip,
                     device=self.device,
                     file_path_local=file_path_local,
                     file_name_terminal=file_name_terminal,
-                    progress=progress
+                    progress=progress,
+                    window=window,
+                    connected=connected
                 )                    
                 if not(resp):
                     self.device.log.append(f'Failed to upload from terminal.')
@@ -420,6 +557,8 @@ class MEUtility(object):
         folder_path_local: str, 
         overwrite: bool = False,
         progress: Optional[Callable[[str, str, int, int], None]] = None, 
+        window: int = 1,
+        connected: bool = False
     ) -> types.MEResponse:
         """
         Uploads all *.MER files from the remote terminal to the local device.
@@ -429,14 +568,20 @@ class MEUtility(object):
             overwrite (bool) : If True, will replace the file on the local device with the 
                 uploaded copy from the remote terminal.  Defaults to False.
             progress: Optional callback for progress indication.
+            window (int): The number of file chunks to read ahead at once, each over its own
+                session to the terminal.  Defaults to 1 (read one chunk at a time).
+            connected (bool): If True, the file chunks are sent over one connection to the terminal (large
+                forward open) instead of as unconnected messages, which also allows larger chunks.  Only
+                available with pycomm3, otherwise unconnected messages are used.  Defaults to False.
         """
 
         # Create upload folder if it doesn't exist yet
         if not(os.path.exists(folder_path_local)): os.makedirs(folder_path_local, exist_ok=True)
 
-        with comms.Driver(self.comms_path, self.driver) as cip:
+        with comms.connect(self.comms_path, self.driver, self.pool) as cip:
+            cip.helper_cache = helper.HelperCache()
             # Validate device at this communications path is a terminal of known version.
-            self.device = validation.get_terminal_info(cip)
+            self.device = validation.get_terminal_info(cip, self.terminal_info_ttl, self.registry_workers)
             if not(validation.is_valid_me_terminal(self.device)):
                 if self.ignore_terminal_valid:
                     warn('Invalid device selected, but terminal validation is set to IGNORE.')
@@ -444,6 +589,7 @@ class MEUtility(object):
                     raise Exception('Invalid device selected.  Use ignore_terminal_valid=True when initializing MEUtility object to proceed at your own risk.')
 
             try:
+                if self.probe_chunk_size: transfer.probe_chunk_size(cip, self.device)
                 mer_list = transfer.upload_list_mer(cip, self.device)
                 mer_list = [mer for mer in mer_list if mer]
                 for file_name_terminal in mer_list:
@@ -459,7 +605,9 @@ class MEUtility(object):
                         device=self.device,
                         file_path_local=file_path_local,
                         file_name_terminal=file_name_terminal,
-                        progress=progress
+                        progress=progress,
+                        window=window,
+                        connected=connected
                     )
                     if not(resp):
                         self.device.log.append(f'Failed to upload from terminal.')
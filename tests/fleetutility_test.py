@@ -0,0 +1,80 @@
+import unittest
+
+from pymeu import FleetUtility
+from pymeu.me import types
+
+from config import *
+
+# Turn off sort so that tests run in line order
+unittest.TestLoader.sortTestMethodsUsing = None
+
+class fleet_tests(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_download_overwrite(self):
+        print('')
+        for driver in DRIVERS:
+            for device in DEVICES:
+                comms_paths = device.comms_paths[:1]
+                fu = FleetUtility(comms_paths, driver=driver, retries=1)
+                download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+                result = (
+                        f'Device: {device.name}\n'
+                        f'Driver: {driver}\n'
+                        f'Paths: {comms_paths}\n'
+                        f'Function: download({download_file_path}, overwrite=True, run_at_startup=False)\n'
+                )
+                print(result)
+                resp = fu.download(download_file_path, overwrite=True, run_at_startup=False)
+                for (comms_path, target_resp) in resp.responses.items():
+                    print(comms_path)
+                    for s in target_resp.device.log: print(s)
+                print(resp.stats)
+                print('')
+                self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+    def test_upload_overwrite(self):
+        print('')
+        for driver in DRIVERS:
+            for device in DEVICES:
+                # Every path to the same terminal at once, each with its own transfer instance
+                fu = FleetUtility(device.comms_paths, driver=driver, retries=1)
+                upload_folder_path = os.path.join(LOCAL_OUTPUT_MER_PATH, device.name, driver, 'fleet')
+                result = (
+                        f'Device: {device.name}\n'
+                        f'Driver: {driver}\n'
+                        f'Paths: {device.comms_paths}\n'
+                        f'Function: upload({upload_folder_path}, {device.mer_files[0]}, overwrite=True)\n'
+                )
+                print(result)
+                resp = fu.upload(upload_folder_path, device.mer_files[0], overwrite=True)
+                print(resp.stats)
+                print('')
+                self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+                self.assertEqual(resp.stats.succeeded, len(device.comms_paths))
+
+    def test_upload_gateway_limited(self):
+        print('')
+        for driver in DRIVERS:
+            for device in DEVICES:
+                # Routed paths share the first hop as a gateway, one at a time and rate limited through it
+                fu = FleetUtility(device.comms_paths, driver=driver, max_workers_per_gateway=1, gateway_message_rate=20)
+                upload_folder_path = os.path.join(LOCAL_OUTPUT_MER_PATH, device.name, driver, 'fleet_gateway')
+                result = (
+                        f'Device: {device.name}\n'
+                        f'Driver: {driver}\n'
+                        f'Paths: {device.comms_paths}\n'
+                        f'Function: upload({upload_folder_path}, {device.mer_files[0]}, overwrite=True)\n'
+                )
+                print(result)
+                resp = fu.upload(upload_folder_path, device.mer_files[0], overwrite=True)
+                print(resp.stats)
+                print('')
+                self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+    def tearDown(self):
+        pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
+import asyncio
 import glob
 import pprint
 import time
 import unittest
 
+from pymeu import aiocomms
 from pymeu import comms
 from pymeu import MEUtility
 from pymeu import me
@@ -81,6 +83,50 @@ class helper_tests(unittest.TestCase):
                 results.append(value)
         self.assertTrue(all(x == results[0] for x in results))
 
+    def test_get_files_exist_batched(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.Driver(comms_path, driver=driver) as cip:
+                terminal = validation.get_terminal_info(cip)
+                # Enough in \Windows to be listed, the rest checked individually
+                file_paths = [terminal.me_paths.helper_file, NONEXISTENT_FILE]
+                file_paths += [f'\\Windows\\Nonexistent{i}.ext' for i in range(me.transfer.FILE_LIST_MIN_FILES)]
+                start_time = time.time()
+                values = me.transfer.get_files_exist(cip, terminal, file_paths)
+                result = (
+                    f'Device: {device.name}\n' 
+                    f'Driver: {driver}\n' 
+                    f'Path: {comms_path}\n'
+                    f'Function: get_files_exist({len(file_paths)} files)\n'
+                    f'Value: {values}\n'
+                    f'Elapsed: {time.time() - start_time:.3f} seconds\n'
+                )
+                print(result)
+                for file_path in file_paths:
+                    self.assertEqual(values[file_path], me.helper.get_file_exists(cip, terminal.me_paths, file_path))
+
+    def test_get_file_exists_cached(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.Driver(comms_path, driver=driver) as cip:
+                terminal = validation.get_terminal_info(cip)
+                cip.helper_cache = me.helper.HelperCache()
+                file_path = terminal.me_paths.helper_file
+                value = me.helper.get_file_exists(cip, terminal.me_paths, file_path)
+                start_time = time.time()
+                cached_value = me.helper.get_file_exists(cip, terminal.me_paths, file_path.upper())
+                result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: get_file_exists(cached)\n'
+                    f'Value: {cached_value}\n'
+                    f'Elapsed: {time.time() - start_time:.3f} seconds\n'
+                )
+                print(result)
+                self.assertTrue(value)
+                self.assertEqual(value, cached_value)
+
     def test_get_file_exists_bad_nonexistent(self):
         print('')
         results = []
@@ -284,6 +330,24 @@ class registry_tests(unittest.TestCase):
                 results.append(kvp)
         #self.assertTrue(all(x == results[0] for x in results))
 
+    def test_read_registry_batched(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.Driver(comms_path, driver=driver) as cip:
+                keys = [key for key in me.registry.RegKeys if key not in self.skip_pairs.get(device.name, {})]
+                start_time = time.time()
+                values = me.registry.get_values(cip, keys, workers=4)
+                result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: get_values({len(keys)} keys, workers=4)\n'
+                    f'Elapsed: {time.time() - start_time:.3f} seconds\n'
+                )
+                print(result)
+                for key in keys:
+                    self.assertEqual(values[key], me.registry.get_value(cip, [key]))
+
     def tearDown(self):
         pass
 
@@ -374,6 +438,114 @@ class download_tests(unittest.TestCase):
             count += 1
             if (count % len(DEVICES)) == 0: time.sleep(device.boot_time_sec)
 
+    def test_download_resume(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+            checkpoint_path = os.path.join(LOCAL_OUTPUT_MER_PATH, f'{device.name}_{driver}_checkpoint.json')
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: download({download_file_path}, overwrite=True, run_at_startup=False, checkpoint_path={checkpoint_path})\n'
+            )
+            print(result)
+
+            # Abort part way through, as if the link dropped
+            def abort_progress(desc: str, unit: str, total: int, current: int):
+                if current > (total / 2): raise ConnectionError('Aborted for test.')
+            resp = meu.download(download_file_path, overwrite=True, run_at_startup=False, progress=abort_progress, checkpoint_path=checkpoint_path)
+            for s in resp.device.log: print(s)
+            self.assertEqual(resp.status, types.ResponseStatus.FAILURE)
+            self.assertTrue(os.path.isfile(checkpoint_path))
+
+            resp = meu.download(download_file_path, overwrite=True, run_at_startup=False, checkpoint_path=checkpoint_path)
+            for s in resp.device.log: print(s)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+            self.assertTrue(any(s.startswith('Resuming download') for s in resp.device.log))
+            self.assertFalse(os.path.isfile(checkpoint_path))
+
+    def test_download_discard_checkpoint(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+            checkpoint_path = os.path.join(LOCAL_OUTPUT_MER_PATH, f'{device.name}_{driver}_checkpoint.json')
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: discard_download_checkpoint({checkpoint_path})\n'
+            )
+            print(result)
+
+            def abort_progress(desc: str, unit: str, total: int, current: int):
+                if current > (total / 2): raise ConnectionError('Aborted for test.')
+            resp = meu.download(download_file_path, overwrite=True, run_at_startup=False, progress=abort_progress, checkpoint_path=checkpoint_path)
+            self.assertEqual(resp.status, types.ResponseStatus.FAILURE)
+            self.assertTrue(os.path.isfile(checkpoint_path))
+
+            resp = meu.discard_download_checkpoint(checkpoint_path)
+            for s in resp.device.log: print(s)
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+            self.assertFalse(os.path.isfile(checkpoint_path))
+
+            # The terminal accepts a new transfer once the old instance is gone
+            resp = meu.download(download_file_path, overwrite=True, run_at_startup=False)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+    def test_download_many(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.Driver(comms_path, driver=driver) as cip:
+                terminal = validation.get_terminal_info(cip)
+                files = {}
+                for file_name in device.mer_files:
+                    with open(os.path.join(LOCAL_INPUT_MER_PATH, file_name), 'rb') as f:
+                        files[f'{terminal.me_paths.runtime}\\{file_name}'] = f.read()
+                start_time = time.time()
+                value = me.transfer.download_many(cip, terminal, files, overwrite=True, progress=progress_callback)
+                result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: download_many({len(files)} files, overwrite=True)\n'
+                    f'Value: {value}\n'
+                    f'Elapsed: {time.time() - start_time:.3f} seconds\n'
+                )
+                print(result)
+                for s in terminal.log: print(s)
+                self.assertTrue(value)
+                for (file_path, file_data) in files.items():
+                    self.assertEqual(me.helper.get_file_size(cip, terminal.me_paths, file_path), len(file_data))
+
+    def test_download_skip_if_same(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: download({download_file_path}, run_at_startup=False, skip_if_same=True)\n'
+            )
+            print(result)
+            resp = meu.download(download_file_path, overwrite=True, run_at_startup=False)
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+            start_time = time.time()
+            resp = meu.download(download_file_path, run_at_startup=False, skip_if_same=True)
+            end_time = time.time()
+            for s in resp.device.log: print(s)
+            print(f'Execution time: {end_time - start_time:.2f} seconds')
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+            self.assertTrue(any(s.startswith('Skipped download') for s in resp.device.log))
+
     def test_download_overwrite_single(self):
         print('')
         count = 0
@@ -402,6 +574,60 @@ class download_tests(unittest.TestCase):
             print('')
             self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
 
+    def test_download_overwrite_windowed(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: download({download_file_path}, overwrite=True, window=4)\n'
+            )
+            print(result)
+            start = time.time()
+            resp = meu.download(
+                file_path_local=download_file_path,
+                overwrite=True,
+                run_at_startup=False,
+                progress=progress_callback,
+                window=4
+            )
+            end = time.time()
+            elapsed_time = end - start
+            print(elapsed_time)
+            for s in resp.device.log: print(s)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+    def test_download_overwrite_connected(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: download({download_file_path}, overwrite=True, connected=True)\n'
+            )
+            print(result)
+            start = time.time()
+            resp = meu.download(
+                file_path_local=download_file_path,
+                overwrite=True,
+                run_at_startup=False,
+                progress=progress_callback,
+                connected=True
+            )
+            end = time.time()
+            elapsed_time = end - start
+            print(elapsed_time)
+            for s in resp.device.log: print(s)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
     def test_download_as_overwrite(self):
         print('')
         count = 0
@@ -470,6 +696,26 @@ class info_tests(unittest.TestCase):
             meu.get_terminal_info(print_log=True, redact_log=True)
             print('')
 
+    def test_get_terminal_info_cached(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            validation.invalidate_terminal_info()
+            meu = MEUtility(comms_path, driver=driver, terminal_info_ttl=60)
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: get_terminal_info twice with terminal_info_ttl=60\n'
+            )
+            print(result)
+            resp1 = meu.get_terminal_info()
+            start_time = time.time()
+            resp2 = meu.get_terminal_info()
+            print(f'Cached call: {time.time() - start_time:.3f} seconds')
+            print('')
+            self.assertEqual(resp1.device.me_identity, resp2.device.me_identity)
+            self.assertEqual(resp1.device.cip_identity.hardware_rev, resp2.device.cip_identity.hardware_rev)
+
     def test_get_terminal_info_silent(self):
         print('')
         for (device, driver, comms_path) in test_combinations:
@@ -597,6 +843,25 @@ class upload_tests(unittest.TestCase):
             #results.append(upload_file_path)
         #self.assertTrue(all(filecmp.cmp(results[0], x, shallow=False) for x in results))
 
+    def test_upload_overwrite_probe_chunk_size(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            comms.clear_me_chunk_sizes()
+            meu = MEUtility(comms_path, driver=driver, probe_chunk_size=True)
+            upload_file_path = os.path.join(LOCAL_OUTPUT_MER_PATH, device.name, driver, device.mer_files[0])
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: upload({upload_file_path}, overwrite=True) with probe_chunk_size=True\n'
+            )
+            print(result)
+            resp = meu.upload(upload_file_path, overwrite=True)
+            for s in resp.device.log: print(s)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+            self.assertGreaterEqual(comms.ME_CHUNK_SIZES[(comms_path, driver)], comms.get_me_chunk_size(comms_path))
+
     def test_upload_all_overwrite(self):
         print('')
         for (device, driver, comms_path) in test_combinations:
@@ -631,6 +896,48 @@ class upload_tests(unittest.TestCase):
             print('')
             self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
 
+    def test_upload_all_overwrite_windowed(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            meu = MEUtility(comms_path, driver=driver)
+            upload_folder_path = os.path.join(LOCAL_OUTPUT_MER_PATH, device.name, driver)
+            result = (
+                    f'Device: {device.name}\n'
+                    f'Driver: {driver}\n'
+                    f'Path: {comms_path}\n'
+                    f'Function: upload_all({LOCAL_OUTPUT_MER_PATH}, overwrite=True, window=4)\n'
+            )
+            print(result)
+            start = time.time()
+            resp = meu.upload_all(upload_folder_path, overwrite=True, progress=progress_callback, window=4)
+            end = time.time()
+            elapsed_time = end - start
+            print(elapsed_time)
+            for s in resp.device.log: print(s)
+            print('')
+            self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+
+    def test_upload_overwrite_pooled(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.DriverPool() as pool:
+                meu = MEUtility(comms_path, driver=driver, pool=pool)
+                upload_file_path = os.path.join(LOCAL_OUTPUT_MER_PATH, device.name, driver, device.mer_files[0])
+                result = (
+                        f'Device: {device.name}\n'
+                        f'Driver: {driver}\n'
+                        f'Path: {comms_path}\n'
+                        f'Function: upload({upload_file_path}, overwrite=True) twice with pool\n'
+                )
+                print(result)
+                resp = meu.upload(upload_file_path, overwrite=True)
+                self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+                resp = meu.upload(upload_file_path, overwrite=True)
+                for s in resp.device.log: print(s)
+                print('')
+                self.assertEqual(resp.status, types.ResponseStatus.SUCCESS)
+                self.assertEqual(pool._open_counts[(comms_path, driver)], 1)
+
     def test_upload_multiple_instances(self):
         print('')
         for (device, driver, comms_path) in test_combinations:
@@ -662,6 +969,42 @@ class upload_tests(unittest.TestCase):
     def tearDown(self):
         pass
 
+class async_tests(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    async def _download_upload(self, device, comms_path):
+        download_file_path = os.path.join(LOCAL_INPUT_MER_PATH, device.mer_files[0])
+        with open(download_file_path, 'rb') as f:
+            file_data = bytearray(f.read())
+
+        async with aiocomms.AsyncDriver(comms_path) as cip:
+            device_info = await validation.get_terminal_info_async(cip)
+            file_path_terminal = f'{device_info.me_paths.runtime}\\{device.mer_files[0]}'
+            await me.transfer.download_async(cip, device_info, file_data, file_path_terminal, overwrite=True)
+            resp_binary = await me.transfer.upload_async(cip, device_info, file_path_terminal)
+        for s in device_info.log: print(s)
+        return file_data, resp_binary
+
+    def test_download_upload_async(self):
+        print('')
+        targets = {comms_path: device for (device, driver, comms_path) in test_combinations}
+        for (comms_path, device) in targets.items():
+            print(f'Device: {device.name}\nPath: {comms_path}\nFunction: download_async/upload_async\n')
+
+        async def run_all():
+            return await asyncio.gather(*(self._download_upload(device, comms_path) for (comms_path, device) in targets.items()))
+
+        start_time = time.time()
+        results = asyncio.run(run_all())
+        print(f'Elapsed: {time.time() - start_time:.3f} seconds')
+        print('')
+        for (file_data, resp_binary) in results:
+            self.assertEqual(bytes(file_data), bytes(resp_binary))
+
+    def tearDown(self):
+        pass
+
 class decompress_tests(unittest.TestCase):
     def setUp(self):
         pass
@@ -736,6 +1079,164 @@ class decompress_tests(unittest.TestCase):
             elapsed_time = end - start
             print(elapsed_time)
 
+    def test_decompress_engines_match(self):
+        print('')
+        files = glob.glob(os.path.join(LOCAL_INPUT_FUP_PATH, '*.fup')) + STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            results = {}
+            for engine in me.decompress.get_engines():
+                start = time.time()
+                results[engine] = me.decompress.archive_to_stream(
+                    input_path=file,
+                    progress=None,
+                    engine=engine
+                )
+                end = time.time()
+                elapsed_time = end - start
+                print(f'{engine}: {elapsed_time}')
+
+            reference = results[me.decompress.DecompressEngine.REFERENCE]
+            for engine, streams in results.items():
+                self.assertEqual([x.name for x in streams], [x.name for x in reference])
+                for (stream, expected) in zip(streams, reference):
+                    self.assertEqual(bytes(stream.data), bytes(expected.data), f'{engine} {stream.name}')
+
+    def test_decompress_workers_match(self):
+        print('')
+        files = glob.glob(os.path.join(LOCAL_INPUT_FUP_PATH, '*.fup')) + STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            results = {}
+            for workers in [None, 4]:
+                start = time.time()
+                results[workers] = me.decompress.archive_to_stream(
+                    input_path=file,
+                    progress=None,
+                    workers=workers
+                )
+                end = time.time()
+                elapsed_time = end - start
+                print(f'{workers}: {elapsed_time}')
+
+            for (stream, expected) in zip(results[4], results[None]):
+                self.assertEqual(stream.path, expected.path)
+                self.assertEqual(bytes(stream.data), bytes(expected.data), stream.name)
+
+    def test_decompress_workers_registered_engine(self):
+        print('')
+        me.decompress.register_engine('test_reference', me.decompress._decompress_page)
+        for file in STANDALONE_MER_FILES:
+            print(file)
+            with self.assertRaises(ValueError):
+                me.decompress.archive_to_stream(input_path=file, engine='test_reference', workers=4)
+
+    def test_decompress_lazy_match(self):
+        print('')
+        files = STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            streams = me.decompress.archive_to_stream(input_path=file)
+            with me.decompress.open_archive(input_path=file) as archive:
+                self.assertEqual(list(archive), [x.name for x in streams])
+                for expected in streams:
+                    stream = archive[expected.name]
+                    self.assertEqual(stream.path, expected.path)
+                    self.assertEqual(bytes(stream.data), bytes(expected.data), stream.name)
+
+    def test_decompress_streaming_match(self):
+        print('')
+        files = STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            output_path = os.path.join(LOCAL_OUTPUT_MER_PATH, f'{os.path.basename(file)}_streaming')
+            me.decompress.archive_to_folder(
+                input_path=file,
+                output_path=output_path
+            )
+            for expected in me.decompress.archive_to_stream(input_path=file):
+                with open(os.path.join(output_path, *expected.path), 'rb') as f:
+                    self.assertEqual(f.read(), bytes(expected.data), expected.name)
+
+    def test_decompress_mapped_match(self):
+        print('')
+        files = glob.glob(os.path.join(LOCAL_INPUT_FUP_PATH, '*.fup')) + STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            results = {}
+            for map_container in [False, True]:
+                start = time.time()
+                with me.decompress.olefile.OleFileIO(file) as ole:
+                    results[map_container] = me.decompress.decompress_archive(
+                        ole=ole,
+                        map_container=map_container
+                    )
+                end = time.time()
+                elapsed_time = end - start
+                print(f'{map_container}: {elapsed_time}')
+
+            for (stream, expected) in zip(results[True], results[False]):
+                self.assertEqual(stream.path, expected.path)
+                self.assertEqual(bytes(stream.data), bytes(expected.data), stream.name)
+
+    def test_decompress_cache_match(self):
+        print('')
+        cache = me.cache.MEArchiveCache(os.path.join(LOCAL_OUTPUT_PATH, 'Cache'))
+        cache.clear()
+        files = STANDALONE_MER_FILES + STANDALONE_APA_FILES
+        for file in files:
+            print(file)
+            expected_streams = me.decompress.archive_to_stream(input_path=file, cache=cache)
+            start = time.time()
+            streams = me.decompress.archive_to_stream(input_path=file, cache=cache)
+            end = time.time()
+            elapsed_time = end - start
+            print(elapsed_time)
+
+            self.assertEqual([x.name for x in streams], [x.name for x in expected_streams])
+            for (stream, expected) in zip(streams, expected_streams):
+                self.assertEqual(stream.path, expected.path)
+                self.assertEqual(stream.size, expected.size)
+                self.assertEqual(bytes(stream.data), bytes(expected.data), stream.name)
+
+    def test_fup_flash_bundle_match(self):
+        print('')
+        os.makedirs(LOCAL_OUTPUT_OTW_PATH, exist_ok=True)
+        for file in glob.glob(os.path.join(LOCAL_INPUT_FUP_PATH, '*.fup')):
+            print(file)
+            bundle_path = os.path.join(LOCAL_OUTPUT_OTW_PATH, f'{os.path.basename(file)}.meb')
+            expected_streams = me.firmware.fup_to_otw(input_path=file)
+            me.firmware.prepare_flash_bundle(input_path=file, output_path=bundle_path)
+            start = time.time()
+            bundle = me.firmware.load_flash_bundle(bundle_path)
+            end = time.time()
+            elapsed_time = end - start
+            print(elapsed_time)
+
+            self.assertEqual(bundle.fup_name, os.path.basename(file))
+            self.assertEqual([x.name for x in bundle.streams], [x.name for x in expected_streams])
+            for (stream, expected) in zip(bundle.streams, expected_streams):
+                self.assertEqual(stream.path, expected.path)
+                self.assertEqual(bytes(stream.data), bytes(expected.data), stream.name)
+
+    def test_decompress_cache_fup_separate(self):
+        print('')
+        cache = me.cache.MEArchiveCache(os.path.join(LOCAL_OUTPUT_PATH, 'Cache'))
+        for file in glob.glob(os.path.join(LOCAL_INPUT_FUP_PATH, '*.fup')):
+            print(file)
+            cache.clear()
+            streams = me.decompress.archive_to_stream(input_path=file, cache=cache)
+            fuc_streams = me.firmware.fup_to_fuc(input_path=file, cache=cache)
+            self.assertNotIn('Upgrade.dat', [x.name for x in streams])
+            self.assertIn('Upgrade.dat', [x.name for x in fuc_streams])
+
+            # Same again the other way around
+            cache.clear()
+            fuc_streams = me.firmware.fup_to_fuc(input_path=file, cache=cache)
+            streams = me.decompress.archive_to_stream(input_path=file, cache=cache)
+            self.assertIn('Upgrade.dat', [x.name for x in fuc_streams])
+            self.assertNotIn('Upgrade.dat', [x.name for x in streams])
+
     def test_mer_get_shortcuts(self):
         print('')
         file = os.path.join(LOCAL_INPUT_MER_PATH, 'Test_v15_FTLinx1.mer')
@@ -1229,6 +1730,32 @@ class fuwhelper_tests(unittest.TestCase):
                     results.append(value)
         self.assertTrue(all(x == results[0] for x in results))
 
+    def test_get_states(self):
+        print('')
+        for (device, driver, comms_path) in test_combinations:
+            with comms.Driver(comms_path, driver=driver) as cip:
+                if device.local_firmware_helper_path:
+                    start_time = time.time()
+                    (folders_exist, files_exist, processes_running) = me.fuwhelper.get_states(
+                        cip=cip,
+                        paths=device.device_paths,
+                        folder_paths=['\\Windows', '\\Storage Card'],
+                        file_paths=[device.device_paths.fuwhelper_file, NONEXISTENT_FILE],
+                        process_names=[MERUNTIME_PROCESS]
+                    )
+                    result = (
+                        f'Device: {device.name}\n' 
+                        f'Driver: {driver}\n' 
+                        f'Path: {comms_path}\n'
+                        f'Function: get_states\n'
+                        f'Value: {folders_exist}, {files_exist}, {processes_running}\n'
+                        f'Elapsed: {time.time() - start_time:.3f} seconds\n'
+                    )
+                    print(result)
+                    self.assertTrue(folders_exist['\\Windows'])
+                    self.assertFalse(files_exist[NONEXISTENT_FILE])
+                    self.assertEqual(processes_running[MERUNTIME_PROCESS], me.fuwhelper.get_process_running(cip, device.device_paths, MERUNTIME_PROCESS))
+
     def test_get_free_space(self):
         print('')
         results = []